@@ -0,0 +1,284 @@
+from typing import Deque, Dict, Optional, Tuple
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import math
+import os
+import sqlite3
+import time
+from dotenv import load_dotenv
+from starlette.responses import JSONResponse
+
+from metrics import registry
+
+load_dotenv()
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+# In-flight API requests per worker; defaults to the worker's Mongo pool so
+# requests queue here, where reads can overtake writes, not in the driver
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", os.getenv("MONGODB_MAX_POOL_SIZE", 100)))
+ADMISSION_WRITE_SHARE = float(os.getenv("ADMISSION_WRITE_SHARE", 0.5))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 200))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", 1.0))
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", 50))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", 100))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", 10000))
+# SQLite file shared by the workers on one host; empty keeps buckets per worker
+RATE_LIMIT_STORE_PATH = os.getenv("RATE_LIMIT_STORE_PATH", "")
+
+# Event streams stay open for hours and exports run as long as the client
+# reads; they are rate limited when they connect but hold no concurrency
+# slot, which would otherwise starve other requests
+LONG_LIVED_PATHS = ("/api/efficiency/events", "/api/efficiency/export")
+READ_METHODS = ("GET", "HEAD")
+# POSTs that only read: their bodies are queries, not data to store
+READ_ONLY_POST_PATHS = ("/api/efficiency/scenarios", "/api/efficiency/scenarios/stream")
+READ_LANE = "read"
+WRITE_LANE = "write"
+
+ADMISSION_REJECTIONS = registry.counter(
+    "admission_rejections_total",
+    "Requests rejected before reaching the handler",
+    ["lane", "reason"]
+)
+
+
+class MemoryTokenBuckets:
+    def __init__(
+        self,
+        rate: float = RATE_LIMIT_PER_SECOND,
+        burst: float = RATE_LIMIT_BURST,
+        max_clients: int = RATE_LIMIT_MAX_CLIENTS,
+        clock=time.monotonic
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, cost: float = 1.0) -> float:
+        # Returns 0 when admitted, otherwise seconds until enough tokens refill
+        now = self.clock()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        # An evicted client simply starts again with a full bucket
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    async def take_async(self, key: str, cost: float = 1.0) -> float:
+        return self.take(key, cost)
+
+
+class SQLiteTokenBuckets:
+    # Same buckets as MemoryTokenBuckets in a WAL-mode file, so all workers
+    # on a host enforce one limit. Each take() is a single short transaction;
+    # take_async() runs it on a dedicated thread, since waiting for another
+    # worker's lock would otherwise stall the event loop. A bucket idle for
+    # burst / rate seconds is full again, the same as a missing row, so such
+    # rows are deleted at most once per that interval.
+    def __init__(
+        self,
+        path: str,
+        rate: float = RATE_LIMIT_PER_SECOND,
+        burst: float = RATE_LIMIT_BURST,
+        clock=time.time
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.connection = sqlite3.connect(path, timeout=1.0, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS token_buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS token_buckets_updated ON token_buckets (updated)")
+        self.idle_seconds = burst / rate
+        self._next_cleanup = 0.0
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="rate-limit")
+
+    def take(self, key: str, cost: float = 1.0) -> float:
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            now = self.clock()
+            row = cursor.execute("SELECT tokens, updated FROM token_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (self.burst, now)
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+            retry_after = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                retry_after = (cost - tokens) / self.rate
+            cursor.execute(
+                "INSERT OR REPLACE INTO token_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            if now >= self._next_cleanup:
+                cursor.execute("DELETE FROM token_buckets WHERE updated < ?", (now - self.idle_seconds,))
+                self._next_cleanup = now + self.idle_seconds
+            cursor.execute("COMMIT")
+            return retry_after
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+    async def take_async(self, key: str, cost: float = 1.0) -> float:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.take, key, cost)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.connection.close()
+
+
+def create_token_buckets(path: str = RATE_LIMIT_STORE_PATH):
+    return SQLiteTokenBuckets(path) if path else MemoryTokenBuckets()
+
+
+class ConcurrencyLimiter:
+    # Caps in-flight requests. Writes may hold at most write_limit slots, so
+    # reads always have headroom, and a freed slot goes to a queued read
+    # before a queued write. Beyond max_queue waiters, or after
+    # queue_timeout, requests are turned away instead of piling up in the
+    # Mongo wait queue.
+    def __init__(
+        self,
+        max_concurrency: int = ADMISSION_MAX_CONCURRENCY,
+        write_share: float = ADMISSION_WRITE_SHARE,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS
+    ):
+        self.max_concurrency = max_concurrency
+        self.write_limit = max(1, int(max_concurrency * write_share))
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.in_flight_writes = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {READ_LANE: deque(), WRITE_LANE: deque()}
+
+    def _has_slot(self, lane: str) -> bool:
+        if self.in_flight >= self.max_concurrency:
+            return False
+        return lane == READ_LANE or self.in_flight_writes < self.write_limit
+
+    def _admit(self, lane: str):
+        self.in_flight += 1
+        if lane == WRITE_LANE:
+            self.in_flight_writes += 1
+
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    async def acquire(self, lane: str) -> Optional[str]:
+        # None when admitted, otherwise the rejection reason
+        waiters = self._waiters[lane]
+        if not waiters and self._has_slot(lane):
+            self._admit(lane)
+            return None
+        if self.queued() >= self.max_queue:
+            return "queue_full"
+
+        future = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+            return None
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                return None
+            future.cancel()
+            waiters.remove(future)
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(lane)
+            else:
+                future.cancel()
+                waiters.remove(future)
+            raise
+
+    def release(self, lane: str):
+        self.in_flight -= 1
+        if lane == WRITE_LANE:
+            self.in_flight_writes -= 1
+        self._wake()
+
+    def _wake(self):
+        for lane in (READ_LANE, WRITE_LANE):
+            waiters = self._waiters[lane]
+            while waiters and self._has_slot(lane):
+                # The slot is handed over here, so nothing can take it in between
+                self._admit(lane)
+                waiters.popleft().set_result(True)
+
+
+def record_rejection(lane: str, reason: str):
+    if registry.enabled:
+        ADMISSION_REJECTIONS.inc(1, lane, reason)
+
+
+def request_lane(method: str, path: str) -> str:
+    # Writing POSTs (calculate, batch, ingest, jobs) are the bulk lane
+    return READ_LANE if method in READ_METHODS or path in READ_ONLY_POST_PATHS else WRITE_LANE
+
+
+def client_key(scope) -> str:
+    # Keyed on the peer address: the API has no authentication, so an
+    # X-API-Key header could be varied freely to get a fresh bucket
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+def reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": "Too Many Requests" if status_code == 429 else "Service Unavailable", "detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+class AdmissionMiddleware:
+    # Plain ASGI like MetricsMiddleware. Only /api/ routes are limited;
+    # health checks and /metrics always get through.
+    def __init__(self, app, limiter: Optional[ConcurrencyLimiter] = None, buckets=None, enabled: bool = ADMISSION_ENABLED):
+        self.app = app
+        self.enabled = enabled
+        self.limiter = limiter or ConcurrencyLimiter()
+        self.buckets = buckets if buckets is not None else (create_token_buckets() if RATE_LIMIT_ENABLED else None)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        lane = request_lane(scope["method"], scope["path"])
+
+        if self.buckets is not None:
+            retry_after = await self.buckets.take_async(client_key(scope))
+            if retry_after:
+                record_rejection(lane, "rate_limited")
+                await reject(429, "Rate limit exceeded", retry_after)(scope, receive, send)
+                return
+
+        if scope["path"] in LONG_LIVED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        reason = await self.limiter.acquire(lane)
+        if reason:
+            record_rejection(lane, reason)
+            await reject(503, "Server is at capacity, retry shortly", self.limiter.queue_timeout)(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(lane)
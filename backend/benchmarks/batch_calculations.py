@@ -0,0 +1,59 @@
+"""Compare the scalar and vectorized calculation paths.
+
+    python -m benchmarks.batch_calculations --buildings 10000 --periods 3
+"""
+import argparse
+import random
+import time
+
+from calculations import process_efficiency_calculation, process_efficiency_calculation_batch, PERIOD_INPUT_COLUMNS
+
+PERIOD_NAMES = ["business_hours", "after_hours", "weekend"]
+
+
+def build_requests(buildings: int, periods: int, seed: int = 0):
+    rng = random.Random(seed)
+    requests_data = []
+    for i in range(buildings):
+        period_list = []
+        for p in range(periods):
+            period = {
+                "period": PERIOD_NAMES[p % len(PERIOD_NAMES)],
+                "time_range": "08:00-18:00",
+                "days": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+            }
+            for column in PERIOD_INPUT_COLUMNS:
+                period[column] = round(rng.uniform(0.05, 50000), 2)
+            period_list.append(period)
+        requests_data.append({
+            "building_id": f"{i:024x}",
+            "measure_name": "Benchmark Measure",
+            "periods": period_list
+        })
+    return requests_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scalar vs vectorized calculation benchmark")
+    parser.add_argument("--buildings", type=int, default=10000)
+    parser.add_argument("--periods", type=int, default=3)
+    args = parser.parse_args()
+
+    requests_data = build_requests(args.buildings, args.periods)
+
+    start = time.perf_counter()
+    for request_data in requests_data:
+        process_efficiency_calculation(request_data)
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    process_efficiency_calculation_batch(requests_data)
+    batch_time = time.perf_counter() - start
+
+    print(f"buildings={args.buildings} periods/building={args.periods}")
+    print(f"scalar:     {scalar_time * 1000:9.1f} ms")
+    print(f"vectorized: {batch_time * 1000:9.1f} ms  ({scalar_time / batch_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Bulk ingestion throughput in records per second.
+
+Uploads N synthetic calculation requests as NDJSON to /api/efficiency/ingest
+and, for comparison, sends a sample of them one by one to
+/api/efficiency/calculate.
+
+    python -m benchmarks.ingest_throughput --records 100000 --single-sample 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.batch_calculations import build_requests
+
+
+async def ndjson_body(requests_data, chunk_records: int = 1000):
+    for start in range(0, len(requests_data), chunk_records):
+        chunk = requests_data[start:start + chunk_records]
+        yield ("\n".join(json.dumps(r) for r in chunk) + "\n").encode()
+
+
+async def bulk(client: httpx.AsyncClient, requests_data):
+    start = time.perf_counter()
+    response = await client.post(
+        "/api/efficiency/ingest",
+        content=ndjson_body(requests_data),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed, response.json()["inserted"]
+
+
+async def single(client: httpx.AsyncClient, requests_data, concurrency: int):
+    queue = list(requests_data)
+
+    async def worker():
+        while queue:
+            await client.post("/api/efficiency/calculate", json=queue.pop())
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return time.perf_counter() - start
+
+
+async def run(url: str, records: int, single_sample: int, concurrency: int):
+    requests_data = build_requests(records, 3)
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        elapsed, inserted = await bulk(client, requests_data)
+        print(f"bulk ingest:   {inserted}/{records} records in {elapsed:.2f}s = {inserted / elapsed:,.0f} records/s")
+
+        if single_sample:
+            sample = requests_data[:single_sample]
+            elapsed = await single(client, sample, concurrency)
+            print(
+                f"single POSTs:  {len(sample)} records in {elapsed:.2f}s = {len(sample) / elapsed:,.0f} records/s "
+                f"(concurrency={concurrency})"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk ingestion throughput benchmark")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--single-sample", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.records, args.single_sample, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
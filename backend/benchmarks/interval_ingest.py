@@ -0,0 +1,105 @@
+"""Interval meter-data aggregation throughput in rows per second.
+
+Generates a synthetic 15-minute AMI series (baseline year followed by a
+current year) and aggregates it in-process with intervals.aggregate_csv and
+aggregate_ndjson, fed in 64 KiB network-sized chunks. A scalar loop that
+classifies each reading with datetime.weekday() is timed on a sample for
+comparison. No server or database is needed.
+
+    python -m benchmarks.interval_ingest --rows 1000000 --scalar-sample 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+
+from intervals import IntervalAggregator, aggregate_csv, aggregate_ndjson, parse_clock, DEFAULT_TIME_RANGE
+
+CHUNK_BYTES = 64 * 1024
+
+
+def build_rows(rows: int, step_minutes: int = 15):
+    timestamps = np.datetime64("2023-01-02T00:00") + np.arange(rows) * np.timedelta64(step_minutes, "m")
+    rng = np.random.default_rng(7)
+    electric = np.round(rng.uniform(0.5, 12.0, rows), 3)
+    gas = np.round(rng.uniform(0.0, 0.8, rows), 3)
+    series = np.where(np.arange(rows) < rows // 2, "baseline", "current")
+    return np.datetime_as_string(timestamps).tolist(), electric.tolist(), gas.tolist(), series.tolist()
+
+
+def csv_body(data) -> bytes:
+    lines = ["timestamp,electric_kwh,gas_therms,series"]
+    lines += [f"{t},{e},{g},{s}" for t, e, g, s in zip(*data)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def ndjson_body(data) -> bytes:
+    return "".join(
+        json.dumps({"timestamp": t, "electric_kwh": e, "gas_therms": g, "series": s}) + "\n"
+        for t, e, g, s in zip(*data)
+    ).encode()
+
+
+async def chunks(body: bytes):
+    for start in range(0, len(body), CHUNK_BYTES):
+        yield body[start:start + CHUNK_BYTES]
+
+
+def time_aggregate(aggregate, body: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        aggregator = IntervalAggregator()
+        start = time.perf_counter()
+        asyncio.run(aggregate(chunks(body), aggregator))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_scalar(body: bytes, sample: int) -> float:
+    # What a client does today: parse and classify each CSV line on its own
+    start_minute, end_minute = (parse_clock(value) for value in DEFAULT_TIME_RANGE.split("-"))
+    lines = body.decode("utf-8").splitlines()[1:sample + 1]
+    totals = {}
+    start = time.perf_counter()
+    for line in lines:
+        timestamp, electric, gas, series = line.split(",")
+        moment = datetime.fromisoformat(timestamp)
+        minute = moment.hour * 60 + moment.minute
+        if moment.weekday() >= 5:
+            period = "weekend"
+        elif start_minute <= minute < end_minute:
+            period = "business_hours"
+        else:
+            period = "after_hours"
+        current = totals.get((series, period), (0.0, 0.0))
+        totals[(series, period)] = (current[0] + float(electric), current[1] + float(gas))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interval aggregation throughput benchmark")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--scalar-sample", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = build_rows(args.rows)
+    print(f"rows={args.rows} ({args.rows * 15 / 60 / 24 / 365:.1f} meter-years at 15 minutes)")
+    csv = csv_body(data)
+    print(f"{'path':>14}{'seconds':>10}{'rows/s':>14}")
+    for name, body, aggregate in [
+        ("csv", csv, aggregate_csv),
+        ("ndjson", ndjson_body(data), aggregate_ndjson),
+    ]:
+        seconds = time_aggregate(aggregate, body, args.repeat)
+        print(f"{name:>14}{seconds:>10.3f}{args.rows / seconds:>14.0f}")
+    sample = min(args.scalar_sample, args.rows)
+    seconds = time_scalar(csv, sample)
+    print(f"{'scalar loop':>14}{seconds:>10.3f}{sample / seconds:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
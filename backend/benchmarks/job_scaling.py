@@ -0,0 +1,56 @@
+"""Speedup of the job process pool across process counts.
+
+Shards a synthetic portfolio into job chunks and computes them with
+jobs.compute_chunk on a ProcessPoolExecutor of 1, 2, 4, ... processes (up to
+the CPU count). Pickling the chunks to and from the pool is included; MongoDB
+is not needed.
+
+    python -m benchmarks.job_scaling --calculations 200000 --chunk-size 2000
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.batch_calculations import build_requests
+from benchmarks.worker_scaling import worker_counts
+from jobs import compute_chunk
+
+
+def run(calculations: int, periods: int, chunk_size: int, max_processes: int, repeat: int):
+    requests_data = build_requests(calculations, periods)
+    chunks = [requests_data[i:i + chunk_size] for i in range(0, len(requests_data), chunk_size)]
+    context = multiprocessing.get_context("spawn")
+    baseline = None
+    print(f"calculations={calculations} periods={periods} chunks={len(chunks)}x{chunk_size}")
+    print(f"{'processes':>10}{'calc/s':>14}{'speedup':>10}")
+    for processes in worker_counts(max_processes):
+        with ProcessPoolExecutor(processes, mp_context=context) as pool:
+            # Start every process and import numpy before timing
+            list(pool.map(compute_chunk, chunks[:processes]))
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for _ in pool.map(compute_chunk, chunks):
+                    pass
+                best = min(best, time.perf_counter() - start)
+        throughput = calculations / best
+        baseline = baseline or throughput
+        print(f"{processes:>10}{throughput:>14.0f}{throughput / baseline:>9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job process pool scaling benchmark")
+    parser.add_argument("--calculations", type=int, default=200000)
+    parser.add_argument("--periods", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.calculations, args.periods, args.chunk_size, args.max_processes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
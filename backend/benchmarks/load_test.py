@@ -0,0 +1,139 @@
+"""Concurrent HTTP load test for the Energy Efficiency Tracker API.
+
+Runs N concurrent clients against a live server and reports latency
+percentiles per endpoint. Run it once against a build using the blocking
+pymongo driver and once against the async driver to compare:
+
+    python -m benchmarks.load_test --url http://localhost:8000 --concurrency 100 --requests 5000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+SAMPLE_BUILDING_ID = "60f7b3b3e4b0f3d4c8b4567a"
+
+SAMPLE_REQUEST = {
+    "building_id": SAMPLE_BUILDING_ID,
+    "measure_name": "Load Test Measure",
+    "periods": [
+        {
+            "period": "business_hours",
+            "time_range": "08:00-18:00",
+            "days": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+            "current_electric_kwh": 45000,
+            "current_gas_therms": 3200,
+            "baseline_electric_kwh": 52000,
+            "baseline_gas_therms": 4100,
+            "electric_rate": 0.12,
+            "gas_rate": 0.95
+        },
+        {
+            "period": "after_hours",
+            "time_range": "18:00-08:00",
+            "days": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+            "current_electric_kwh": 28000,
+            "current_gas_therms": 2200,
+            "baseline_electric_kwh": 35000,
+            "baseline_gas_therms": 2800,
+            "electric_rate": 0.12,
+            "gas_rate": 0.95
+        }
+    ]
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def build_workload(building_id: str) -> List[Dict[str, object]]:
+    return [
+        {"name": "summary", "method": "GET", "path": f"/api/efficiency/building/{building_id}/summary"},
+        {"name": "history", "method": "GET", "path": f"/api/efficiency/building/{building_id}"},
+        {"name": "period", "method": "GET", "path": f"/api/efficiency/building/{building_id}/period/business_hours"},
+        {"name": "calculate", "method": "POST", "path": "/api/efficiency/calculate", "json": SAMPLE_REQUEST},
+        {"name": "health", "method": "GET", "path": "/health"},
+    ]
+
+
+async def run_client(
+    client: httpx.AsyncClient,
+    workload: List[Dict[str, object]],
+    queue: asyncio.Queue,
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int]
+):
+    while True:
+        try:
+            index = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        op = workload[index % len(workload)]
+        start = time.perf_counter()
+        try:
+            response = await client.request(op["method"], op["path"], json=op.get("json"))
+            ok = response.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        latencies.setdefault(op["name"], []).append(elapsed_ms)
+        if not ok:
+            errors[op["name"]] = errors.get(op["name"], 0) + 1
+
+
+async def run_load_test(url: str, concurrency: int, total_requests: int, building_id: str):
+    workload = build_workload(building_id)
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        # Make sure the read endpoints have data to return
+        await client.post("/api/efficiency/calculate", json=SAMPLE_REQUEST)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(total_requests):
+            queue.put_nowait(i)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            run_client(client, workload, queue, latencies, errors)
+            for _ in range(concurrency)
+        ])
+        wall_time = time.perf_counter() - start
+
+    all_samples = [s for samples in latencies.values() for s in samples]
+    print(f"Target: {url}  concurrency={concurrency}  requests={total_requests}")
+    print(f"Wall time: {wall_time:.2f}s  throughput: {total_requests / wall_time:.1f} req/s")
+    print(f"{'endpoint':<12}{'count':>8}{'errors':>8}{'mean':>10}{'p50':>10}{'p99':>10}")
+    for name, samples in sorted(latencies.items()) + [("ALL", all_samples)]:
+        err = sum(errors.values()) if name == "ALL" else errors.get(name, 0)
+        print(
+            f"{name:<12}{len(samples):>8}{err:>8}"
+            f"{statistics.fmean(samples):>9.1f}ms"
+            f"{percentile(samples, 50):>8.1f}ms"
+            f"{percentile(samples, 99):>8.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the efficiency API")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--building-id", default=SAMPLE_BUILDING_ID)
+    args = parser.parse_args()
+
+    asyncio.run(run_load_test(args.url, args.concurrency, args.requests, args.building_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Overhead of the metrics middleware, stage timers and Database decorators.
+
+Sends POST /api/efficiency/calculate requests in-process (no network) with
+metrics enabled and disabled in alternating rounds and reports the relative
+difference in mean latency. The storage backend follows STORAGE_BACKEND
+unless --backend is given.
+
+    python -m benchmarks.metrics_overhead --requests 2000 --rounds 6
+    python -m benchmarks.metrics_overhead --backend sqlite
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+import main as api
+from benchmarks.load_test import SAMPLE_REQUEST
+from database import create_database, STORAGE_BACKEND
+from metrics import registry
+
+
+async def run_round(client: httpx.AsyncClient, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = await client.post("/api/efficiency/calculate", json=SAMPLE_REQUEST)
+        response.raise_for_status()
+    return (time.perf_counter() - start) / requests
+
+
+async def run(requests: int, rounds: int, backend: str):
+    # The handlers read the module-level db, so the chosen backend replaces it
+    db = api.db = create_database(backend)
+    await db.connect()
+    try:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            await run_round(client, 50)
+            timings = {True: [], False: []}
+            for i in range(rounds):
+                enabled = i % 2 == 0
+                registry.enabled = enabled
+                timings[enabled].append(await run_round(client, requests))
+    finally:
+        registry.enabled = True
+        db.disconnect()
+
+    with_metrics = statistics.median(timings[True])
+    without_metrics = statistics.median(timings[False])
+    overhead = (with_metrics - without_metrics) / without_metrics * 100
+    print(f"without metrics: {without_metrics * 1e6:8.1f} us/request")
+    print(f"with metrics:    {with_metrics * 1e6:8.1f} us/request")
+    print(f"overhead:        {overhead:8.2f} %")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics instrumentation overhead")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=6)
+    parser.add_argument("--backend", choices=["mongodb", "sqlite"], default=STORAGE_BACKEND)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.requests, args.rounds, args.backend))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Client-side vs server-side ($filter) period filtering.
+
+Seeds a synthetic collection (default 1M documents, 3 periods each) in a
+separate benchmark collection and compares bytes received and latency for
+the old find-then-filter-in-Python approach against the aggregation pipeline.
+
+    python -m benchmarks.period_filter --documents 1000000 --buildings 1000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo import DESCENDING
+
+from benchmarks.synthetic import BENCHMARK_COLLECTION, seed
+from database import Database, period_filter_pipeline
+
+RAW_CODEC = CodecOptions(document_class=RawBSONDocument)
+
+
+async def client_side(collection, building_id: str, period: str):
+    received = 0
+    results = []
+    cursor = collection.find({"building_id": building_id, "periods.period": period}).sort("created_at", DESCENDING)
+    async for raw in cursor:
+        received += len(raw.raw)
+        doc = dict(raw)
+        doc["periods"] = [p for p in doc["periods"] if p["period"] == period]
+        results.append(doc)
+    return received, len(results)
+
+
+async def server_side(collection, building_id: str, period: str):
+    received = 0
+    count = 0
+    async for raw in collection.aggregate(period_filter_pipeline(building_id, [period])):
+        received += len(raw.raw)
+        count += 1
+    return received, count
+
+
+async def measure(name, fn, collection, building_ids, period):
+    latencies = []
+    total_bytes = 0
+    for building_id in building_ids:
+        start = time.perf_counter()
+        received, _ = await fn(collection, building_id, period)
+        latencies.append((time.perf_counter() - start) * 1000)
+        total_bytes += received
+    latencies.sort()
+    print(
+        f"{name:<12} bytes/query={total_bytes / len(building_ids):>12,.0f}  "
+        f"mean={statistics.fmean(latencies):7.1f}ms  "
+        f"p50={latencies[len(latencies) // 2]:7.1f}ms  "
+        f"p99={latencies[int(len(latencies) * 0.99) - 1]:7.1f}ms"
+    )
+
+
+async def run(documents: int, buildings: int, queries: int, skip_seed: bool):
+    database = Database()
+    await database.connect()
+    collection = database.db[BENCHMARK_COLLECTION]
+    try:
+        if not skip_seed:
+            await seed(collection, documents, buildings)
+
+        raw_collection = collection.with_options(codec_options=RAW_CODEC)
+        rng = random.Random(0)
+        building_ids = [f"{rng.randrange(buildings):024x}" for _ in range(queries)]
+
+        print(f"documents={documents} buildings={buildings} queries={queries} period=weekend")
+        await measure("client-side", client_side, raw_collection, building_ids, "weekend")
+        await measure("server-side", server_side, raw_collection, building_ids, "weekend")
+    finally:
+        database.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Period filtering benchmark")
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--buildings", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded collection")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.documents, args.buildings, args.queries, args.skip_seed))
+
+
+if __name__ == "__main__":
+    main()
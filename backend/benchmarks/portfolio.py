@@ -0,0 +1,65 @@
+"""Latency of the portfolio aggregation on a large synthetic dataset.
+
+    python -m benchmarks.portfolio --documents 1000000 --buildings 10000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from pymongo import ASCENDING, DESCENDING
+
+from benchmarks.synthetic import BENCHMARK_COLLECTION, seed
+from database import Database
+from portfolio import portfolio_pipeline, format_portfolio, PORTFOLIO_INDEX_FIELDS
+
+
+async def time_pipeline(collection, repeat: int, **kwargs):
+    latencies = []
+    portfolio = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = await collection.aggregate(portfolio_pipeline(**kwargs), allowDiskUse=True).to_list(length=1)
+        latencies.append((time.perf_counter() - start) * 1000)
+        portfolio = format_portfolio(results[0])
+    return latencies, portfolio
+
+
+async def run(documents: int, buildings: int, repeat: int, skip_seed: bool):
+    database = Database()
+    await database.connect()
+    collection = database.db[BENCHMARK_COLLECTION]
+    try:
+        if not skip_seed:
+            await seed(collection, documents, buildings)
+            await collection.create_index(
+                [(field, DESCENDING if field == "created_at" else ASCENDING) for field in PORTFOLIO_INDEX_FIELDS]
+            )
+
+        for label, kwargs in [
+            ("totals + top/bottom", {"top_n": 10}),
+            ("with monthly buckets", {"top_n": 10, "bucket": "month"}),
+        ]:
+            latencies, portfolio = await time_pipeline(collection, repeat, **kwargs)
+            print(
+                f"{label:<22} buildings={portfolio['building_count']} "
+                f"calculations={portfolio['calculation_count']} "
+                f"mean={statistics.fmean(latencies):8.1f}ms min={min(latencies):8.1f}ms"
+            )
+    finally:
+        database.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portfolio aggregation benchmark")
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--buildings", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded collection")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.documents, args.buildings, args.repeat, args.skip_seed))
+
+
+if __name__ == "__main__":
+    main()
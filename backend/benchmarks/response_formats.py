@@ -0,0 +1,66 @@
+"""Bytes on the wire and CPU time per response format.
+
+Encodes pages of synthetic calculations (the history endpoint's payload) as
+JSON, columnar JSON and MessagePack, then compresses each with gzip and
+brotli. Formats whose optional package is missing are skipped. No database
+is needed.
+
+    python -m benchmarks.response_formats --page-sizes 10 100 1000
+"""
+import argparse
+import time
+
+from bson import ObjectId
+
+from benchmarks.batch_calculations import build_requests
+from calculations import process_efficiency_calculation_batch
+from compression import Compressor, available_encodings
+from serialization import encode_calculations, available_media_types
+
+
+def build_page(size: int):
+    calculations = process_efficiency_calculation_batch(build_requests(size, 3, seed=size))
+    for calculation in calculations:
+        calculation["_id"] = str(ObjectId())
+    return calculations
+
+
+def time_call(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1e6
+
+
+def run(page_sizes, repeat: int):
+    encodings = [None] + available_encodings()
+    print(f"{'page':>5} {'format':<42} {'encoding':<8} {'bytes':>10} {'encode us':>10} {'compress us':>12}")
+    for size in page_sizes:
+        page = build_page(size)
+        for media_type in available_media_types():
+            body, encode_us = time_call(lambda: encode_calculations(page, media_type), repeat)
+            for encoding in encodings:
+                if encoding is None:
+                    payload, compress_us = body, 0.0
+                else:
+                    payload, compress_us = time_call(lambda: Compressor(encoding).finish(body), repeat)
+                print(
+                    f"{size:>5} {media_type:<42} {encoding or 'identity':<8} {len(payload):>10,} "
+                    f"{encode_us:>10.1f} {compress_us:>12.1f}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response format benchmark")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    run(args.page_sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Compare the validated Pydantic response path with direct serialization.
+
+Times building and encoding one /calculate response, and encoding a page of
+three stored calculations, for several period counts. The legacy path builds
+a CalculationResponse; the fast path writes trusted documents straight to
+JSON. No database is needed.
+
+    python -m benchmarks.serialization --period-counts 1 10 1000
+"""
+import argparse
+import json
+import time
+
+from bson import ObjectId
+
+from calculations import process_efficiency_calculation, process_calculation_request
+from models import CalculationRequest, CalculationResponse, PeriodInput
+from serialization import calculation_to_json, calculations_to_json
+
+PERIOD_NAMES = ["business_hours", "after_hours", "weekend"]
+
+
+def build_request(period_count: int) -> CalculationRequest:
+    periods = [
+        PeriodInput(
+            period=PERIOD_NAMES[i % 3],
+            time_range="08:00-18:00",
+            days=["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+            current_electric_kwh=45000 + i,
+            current_gas_therms=3200,
+            baseline_electric_kwh=52000,
+            baseline_gas_therms=4100,
+            electric_rate=0.12,
+            gas_rate=0.95
+        )
+        for i in range(period_count)
+    ]
+    # model_construct lets large period counts bypass the 10-period API limit
+    return CalculationRequest.model_construct(
+        building_id="60f7b3b3e4b0f3d4c8b4567a",
+        measure_name="High-Efficiency HVAC System",
+        periods=periods
+    )
+
+
+def stored_document(period_count: int):
+    doc = process_calculation_request(build_request(period_count))
+    # As read back from MongoDB: ObjectId and naive UTC datetimes
+    doc["_id"] = ObjectId()
+    doc["calculation_timestamp"] = doc["calculation_timestamp"].replace(tzinfo=None)
+    doc["created_at"] = doc["created_at"].replace(tzinfo=None)
+    return doc
+
+
+def legacy_calculate(request: CalculationRequest) -> bytes:
+    result = process_efficiency_calculation(request.model_dump())
+    result["_id"] = "abc"
+    return CalculationResponse(**result).model_dump_json(by_alias=True).encode()
+
+
+def fast_calculate(request: CalculationRequest) -> bytes:
+    result = process_calculation_request(request)
+    result["_id"] = "abc"
+    return calculation_to_json(result)
+
+
+def legacy_read(docs) -> bytes:
+    return json.dumps([
+        CalculationResponse(**dict(doc, _id=str(doc["_id"]))).model_dump(mode="json", by_alias=True)
+        for doc in docs
+    ]).encode()
+
+
+def best_time(fn, argument, number: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(argument)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--period-counts", type=int, nargs="+", default=[1, 10, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'path':<10}{'periods':>8}{'legacy us':>12}{'fast us':>10}{'speedup':>9}")
+    for period_count in args.period_counts:
+        # Roughly the same number of periods serialized per timing
+        number = max(1, 2000 // period_count)
+        request = build_request(period_count)
+        docs = [stored_document(period_count) for _ in range(3)]
+        for path, legacy, fast, argument in [
+            ("calculate", legacy_calculate, fast_calculate, request),
+            ("read", legacy_read, calculations_to_json, docs),
+        ]:
+            legacy_time = best_time(legacy, argument, number, args.repeat)
+            fast_time = best_time(fast, argument, number, args.repeat)
+            print(
+                f"{path:<10}{period_count:>8}{legacy_time * 1e6:>12.1f}{fast_time * 1e6:>10.1f}"
+                f"{legacy_time / fast_time:>8.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
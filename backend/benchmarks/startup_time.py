@@ -0,0 +1,82 @@
+"""Time from process start to first request served.
+
+Spawns `uvicorn main:app` repeatedly and records how long it takes until
+/health/live answers (the app is accepting traffic) and until /health/ready
+answers (MongoDB is reachable). Before startup became non-blocking the first
+request could not be served until the ready point, so the gap between the two
+columns is the reduction in time to first request.
+
+    python -m benchmarks.startup_time --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def wait_for(url: str, start: float, deadline: float):
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=0.5).status_code == 200:
+                return time.monotonic() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def measure(port: int, timeout: float):
+    url = f"http://127.0.0.1:{port}"
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    start = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=backend_dir,
+    )
+    try:
+        deadline = start + timeout
+        live = wait_for(f"{url}/health/live", start, deadline)
+        ready = wait_for(f"{url}/health/ready", start, deadline)
+        return live, ready
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def format_seconds(values):
+    if not values:
+        return "     n/a"
+    return f"{statistics.median(values):7.2f}s"
+
+
+def run(port: int, runs: int, timeout: float):
+    live_times, ready_times = [], []
+    for _ in range(runs):
+        live, ready = measure(port, timeout)
+        if live is not None:
+            live_times.append(live)
+        if ready is not None:
+            ready_times.append(ready)
+
+    print(f"first request served (/health/live):  {format_seconds(live_times)}")
+    print(f"database ready (/health/ready):        {format_seconds(ready_times)}")
+    if len(ready_times) < runs:
+        print(f"{runs - len(ready_times)} of {runs} runs did not become ready within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first request served")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    run(args.port, args.runs, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Per-operation latency of the storage backends.
+
+Seeds the same synthetic history into a backend through the storage
+interface, then times every read and write the API uses and prints
+p50/p95/p99 in milliseconds. Run it once per backend to compare:
+
+    python -m benchmarks.storage_latency --backend sqlite --documents 100000
+    python -m benchmarks.storage_latency --backend mongodb --documents 100000
+
+The MongoDB run uses the --mongodb-database database (dropped first), never
+MONGODB_DB_NAME. The SQLite run uses a fresh file under --sqlite-path.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.batch_calculations import build_requests
+from benchmarks.synthetic import HISTORY_SPAN
+from calculations import process_efficiency_calculation_batch
+from database import create_database
+from pagination import encode_cursor
+
+
+def build_calculations(count: int, buildings: int, offset: int, documents: int, now: datetime):
+    requests_data = build_requests(count, 3, seed=offset)
+    for i, request_data in enumerate(requests_data):
+        request_data["building_id"] = f"{(offset + i) % buildings:024x}"
+    calculations = process_efficiency_calculation_batch(requests_data)
+    for i, calculation in enumerate(calculations):
+        created_at = now - HISTORY_SPAN * (1 - (offset + i) / documents)
+        calculation["calculation_timestamp"] = created_at
+        calculation["created_at"] = created_at
+    return calculations
+
+
+async def open_backend(backend: str, sqlite_path: str, mongodb_database: str):
+    storage = create_database(backend)
+    if backend == "sqlite":
+        storage.path = sqlite_path
+        for suffix in ["", "-wal", "-shm"]:
+            if os.path.exists(sqlite_path + suffix):
+                os.remove(sqlite_path + suffix)
+    else:
+        storage.open()
+        await storage.client.drop_database(mongodb_database)
+        storage.db = storage.client[mongodb_database]
+    await storage.connect()
+    return storage
+
+
+async def seed(storage, documents: int, buildings: int, chunk_size: int = 5000):
+    now = datetime.now(timezone.utc)
+    elapsed = 0.0
+    for offset in range(0, documents, chunk_size):
+        count = min(chunk_size, documents - offset)
+        calculations = build_calculations(count, buildings, offset, documents, now)
+        start = time.perf_counter()
+        await storage.insert_calculations(calculations)
+        elapsed += time.perf_counter() - start
+        print(f"\rseeded {offset + count}/{documents}", end="", flush=True)
+    print(f"\nseed: {documents / elapsed:,.0f} calculations/s through insert_calculations({chunk_size})")
+    return now
+
+
+async def measure(operation, repeat: int):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await operation()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run(args):
+    storage = await open_backend(args.backend, args.sqlite_path, args.mongodb_database)
+    rng = random.Random(7)
+    building_ids = [f"{index:024x}" for index in range(args.buildings)]
+    try:
+        now = await seed(storage, args.documents, args.buildings)
+        start, end = now - HISTORY_SPAN, now
+        cursor = encode_cursor(now - HISTORY_SPAN / 2, "f" * 24)
+        extra = iter(build_calculations(
+            args.repeat * (args.batch_size + 1), args.buildings, args.documents, args.documents, now
+        ))
+
+        async def stream_buildings():
+            async for _ in storage.stream_calculations(building_ids=rng.sample(building_ids, 10)):
+                pass
+
+        operations = [
+            ("insert_calculation", lambda: storage.insert_calculation(next(extra))),
+            ("insert_calculations", lambda: storage.insert_calculations(
+                [next(extra) for _ in range(args.batch_size)]
+            )),
+            ("find_page_by_building_id", lambda: storage.find_page_by_building_id(rng.choice(building_ids), 50)),
+            ("find_page (cursor)", lambda: storage.find_page_by_building_id(
+                rng.choice(building_ids), 50, after=cursor
+            )),
+            ("find_by_building_id", lambda: storage.find_by_building_id(rng.choice(building_ids))),
+            ("find_by_building_and_periods", lambda: storage.find_by_building_and_periods(
+                rng.choice(building_ids), ["weekend"]
+            )),
+            ("get_building_summary", lambda: storage.get_building_summary(rng.choice(building_ids))),
+            ("get_building_version", lambda: storage.get_building_version(rng.choice(building_ids))),
+            ("find_building_summaries", lambda: storage.find_building_summaries(
+                rng.sample(building_ids, min(100, args.buildings)), limit=100
+            )),
+            ("find_period_metrics", lambda: storage.find_period_metrics(rng.choice(building_ids), ["business_hours"])),
+            ("get_trend", lambda: storage.get_trend(rng.choice(building_ids), start, end, 200)),
+            ("get_trend (period)", lambda: storage.get_trend(rng.choice(building_ids), start, end, 200, "weekend")),
+            ("stream_calculations", stream_buildings),
+            ("get_portfolio", lambda: storage.get_portfolio(start=now - timedelta(days=365), bucket="month")),
+        ]
+        print(f"backend={args.backend} documents={args.documents} buildings={args.buildings} repeat={args.repeat}")
+        print(f"{'operation':<30}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+        for name, operation in operations:
+            repeat = max(1, args.repeat // 10) if name == "get_portfolio" else args.repeat
+            latencies = await measure(operation, repeat)
+            print(
+                f"{name:<30}{percentile(latencies, 0.5):>10.2f}{percentile(latencies, 0.95):>10.2f}"
+                f"{percentile(latencies, 0.99):>10.2f}{statistics.fmean(latencies):>10.2f}"
+            )
+    finally:
+        storage.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage backend latency benchmark")
+    parser.add_argument("--backend", choices=["sqlite", "mongodb"], default="sqlite")
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--buildings", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--sqlite-path", default="storage_benchmark.db")
+    parser.add_argument("--mongodb-database", default="energy_efficiency_benchmark")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Synthetic efficiency_calculations data shared by the MongoDB benchmarks."""
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ASCENDING, DESCENDING
+
+from benchmarks.batch_calculations import build_requests
+from calculations import process_efficiency_calculation_batch
+
+BENCHMARK_COLLECTION = "benchmark_efficiency_calculations"
+
+# Calculations are spread evenly over this window, newest first
+HISTORY_SPAN = timedelta(days=3 * 365)
+
+
+async def seed(collection, documents: int, buildings: int, chunk_size: int = 10000):
+    await collection.drop()
+    await collection.create_index([("building_id", ASCENDING), ("periods.period", ASCENDING)])
+    await collection.create_index([("created_at", DESCENDING)])
+
+    now = datetime.now(timezone.utc)
+    inserted = 0
+    while inserted < documents:
+        count = min(chunk_size, documents - inserted)
+        requests_data = build_requests(count, 3, seed=inserted)
+        for i, request_data in enumerate(requests_data):
+            request_data["building_id"] = f"{(inserted + i) % buildings:024x}"
+        calculations = process_efficiency_calculation_batch(requests_data)
+        for i, calculation in enumerate(calculations):
+            created_at = now - HISTORY_SPAN * ((inserted + i) / documents)
+            calculation["calculation_timestamp"] = created_at
+            calculation["created_at"] = created_at
+        await collection.insert_many(calculations, ordered=False)
+        inserted += count
+        print(f"\rseeded {inserted}/{documents}", end="", flush=True)
+    print()
@@ -0,0 +1,100 @@
+"""Embedded periods array vs the period_metrics time-series collection.
+
+Seeds the synthetic efficiency_calculations collection, builds a time-series
+copy of it with Database.migrate_to_timeseries, then compares storage size
+and the latency of one-year per-building period-metric range queries.
+
+    python -m benchmarks.timeseries_storage --documents 1000000 --buildings 1000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ASCENDING, DESCENDING
+
+from benchmarks.synthetic import BENCHMARK_COLLECTION, seed
+from database import Database
+from timeseries import timeseries_points_pipeline, embedded_points_pipeline
+
+BENCHMARK_TIMESERIES_COLLECTION = "benchmark_period_metrics"
+
+
+async def storage_mb(database: Database, name: str) -> str:
+    stats = await database.db.command("collStats", name)
+    storage = stats.get("storageSize", 0) / 1e6
+    indexes = stats.get("totalIndexSize", 0) / 1e6
+    return f"storage={storage:9.1f}MB indexes={indexes:8.1f}MB"
+
+
+async def measure(name, collection, build_pipeline, building_ids, start, end):
+    latencies = []
+    rows = 0
+    for building_id in building_ids:
+        began = time.perf_counter()
+        points = await collection.aggregate(
+            build_pipeline(building_id, ["weekend"], start, end, 10000)
+        ).to_list(length=None)
+        latencies.append((time.perf_counter() - began) * 1000)
+        rows += len(points)
+    latencies.sort()
+    print(
+        f"{name:<12} rows/query={rows / len(building_ids):8.1f}  "
+        f"mean={statistics.fmean(latencies):7.1f}ms  "
+        f"p50={latencies[len(latencies) // 2]:7.1f}ms  "
+        f"p99={latencies[int(len(latencies) * 0.99) - 1]:7.1f}ms"
+    )
+
+
+async def run(documents: int, buildings: int, queries: int, skip_seed: bool):
+    database = Database()
+    await database.connect()
+    database.collection_name = BENCHMARK_COLLECTION
+    database.timeseries_collection_name = BENCHMARK_TIMESERIES_COLLECTION
+    collection = database.db[BENCHMARK_COLLECTION]
+    try:
+        if not skip_seed:
+            await seed(collection, documents, buildings)
+            await collection.create_index([
+                ("building_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)
+            ])
+            began = time.perf_counter()
+            rows = await database.migrate_to_timeseries()
+            print(f"migrated {rows} rows in {time.perf_counter() - began:.1f}s")
+
+        print(f"embedded     {await storage_mb(database, BENCHMARK_COLLECTION)}")
+        print(f"time-series  {await storage_mb(database, BENCHMARK_TIMESERIES_COLLECTION)}")
+
+        rng = random.Random(0)
+        building_ids = [f"{rng.randrange(buildings):024x}" for _ in range(queries)]
+        end = datetime.now(timezone.utc)
+        start = end - timedelta(days=365)
+        print(f"documents={documents} buildings={buildings} queries={queries} period=weekend window=365d")
+        await measure("embedded", collection, embedded_points_pipeline, building_ids, start, end)
+        await measure(
+            "time-series",
+            database.db[BENCHMARK_TIMESERIES_COLLECTION],
+            timeseries_points_pipeline,
+            building_ids,
+            start,
+            end
+        )
+    finally:
+        database.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-series storage benchmark")
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--buildings", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse already seeded collections")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.documents, args.buildings, args.queries, args.skip_seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Throughput scaling of serve.py across worker counts.
+
+Starts the production server with 1, 2, 4, ... workers (up to the CPU count),
+drives it with the load test workload and prints requests per second for each
+worker count. The servers inherit the environment, so STORAGE_BACKEND picks
+the storage backend.
+
+    python -m benchmarks.worker_scaling --requests 10000 --concurrency 200
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.load_test import SAMPLE_REQUEST, build_workload
+
+
+def worker_counts(max_workers: int):
+    count = 1
+    while count < max_workers:
+        yield count
+        count *= 2
+    yield max_workers
+
+
+def wait_until_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health/ready", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready within {timeout}s")
+
+
+async def measure_throughput(url: str, total_requests: int, concurrency: int) -> float:
+    workload = build_workload(SAMPLE_REQUEST["building_id"])
+    counter = iter(range(total_requests))
+
+    async def client_loop(client: httpx.AsyncClient):
+        for index in counter:
+            op = workload[index % len(workload)]
+            await client.request(op["method"], op["path"], json=op.get("json"))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        await client.post("/api/efficiency/calculate", json=SAMPLE_REQUEST)
+        start = time.perf_counter()
+        await asyncio.gather(*[client_loop(client) for _ in range(concurrency)])
+        return total_requests / (time.perf_counter() - start)
+
+
+def run(port: int, total_requests: int, concurrency: int, max_workers: int):
+    url = f"http://127.0.0.1:{port}"
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    baseline = None
+    print(f"{'workers':>8}{'req/s':>12}{'speedup':>10}")
+    for workers in worker_counts(max_workers):
+        server = subprocess.Popen(
+            [sys.executable, "serve.py", "--workers", str(workers), "--port", str(port), "--host", "127.0.0.1"],
+            cwd=backend_dir,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_until_ready(url)
+            throughput = asyncio.run(measure_throughput(url, total_requests, concurrency))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        baseline = baseline or throughput
+        print(f"{workers:>8}{throughput:>12.1f}{throughput / baseline:>9.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker throughput scaling benchmark")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    run(args.port, args.requests, args.concurrency, args.max_workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Interactive read latency during a bulk write burst.
+
+Runs dashboard-style readers (summary, history, period) against a live
+server, first alone and then while bulk clients post large
+/api/efficiency/calculate/batch requests. Prints reader p50/p99 for both
+phases and how the bulk requests were answered (201, 429, 503). Start the
+server with ADMISSION_ENABLED=false for the unprotected baseline.
+
+    python -m benchmarks.write_burst --readers 20 --writers 50 --batch-size 500 --seconds 15
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.load_test import SAMPLE_REQUEST, SAMPLE_BUILDING_ID, build_workload, percentile
+
+
+async def reader(client: httpx.AsyncClient, deadline: float, latencies: List[float], statuses: Counter):
+    reads = [op for op in build_workload(SAMPLE_BUILDING_ID) if op["method"] == "GET" and op["name"] != "health"]
+    index = 0
+    while time.perf_counter() < deadline:
+        op = reads[index % len(reads)]
+        index += 1
+        start = time.perf_counter()
+        response = await client.get(op["path"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] += 1
+
+
+async def writer(client: httpx.AsyncClient, deadline: float, batch: Dict[str, object], statuses: Counter):
+    while time.perf_counter() < deadline:
+        response = await client.post("/api/efficiency/calculate/batch", json=batch)
+        statuses[response.status_code] += 1
+        if response.status_code in (429, 503):
+            # Well-behaved clients honour Retry-After
+            await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+
+
+async def run_phase(url: str, readers: int, writers: int, batch_size: int, seconds: float):
+    batch = {"calculations": [SAMPLE_REQUEST] * batch_size}
+    latencies: List[float] = []
+    read_statuses: Counter = Counter()
+    write_statuses: Counter = Counter()
+    limits = httpx.Limits(max_connections=readers + writers, max_keepalive_connections=readers + writers)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120.0) as client:
+        # Bulk clients identify themselves, so per-key rate limits apply to them separately
+        bulk_client = httpx.AsyncClient(
+            base_url=url, limits=limits, timeout=120.0, headers={"X-API-Key": "write-burst-benchmark"}
+        )
+        async with bulk_client:
+            deadline = time.perf_counter() + seconds
+            await asyncio.gather(
+                *[reader(client, deadline, latencies, read_statuses) for _ in range(readers)],
+                *[writer(bulk_client, deadline, batch, write_statuses) for _ in range(writers)]
+            )
+    return latencies, read_statuses, write_statuses
+
+
+def report(label: str, latencies: List[float], read_statuses: Counter, write_statuses: Counter):
+    writes = " ".join(f"{code}={count}" for code, count in sorted(write_statuses.items())) or "-"
+    reads = " ".join(f"{code}={count}" for code, count in sorted(read_statuses.items()))
+    print(
+        f"{label:<10}{len(latencies):>8}{percentile(latencies, 50):>9.1f}ms{percentile(latencies, 99):>9.1f}ms"
+        f"   reads: {reads}   writes: {writes}"
+    )
+
+
+async def run(url: str, readers: int, writers: int, batch_size: int, seconds: float):
+    async with httpx.AsyncClient(base_url=url, timeout=60.0) as client:
+        await client.post("/api/efficiency/calculate", json=SAMPLE_REQUEST)
+
+    print(f"Target: {url}  readers={readers}  writers={writers}  batch={batch_size}  seconds={seconds}")
+    print(f"{'phase':<10}{'reads':>8}{'p50':>11}{'p99':>11}")
+    report("quiet", *await run_phase(url, readers, 0, batch_size, seconds))
+    report("burst", *await run_phase(url, readers, writers, batch_size, seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reader latency under a bulk write burst")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=15)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.readers, args.writers, args.batch_size, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,32 @@
 from typing import List, Dict, Any
 from datetime import datetime, timezone
-from models import PeriodInput, PeriodMetrics, EfficiencySummary
+import numpy as np
+from models import PeriodInput, PeriodMetrics, EfficiencySummary, CalculationRequest
+
+PERFORMANCE_GRADE_THRESHOLDS = [
+    (20, "A+ (Excellent)"),
+    (15, "A (Very Good)"),
+    (10, "B+ (Good)"),
+    (5, "B (Satisfactory)"),
+    (0, "C (Needs Improvement)"),
+]
+POOR_PERFORMANCE_GRADE = "D (Poor)"
+
+PERIOD_INPUT_COLUMNS = [
+    "current_electric_kwh",
+    "current_gas_therms",
+    "baseline_electric_kwh",
+    "baseline_gas_therms",
+    "electric_rate",
+    "gas_rate",
+]
 
 
 def calculate_period_metrics(period: PeriodInput) -> PeriodMetrics:
+    return PeriodMetrics(**period_metrics_values(period))
+
+
+def period_metrics_values(period: PeriodInput) -> Dict[str, Any]:
     electric_savings_kwh = period.baseline_electric_kwh - period.current_electric_kwh
     gas_savings_therms = period.baseline_gas_therms - period.current_gas_therms
     
@@ -13,12 +36,12 @@ def calculate_period_metrics(period: PeriodInput) -> PeriodMetrics:
     
     electric_efficiency_improvement_percent = (
         (electric_savings_kwh / period.baseline_electric_kwh) * 100
-        if period.baseline_electric_kwh > 0 else 0
+        if period.baseline_electric_kwh > 0 else 0.0
     )
     
     gas_efficiency_improvement_percent = (
         (gas_savings_therms / period.baseline_gas_therms) * 100
-        if period.baseline_gas_therms > 0 else 0
+        if period.baseline_gas_therms > 0 else 0.0
     )
     
     baseline_electric_cost = period.baseline_electric_kwh * period.electric_rate
@@ -27,92 +50,275 @@ def calculate_period_metrics(period: PeriodInput) -> PeriodMetrics:
     
     overall_efficiency_improvement_percent = (
         (total_cost_savings / total_baseline_cost) * 100
-        if total_baseline_cost > 0 else 0
+        if total_baseline_cost > 0 else 0.0
     )
     
     performance_grade = calculate_performance_grade(overall_efficiency_improvement_percent)
     
-    return PeriodMetrics(
-        period=period.period,
-        time_range=period.time_range,
-        days=period.days,
-        current_electric_kwh=period.current_electric_kwh,
-        current_gas_therms=period.current_gas_therms,
-        baseline_electric_kwh=period.baseline_electric_kwh,
-        baseline_gas_therms=period.baseline_gas_therms,
-        electric_savings_kwh=round(electric_savings_kwh, 2),
-        gas_savings_therms=round(gas_savings_therms, 2),
-        electric_cost_savings=round(electric_cost_savings, 2),
-        gas_cost_savings=round(gas_cost_savings, 2),
-        total_cost_savings=round(total_cost_savings, 2),
-        electric_efficiency_improvement_percent=round(electric_efficiency_improvement_percent, 2),
-        gas_efficiency_improvement_percent=round(gas_efficiency_improvement_percent, 2),
-        overall_efficiency_improvement_percent=round(overall_efficiency_improvement_percent, 2),
-        performance_grade=performance_grade
-    )
+    return {
+        "period": period.period,
+        "time_range": period.time_range,
+        "days": period.days,
+        "current_electric_kwh": period.current_electric_kwh,
+        "current_gas_therms": period.current_gas_therms,
+        "baseline_electric_kwh": period.baseline_electric_kwh,
+        "baseline_gas_therms": period.baseline_gas_therms,
+        "electric_savings_kwh": round(electric_savings_kwh, 2),
+        "gas_savings_therms": round(gas_savings_therms, 2),
+        "electric_cost_savings": round(electric_cost_savings, 2),
+        "gas_cost_savings": round(gas_cost_savings, 2),
+        "total_cost_savings": round(total_cost_savings, 2),
+        "electric_efficiency_improvement_percent": round(electric_efficiency_improvement_percent, 2),
+        "gas_efficiency_improvement_percent": round(gas_efficiency_improvement_percent, 2),
+        "overall_efficiency_improvement_percent": round(overall_efficiency_improvement_percent, 2),
+        "performance_grade": performance_grade
+    }
 
 
 def calculate_summary(periods: List[PeriodMetrics]) -> EfficiencySummary:
-    total_electric_savings_kwh = sum(p.electric_savings_kwh for p in periods)
-    total_gas_savings_therms = sum(p.gas_savings_therms for p in periods)
-    total_cost_savings = sum(p.total_cost_savings for p in periods)
+    return EfficiencySummary(**summary_values([p.model_dump() for p in periods]))
+
+
+def summary_values(periods: List[Dict[str, Any]]) -> Dict[str, Any]:
+    total_electric_savings_kwh = sum((p["electric_savings_kwh"] for p in periods), 0.0)
+    total_gas_savings_therms = sum((p["gas_savings_therms"] for p in periods), 0.0)
+    total_cost_savings = sum((p["total_cost_savings"] for p in periods), 0.0)
     
     average_efficiency_improvement_percent = (
-        sum(p.overall_efficiency_improvement_percent for p in periods) / len(periods)
-        if periods else 0
+        sum(p["overall_efficiency_improvement_percent"] for p in periods) / len(periods)
+        if periods else 0.0
     )
     
     overall_performance_grade = calculate_performance_grade(average_efficiency_improvement_percent)
     
     if periods:
-        best_performing_period = max(periods, key=lambda p: p.overall_efficiency_improvement_percent).period
-        worst_performing_period = min(periods, key=lambda p: p.overall_efficiency_improvement_percent).period
+        best_performing_period = max(periods, key=lambda p: p["overall_efficiency_improvement_percent"])["period"]
+        worst_performing_period = min(periods, key=lambda p: p["overall_efficiency_improvement_percent"])["period"]
     else:
         best_performing_period = ""
         worst_performing_period = ""
     
-    return EfficiencySummary(
-        total_electric_savings_kwh=round(total_electric_savings_kwh, 2),
-        total_gas_savings_therms=round(total_gas_savings_therms, 2),
-        total_cost_savings=round(total_cost_savings, 2),
-        average_efficiency_improvement_percent=round(average_efficiency_improvement_percent, 2),
-        overall_performance_grade=overall_performance_grade,
-        best_performing_period=best_performing_period,
-        worst_performing_period=worst_performing_period
-    )
+    return {
+        "total_electric_savings_kwh": round(total_electric_savings_kwh, 2),
+        "total_gas_savings_therms": round(total_gas_savings_therms, 2),
+        "total_cost_savings": round(total_cost_savings, 2),
+        "average_efficiency_improvement_percent": round(average_efficiency_improvement_percent, 2),
+        "overall_performance_grade": overall_performance_grade,
+        "best_performing_period": best_performing_period,
+        "worst_performing_period": worst_performing_period
+    }
 
 
 def calculate_performance_grade(efficiency_improvement_percent: float) -> str:
-    if efficiency_improvement_percent >= 20:
-        return "A+ (Excellent)"
-    elif efficiency_improvement_percent >= 15:
-        return "A (Very Good)"
-    elif efficiency_improvement_percent >= 10:
-        return "B+ (Good)"
-    elif efficiency_improvement_percent >= 5:
-        return "B (Satisfactory)"
-    elif efficiency_improvement_percent >= 0:
-        return "C (Needs Improvement)"
-    else:
-        return "D (Poor)"
+    for threshold, grade in PERFORMANCE_GRADE_THRESHOLDS:
+        if efficiency_improvement_percent >= threshold:
+            return grade
+    return POOR_PERFORMANCE_GRADE
 
 
 def process_efficiency_calculation(request_data: Dict[str, Any]) -> Dict[str, Any]:
-    building_id = request_data["building_id"]
-    measure_name = request_data["measure_name"]
-    periods_data = request_data["periods"]
-    
-    periods = [PeriodInput(**period) for period in periods_data]
-    period_metrics = [calculate_period_metrics(period) for period in periods]
-    summary = calculate_summary(period_metrics)
+    periods = [PeriodInput(**period) for period in request_data["periods"]]
+    return build_calculation(request_data["building_id"], request_data["measure_name"], periods)
+
+
+def process_calculation_request(request: CalculationRequest) -> Dict[str, Any]:
+    # Fast path for requests FastAPI has already validated at the edge
+    return build_calculation(request.building_id, request.measure_name, request.periods)
+
+
+def build_calculation(building_id: str, measure_name: str, periods: List[PeriodInput]) -> Dict[str, Any]:
+    # Inputs are already validated PeriodInput models, so metrics and summary
+    # are kept as plain dicts instead of round-tripping through Pydantic.
+    period_metrics = [period_metrics_values(period) for period in periods]
+    summary = summary_values(period_metrics)
     calculation_timestamp = datetime.now(timezone.utc)
     
     return {
         "building_id": building_id,
         "measure_name": measure_name,
         "calculation_timestamp": calculation_timestamp,
-        "periods": [metric.model_dump() for metric in period_metrics],
-        "summary": summary.model_dump(),
+        "periods": period_metrics,
+        "summary": summary,
         "created_at": calculation_timestamp
     }
 
+
+def round_array(values: np.ndarray, ndigits: int = 2) -> np.ndarray:
+    # np.round scales, rounds half-to-even and unscales, which disagrees with
+    # Python's correctly-rounded round() when the scaled value lands on .5.
+    # Only those ties are re-rounded with the builtin so results match exactly.
+    rounded = np.round(values, ndigits)
+    scaled = np.abs(values) * 10 ** ndigits
+    ties = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    if ties.size:
+        rounded[ties] = [round(value, ndigits) for value in values[ties].tolist()]
+    return rounded
+
+
+def calculate_performance_grades(efficiency_improvement_percent: np.ndarray) -> np.ndarray:
+    conditions = [efficiency_improvement_percent >= threshold for threshold, _ in PERFORMANCE_GRADE_THRESHOLDS]
+    grades = [grade for _, grade in PERFORMANCE_GRADE_THRESHOLDS]
+    return np.select(conditions, grades, default=POOR_PERFORMANCE_GRADE)
+
+
+def _safe_percent(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    positive = denominator > 0
+    safe_denominator = np.where(positive, denominator, 1.0)
+    return np.where(positive, (numerator / safe_denominator) * 100, 0.0)
+
+
+def calculate_period_metrics_batch(
+    current_electric_kwh: np.ndarray,
+    current_gas_therms: np.ndarray,
+    baseline_electric_kwh: np.ndarray,
+    baseline_gas_therms: np.ndarray,
+    electric_rate: np.ndarray,
+    gas_rate: np.ndarray
+) -> Dict[str, np.ndarray]:
+    current_electric_kwh = np.asarray(current_electric_kwh, dtype=np.float64)
+    current_gas_therms = np.asarray(current_gas_therms, dtype=np.float64)
+    baseline_electric_kwh = np.asarray(baseline_electric_kwh, dtype=np.float64)
+    baseline_gas_therms = np.asarray(baseline_gas_therms, dtype=np.float64)
+    electric_rate = np.asarray(electric_rate, dtype=np.float64)
+    gas_rate = np.asarray(gas_rate, dtype=np.float64)
+
+    # Same operation order as calculate_period_metrics so every intermediate
+    # float is bit-identical to the scalar path.
+    electric_savings_kwh = baseline_electric_kwh - current_electric_kwh
+    gas_savings_therms = baseline_gas_therms - current_gas_therms
+
+    electric_cost_savings = electric_savings_kwh * electric_rate
+    gas_cost_savings = gas_savings_therms * gas_rate
+    total_cost_savings = electric_cost_savings + gas_cost_savings
+
+    electric_efficiency_improvement_percent = _safe_percent(electric_savings_kwh, baseline_electric_kwh)
+    gas_efficiency_improvement_percent = _safe_percent(gas_savings_therms, baseline_gas_therms)
+
+    total_baseline_cost = baseline_electric_kwh * electric_rate + baseline_gas_therms * gas_rate
+    overall_efficiency_improvement_percent = _safe_percent(total_cost_savings, total_baseline_cost)
+
+    return {
+        "current_electric_kwh": current_electric_kwh,
+        "current_gas_therms": current_gas_therms,
+        "baseline_electric_kwh": baseline_electric_kwh,
+        "baseline_gas_therms": baseline_gas_therms,
+        "electric_savings_kwh": round_array(electric_savings_kwh),
+        "gas_savings_therms": round_array(gas_savings_therms),
+        "electric_cost_savings": round_array(electric_cost_savings),
+        "gas_cost_savings": round_array(gas_cost_savings),
+        "total_cost_savings": round_array(total_cost_savings),
+        "electric_efficiency_improvement_percent": round_array(electric_efficiency_improvement_percent),
+        "gas_efficiency_improvement_percent": round_array(gas_efficiency_improvement_percent),
+        "overall_efficiency_improvement_percent": round_array(overall_efficiency_improvement_percent),
+        "performance_grade": calculate_performance_grades(overall_efficiency_improvement_percent),
+    }
+
+
+def calculate_summary_batch(
+    metrics: Dict[str, np.ndarray],
+    group_index: np.ndarray,
+    group_count: int
+) -> Dict[str, np.ndarray]:
+    group_index = np.asarray(group_index, dtype=np.intp)
+
+    def group_sum(values: np.ndarray) -> np.ndarray:
+        # np.add.at accumulates unbuffered in index order, matching sum()
+        totals = np.zeros(group_count, dtype=np.float64)
+        np.add.at(totals, group_index, values)
+        return totals
+
+    counts = np.bincount(group_index, minlength=group_count)
+    efficiency = metrics["overall_efficiency_improvement_percent"]
+    average_efficiency = np.where(
+        counts > 0,
+        group_sum(efficiency) / np.maximum(counts, 1),
+        0.0
+    )
+
+    # First occurrence of the max/min within each group, like max()/min()
+    positions = np.arange(len(group_index))
+    best_order = np.lexsort((positions, -efficiency, group_index))
+    worst_order = np.lexsort((positions, efficiency, group_index))
+    group_starts = np.searchsorted(group_index[best_order], np.arange(group_count))
+    present = counts > 0
+
+    best_index = np.zeros(group_count, dtype=np.intp)
+    worst_index = np.zeros(group_count, dtype=np.intp)
+    best_index[present] = best_order[group_starts[present]]
+    worst_index[present] = worst_order[group_starts[present]]
+
+    return {
+        "total_electric_savings_kwh": round_array(group_sum(metrics["electric_savings_kwh"])),
+        "total_gas_savings_therms": round_array(group_sum(metrics["gas_savings_therms"])),
+        "total_cost_savings": round_array(group_sum(metrics["total_cost_savings"])),
+        "average_efficiency_improvement_percent": round_array(average_efficiency),
+        "overall_performance_grade": calculate_performance_grades(average_efficiency),
+        "best_index": np.where(present, best_index, -1),
+        "worst_index": np.where(present, worst_index, -1),
+    }
+
+
+def process_efficiency_calculation_batch(requests_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    periods_flat = [period for request in requests_data for period in request["periods"]]
+    group_index = np.repeat(
+        np.arange(len(requests_data)),
+        [len(request["periods"]) for request in requests_data]
+    )
+
+    columns = {
+        column: np.fromiter((period[column] for period in periods_flat), dtype=np.float64, count=len(periods_flat))
+        for column in PERIOD_INPUT_COLUMNS
+    }
+    metrics = calculate_period_metrics_batch(**columns)
+    summaries = calculate_summary_batch(metrics, group_index, len(requests_data))
+
+    metric_columns = {name: values.tolist() for name, values in metrics.items()}
+    summary_columns = {name: values.tolist() for name, values in summaries.items()}
+    calculation_timestamp = datetime.now(timezone.utc)
+
+    period_metrics = [
+        {
+            "period": period["period"],
+            "time_range": period["time_range"],
+            "days": period["days"],
+            "current_electric_kwh": metric_columns["current_electric_kwh"][i],
+            "current_gas_therms": metric_columns["current_gas_therms"][i],
+            "baseline_electric_kwh": metric_columns["baseline_electric_kwh"][i],
+            "baseline_gas_therms": metric_columns["baseline_gas_therms"][i],
+            "electric_savings_kwh": metric_columns["electric_savings_kwh"][i],
+            "gas_savings_therms": metric_columns["gas_savings_therms"][i],
+            "electric_cost_savings": metric_columns["electric_cost_savings"][i],
+            "gas_cost_savings": metric_columns["gas_cost_savings"][i],
+            "total_cost_savings": metric_columns["total_cost_savings"][i],
+            "electric_efficiency_improvement_percent": metric_columns["electric_efficiency_improvement_percent"][i],
+            "gas_efficiency_improvement_percent": metric_columns["gas_efficiency_improvement_percent"][i],
+            "overall_efficiency_improvement_percent": metric_columns["overall_efficiency_improvement_percent"][i],
+            "performance_grade": metric_columns["performance_grade"][i],
+        }
+        for i, period in enumerate(periods_flat)
+    ]
+
+    results = []
+    offset = 0
+    for g, request in enumerate(requests_data):
+        count = len(request["periods"])
+        best = summary_columns["best_index"][g]
+        worst = summary_columns["worst_index"][g]
+        results.append({
+            "building_id": request["building_id"],
+            "measure_name": request["measure_name"],
+            "calculation_timestamp": calculation_timestamp,
+            "periods": period_metrics[offset:offset + count],
+            "summary": {
+                "total_electric_savings_kwh": summary_columns["total_electric_savings_kwh"][g],
+                "total_gas_savings_therms": summary_columns["total_gas_savings_therms"][g],
+                "total_cost_savings": summary_columns["total_cost_savings"][g],
+                "average_efficiency_improvement_percent": summary_columns["average_efficiency_improvement_percent"][g],
+                "overall_performance_grade": summary_columns["overall_performance_grade"][g],
+                "best_performing_period": periods_flat[best]["period"] if best >= 0 else "",
+                "worst_performing_period": periods_flat[worst]["period"] if worst >= 0 else "",
+            },
+            "created_at": calculation_timestamp
+        })
+        offset += count
+    return results
@@ -1,13 +1,38 @@
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import ConnectionFailure, OperationFailure
-from typing import List, Dict, Any, Optional
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, UpdateOne, ReplaceOne, ReturnDocument, WriteConcern
+from pymongo.errors import ConnectionFailure, OperationFailure, BulkWriteError, DuplicateKeyError
+from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
 from bson import ObjectId
 import os
 from dotenv import load_dotenv
-import time
+import asyncio
+
+from pagination import encode_cursor, decode_cursor, keyset_filter, build_projection
+from summaries import building_summary_update, apply_building_summary_update
+from portfolio import portfolio_pipeline, format_portfolio, PORTFOLIO_INDEX_FIELDS
+from trend import trend_bucket_ms, trend_pipeline, format_trend_points
+from metrics import timed_operation, PoolCheckoutListener
+from jobs import (
+    CHUNK_STAGED, CHUNK_PENDING, CHUNK_RUNNING, CHUNK_COMPLETED, CHUNK_FAILED, OPEN_CHUNK_STATES,
+    JOB_RECEIVING, JOB_QUEUED, JOB_COMPLETED, JOB_FAILED, format_job
+)
+from timeseries import (
+    TIMESERIES_COLLECTION, TIMESERIES_OPTIONS, period_metric_rows,
+    timeseries_points_pipeline, embedded_points_pipeline, DEFAULT_POINT_LIMIT
+)
+from events import EVENTS_POLL_SECONDS, EVENTS_POLL_LOOKBACK_SECONDS
+from storage import Storage
+from sqlite_database import SQLiteDatabase
 
 load_dotenv()
 
+# "mongodb", or "sqlite" for the embedded backend in sqlite_database.py
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongodb").lower()
+
 MONGODB_HOST = os.getenv("MONGODB_HOST", "localhost")
 MONGODB_PORT = int(os.getenv("MONGODB_PORT", 27017))
 MONGODB_USERNAME = os.getenv("MONGODB_USERNAME", "admin")
@@ -19,54 +44,201 @@ MONGODB_AUTH_SOURCE = os.getenv("MONGODB_AUTH_SOURCE", "admin")
 # If not provided, will use individual connection parameters for local MongoDB
 MONGODB_URL = os.getenv("MONGODB_URL")
 
+# Connection pool sizing (per process)
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", 100))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", 0))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", 60000))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 10000))
+
+# Production workers skip this and rely on `python manage.py create-indexes`
+MONGODB_CREATE_INDEXES_ON_STARTUP = os.getenv("MONGODB_CREATE_INDEXES_ON_STARTUP", "true").lower() == "true"
+
+# Also write every period as a row of the period_metrics time-series collection
+# and serve period-metric reads from it. Run `python manage.py migrate-timeseries`
+# before enabling so existing history is backfilled.
+MONGODB_TIMESERIES_ENABLED = os.getenv("MONGODB_TIMESERIES_ENABLED", "false").lower() == "true"
+
+# Delay between background connection attempts while the API is already serving
+MONGODB_WARM_UP_RETRY_SECONDS = float(os.getenv("MONGODB_WARM_UP_RETRY_SECONDS", 5))
+
+# Where dashboard reads (history, periods, summary, trend, period metrics,
+# building summaries, portfolio, export, scenarios) go. Writes, deduplication
+# lookups and job coordination always use the primary.
+MONGODB_READ_PREFERENCE = os.getenv("MONGODB_READ_PREFERENCE", "primary")
+# Secondaries further behind than this are not read from; -1 for no bound
+MONGODB_MAX_STALENESS_SECONDS = int(os.getenv("MONGODB_MAX_STALENESS_SECONDS", -1))
+
+# Write concern profiles: "majority" or a number of members. Interactive
+# writes (calculate, batch, interval uploads) are acknowledged once durable
+# on a majority; bulk writes (ingest, jobs, migrations) by the primary alone.
+MONGODB_WRITE_CONCERN_INTERACTIVE = os.getenv("MONGODB_WRITE_CONCERN_INTERACTIVE", "majority")
+MONGODB_WRITE_CONCERN_BULK = os.getenv("MONGODB_WRITE_CONCERN_BULK", "1")
+MONGODB_WRITE_CONCERN_TIMEOUT_MS = int(os.getenv("MONGODB_WRITE_CONCERN_TIMEOUT_MS", 10000))
+
+INTERACTIVE_WRITES = "interactive"
+BULK_WRITES = "bulk"
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+# The server's lower bound for maxStalenessSeconds
+MIN_MAX_STALENESS_SECONDS = 90
+
+
+# Server error code for $changeStream on a standalone server
+CHANGE_STREAMS_UNSUPPORTED = 40573
+CALCULATION_INSERTS_PIPELINE = [{"$match": {"operationType": "insert"}}]
+
+
+def make_read_preference(mode: str, max_staleness: int = -1):
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference {mode!r}; use one of: {', '.join(READ_PREFERENCES)}")
+    if mode == "primary":
+        if max_staleness != -1:
+            raise ValueError("A staleness bound needs a read preference other than primary")
+        return Primary()
+    if max_staleness != -1 and max_staleness < MIN_MAX_STALENESS_SECONDS:
+        raise ValueError(f"Max staleness must be -1 or at least {MIN_MAX_STALENESS_SECONDS} seconds")
+    return READ_PREFERENCES[mode](max_staleness=max_staleness)
+
+
+def make_write_concern(w: str, timeout_ms: int = MONGODB_WRITE_CONCERN_TIMEOUT_MS) -> WriteConcern:
+    w = w if w == "majority" else int(w)
+    # Unacknowledged writes would also hide the duplicate-key errors that
+    # deduplication relies on
+    if w == 0:
+        raise ValueError("Write concern must acknowledge writes (w >= 1 or majority)")
+    return WriteConcern(w=w, wtimeout=timeout_ms or None)
+
+
+# Set by Database.read_session for the reads of one request
+_read_session: ContextVar = ContextVar("read_session", default=None)
+
+
+def period_filter_pipeline(building_id: str, periods: List[str]) -> List[Dict[str, Any]]:
+    # Only the matching period sub-documents leave the server
+    return [
+        {"$match": {"building_id": building_id, "periods.period": {"$in": periods}}},
+        {"$sort": {"created_at": DESCENDING}},
+        {"$project": {
+            "building_id": 1,
+            "measure_name": 1,
+            "calculation_timestamp": 1,
+            "summary": 1,
+            "created_at": 1,
+            "periods": {
+                "$filter": {
+                    "input": "$periods",
+                    "as": "period",
+                    "cond": {"$in": ["$$period.period", periods]}
+                }
+            }
+        }}
+    ]
+
 
 class Database:
     def __init__(self):
         self.client = None
         self.db = None
         self.collection_name = "efficiency_calculations"
+        self.summaries_collection_name = "building_summaries"
+        self.timeseries_collection_name = TIMESERIES_COLLECTION
+        self.jobs_collection_name = "jobs"
+        self.idempotency_keys_collection_name = "idempotency_keys"
+        self.job_chunks_collection_name = "job_chunks"
+        self.state = "starting"
+        self.last_error = None
+        self.index_state = "pending" if MONGODB_CREATE_INDEXES_ON_STARTUP else "skipped"
+        self.read_preference = make_read_preference(MONGODB_READ_PREFERENCE, MONGODB_MAX_STALENESS_SECONDS)
+        self.write_concerns = {
+            INTERACTIVE_WRITES: make_write_concern(MONGODB_WRITE_CONCERN_INTERACTIVE),
+            BULK_WRITES: make_write_concern(MONGODB_WRITE_CONCERN_BULK),
+        }
         
-    def connect(self):
+    def _pool_options(self) -> Dict[str, Any]:
+        return {
+            "maxPoolSize": MONGODB_MAX_POOL_SIZE,
+            "minPoolSize": MONGODB_MIN_POOL_SIZE,
+            "maxIdleTimeMS": MONGODB_MAX_IDLE_TIME_MS,
+            "waitQueueTimeoutMS": MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            "event_listeners": [PoolCheckoutListener()],
+        }
+
+    def open(self):
+        # Creating the client does no I/O; sockets are opened on first use
+        if self.client is not None:
+            return
+        # Use MONGODB_URL if provided (for MongoDB Atlas or connection strings)
+        # Otherwise, use individual connection parameters (for local MongoDB)
+        if MONGODB_URL:
+            # MongoDB Atlas or connection string format
+            # mongodb+srv automatically handles SSL/TLS
+            # Increase timeouts for better reliability
+            self.client = AsyncIOMotorClient(
+                MONGODB_URL,
+                serverSelectionTimeoutMS=30000,
+                connectTimeoutMS=30000,
+                socketTimeoutMS=30000,
+                retryWrites=True,
+                **self._pool_options()
+            )
+        else:
+            # Local MongoDB with individual parameters
+            self.client = AsyncIOMotorClient(
+                host=MONGODB_HOST,
+                port=MONGODB_PORT,
+                username=MONGODB_USERNAME,
+                password=MONGODB_PASSWORD,
+                authSource=MONGODB_AUTH_SOURCE,
+                authMechanism='SCRAM-SHA-256',
+                directConnection=True,
+                serverSelectionTimeoutMS=10000,
+                connectTimeoutMS=10000,
+                **self._pool_options()
+            )
+        self.db = self.client[MONGODB_DB_NAME]
+
+    async def prepare(self):
+        await self.client.admin.command('ping')
+        self.state = "ready"
+        self.last_error = None
+        if MONGODB_CREATE_INDEXES_ON_STARTUP and self.index_state != "ready":
+            self.index_state = "building"
+            try:
+                await self.create_indexes()
+                self.index_state = "ready"
+            except Exception:
+                self.index_state = "failed"
+
+    async def warm_up(self, retry_delay: float = MONGODB_WARM_UP_RETRY_SECONDS):
+        # Runs as a background task so the app serves liveness checks while Mongo comes up
+        self.open()
+        while True:
+            try:
+                await self.prepare()
+                return
+            except Exception as e:
+                self.state = "unavailable"
+                self.last_error = str(e)
+                await asyncio.sleep(retry_delay)
+
+    async def connect(self):
         max_retries = 3
         retry_delay = 2
         
+        self.open()
         for attempt in range(max_retries):
             try:
-                # Use MONGODB_URL if provided (for MongoDB Atlas or connection strings)
-                # Otherwise, use individual connection parameters (for local MongoDB)
-                if MONGODB_URL:
-                    # MongoDB Atlas or connection string format
-                    # mongodb+srv automatically handles SSL/TLS
-                    # Increase timeouts for better reliability
-                    self.client = MongoClient(
-                        MONGODB_URL,
-                        serverSelectionTimeoutMS=30000,
-                        connectTimeoutMS=30000,
-                        socketTimeoutMS=30000,
-                        retryWrites=True
-                    )
-                    self.db = self.client[MONGODB_DB_NAME]
-                else:
-                    # Local MongoDB with individual parameters
-                    self.client = MongoClient(
-                        host=MONGODB_HOST,
-                        port=MONGODB_PORT,
-                        username=MONGODB_USERNAME,
-                        password=MONGODB_PASSWORD,
-                        authSource=MONGODB_AUTH_SOURCE,
-                        authMechanism='SCRAM-SHA-256',
-                        directConnection=True,
-                        serverSelectionTimeoutMS=10000,
-                        connectTimeoutMS=10000
-                    )
-                    self.db = self.client[MONGODB_DB_NAME]
-                
-                self.client.admin.command('ping')
-                self._create_indexes()
+                await self.prepare()
                 return
             except ConnectionFailure as e:
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
+                    await asyncio.sleep(retry_delay)
                     continue
                 if MONGODB_URL:
                     raise ConnectionFailure(
@@ -80,7 +252,7 @@ class Database:
                     ) from e
             except OperationFailure as e:
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
+                    await asyncio.sleep(retry_delay)
                     continue
                 if MONGODB_URL:
                     raise OperationFailure(
@@ -95,7 +267,7 @@ class Database:
                     ) from e
             except Exception as e:
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
+                    await asyncio.sleep(retry_delay)
                     continue
                 raise Exception(
                     f"Unexpected error connecting to MongoDB: {str(e)}. "
@@ -106,68 +278,616 @@ class Database:
         if self.client:
             self.client.close()
             
-    def _create_indexes(self):
+    @timed_operation
+    async def ping(self):
+        await self.client.admin.command('ping')
+
+    def _read_collection(self, name: str):
+        # Dashboard reads, routed by MONGODB_READ_PREFERENCE
+        return self.db.get_collection(name, read_preference=self.read_preference)
+
+    def _write_collection(self, name: str, profile: str):
+        return self.db.get_collection(name, write_concern=self.write_concerns[profile])
+
+    @asynccontextmanager
+    async def read_session(self):
+        # Routed reads inside share one causally consistent session, so a
+        # secondary never answers with older data than an earlier read of the
+        # same request, e.g. the body behind an ETag's version
+        if isinstance(self.read_preference, Primary) or _read_session.get() is not None:
+            yield
+            return
+        async with await self.client.start_session(causal_consistency=True) as session:
+            token = _read_session.set(session)
+            try:
+                yield
+            finally:
+                _read_session.reset(token)
+
+    async def create_indexes(self):
+        collection = self.db[self.collection_name]
+        await collection.create_index([("building_id", ASCENDING)])
+        await collection.create_index([
+            ("building_id", ASCENDING),
+            ("periods.period", ASCENDING)
+        ])
+        await collection.create_index([("created_at", DESCENDING)])
+        await collection.create_index([
+            ("building_id", ASCENDING),
+            ("created_at", DESCENDING),
+            ("_id", DESCENDING)
+        ])
+        
+        await collection.create_index(
+            [(field, DESCENDING if field == "created_at" else ASCENDING) for field in PORTFOLIO_INDEX_FIELDS]
+        )
+        
+        # Deduplication of POST /calculate; documents from batch and ingest
+        # have neither field and are left out of both indexes
+        await collection.create_index(
+            [("request_hash", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"request_hash": {"$exists": True}}
+        )
+        await collection.create_index(
+            [("idempotency_key", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"idempotency_key": {"$exists": True}}
+        )
+        
+        # Makes a retried job chunk skip calculations an earlier attempt stored
+        await collection.create_index(
+            [("job_id", ASCENDING), ("job_index", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"job_id": {"$exists": True}}
+        )
+        
+        summaries = self.db[self.summaries_collection_name]
+        await summaries.create_index([("building_id", ASCENDING)], unique=True)
+        
+        job_chunks = self.db[self.job_chunks_collection_name]
+        await job_chunks.create_index([("job_id", ASCENDING), ("index", ASCENDING)], unique=True)
+        await job_chunks.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+        
+        if MONGODB_TIMESERIES_ENABLED:
+            await self.create_timeseries_collection()
+            
+    async def create_timeseries_collection(self):
+        existing = await self.db.list_collection_names(filter={"name": self.timeseries_collection_name})
+        if not existing:
+            await self.db.create_collection(self.timeseries_collection_name, timeseries=TIMESERIES_OPTIONS)
+        await self.db[self.timeseries_collection_name].create_index([
+            ("meta.building_id", ASCENDING),
+            ("meta.period", ASCENDING),
+            ("timestamp", ASCENDING)
+        ])
+        
+    @timed_operation
+    async def insert_calculation(self, calculation_data: Dict[str, Any]) -> str:
+        try:
+            collection = self._write_collection(self.collection_name, INTERACTIVE_WRITES)
+            result = await collection.insert_one(calculation_data)
+            inserted_id = str(result.inserted_id)
+            await self._write_collection(self.summaries_collection_name, INTERACTIVE_WRITES).update_one(
+                {"building_id": calculation_data["building_id"]},
+                building_summary_update(inserted_id, calculation_data),
+                upsert=True
+            )
+            await self._write_period_metrics([(inserted_id, calculation_data)], INTERACTIVE_WRITES)
+            return inserted_id
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def find_existing_calculation(
+        self,
+        request_hash: str,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
         try:
             collection = self.db[self.collection_name]
-            collection.create_index([("building_id", ASCENDING)])
-            collection.create_index([
-                ("building_id", ASCENDING),
-                ("periods.period", ASCENDING)
-            ])
-            collection.create_index([("created_at", DESCENDING)])
-        except Exception:
-            pass
+            query = {"request_hash": request_hash}
+            if idempotency_key:
+                # A reused key wins over the hash so the caller can detect a mismatch
+                query = {"$or": [{"idempotency_key": idempotency_key}, query]}
+                docs = await collection.find(query).to_list(length=2)
+                keyed = [doc for doc in docs if doc.get("idempotency_key") == idempotency_key]
+                return (keyed or docs or [None])[0]
+            return await collection.find_one(query)
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def bind_idempotency_key(self, idempotency_key: str, request_hash: str) -> str:
+        # The first request a key is used with stays bound to it, whether that
+        # request was computed or answered from an earlier calculation
+        try:
+            keys = self._write_collection(self.idempotency_keys_collection_name, INTERACTIVE_WRITES)
+            try:
+                bound = await keys.find_one_and_update(
+                    {"_id": idempotency_key},
+                    {"$setOnInsert": {"request_hash": request_hash, "created_at": datetime.now(timezone.utc)}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                # A concurrent first use of the key won the upsert
+                bound = await keys.find_one({"_id": idempotency_key})
+            return bound["request_hash"]
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def insert_calculations(self, calculations_data: List[Dict[str, Any]]) -> List[str]:
+        try:
+            collection = self._write_collection(self.collection_name, INTERACTIVE_WRITES)
+            result = await collection.insert_many(calculations_data)
+            inserted_ids = [str(inserted_id) for inserted_id in result.inserted_ids]
+            await self._update_building_summaries(zip(inserted_ids, calculations_data), INTERACTIVE_WRITES)
+            await self._write_period_metrics(zip(inserted_ids, calculations_data), INTERACTIVE_WRITES)
+            return inserted_ids
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def insert_calculations_unordered(
+        self,
+        calculations_data: List[Dict[str, Any]]
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        # Returns one (inserted_id, error) pair per input document. With
+        # ordered=False a failing document does not stop the rest of the batch.
+        collection = self._write_collection(self.collection_name, BULK_WRITES)
+        errors: Dict[int, str] = {}
+        try:
+            await collection.insert_many(calculations_data, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                errors[write_error["index"]] = write_error.get("errmsg", "Write error")
         
-    def insert_calculation(self, calculation_data: Dict[str, Any]) -> str:
+        # insert_many assigns _id client-side before sending the batch
+        results = [
+            (None, errors[i]) if i in errors else (str(calculation["_id"]), None)
+            for i, calculation in enumerate(calculations_data)
+        ]
+        inserted = [
+            (inserted_id, calculation)
+            for (inserted_id, _), calculation in zip(results, calculations_data)
+            if inserted_id is not None
+        ]
+        await self._update_building_summaries(inserted, BULK_WRITES)
+        await self._write_period_metrics(inserted, BULK_WRITES)
+        await self._repair_job_duplicates(calculations_data, results)
+        return results
+            
+    async def _repair_job_duplicates(self, calculations_data, results) -> None:
+        # A duplicate (job_id, job_index) was stored by an earlier attempt of
+        # the chunk, which may have died before its summary and period-metric
+        # writes. Redo both idempotently: rebuild the buildings' summaries and
+        # insert only the period rows that are missing.
+        indexes: Dict[str, List[int]] = {}
+        for calculation, (_, error) in zip(calculations_data, results):
+            if "job_id" in calculation and "E11000" in (error or ""):
+                indexes.setdefault(calculation["job_id"], []).append(calculation["job_index"])
+        if not indexes:
+            return
+        stored = await self.db[self.collection_name].find({"$or": [
+            {"job_id": job_id, "job_index": {"$in": job_indexes}} for job_id, job_indexes in indexes.items()
+        ]}).to_list(length=None)
+        if not stored:
+            return
+        await self._rebuild_summaries(sorted({calculation["building_id"] for calculation in stored}))
+        await self._write_missing_period_metrics(stored)
+            
+    async def _write_missing_period_metrics(self, calculations) -> None:
+        if not MONGODB_TIMESERIES_ENABLED:
+            return
+        timeseries = self._write_collection(self.timeseries_collection_name, BULK_WRITES)
+        existing = {
+            (row["calculation_id"], row["meta"]["period"])
+            async for row in timeseries.find(
+                {"calculation_id": {"$in": [calculation["_id"] for calculation in calculations]}},
+                {"calculation_id": 1, "meta.period": 1}
+            )
+        }
+        rows = [
+            row
+            for calculation in calculations
+            for row in period_metric_rows(calculation["_id"], calculation)
+            if (row["calculation_id"], row["meta"]["period"]) not in existing
+        ]
+        if rows:
+            await timeseries.insert_many(rows, ordered=False)
+            
+    @timed_operation
+    async def _update_building_summaries(self, calculations, profile: str) -> None:
+        updates = [
+            UpdateOne(
+                {"building_id": calculation["building_id"]},
+                building_summary_update(calculation_id, calculation),
+                upsert=True
+            )
+            for calculation_id, calculation in calculations
+        ]
+        if updates:
+            await self._write_collection(self.summaries_collection_name, profile).bulk_write(updates, ordered=True)
+            
+    @timed_operation
+    async def _write_period_metrics(self, calculations, profile: str) -> None:
+        if not MONGODB_TIMESERIES_ENABLED:
+            return
+        rows = [
+            row
+            for calculation_id, calculation in calculations
+            for row in period_metric_rows(calculation_id, calculation)
+        ]
+        if rows:
+            await self._write_collection(self.timeseries_collection_name, profile).insert_many(rows, ordered=False)
+            
+    @timed_operation
+    async def find_period_metrics(
+        self,
+        building_id: str,
+        periods: Optional[List[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = DEFAULT_POINT_LIMIT
+    ) -> List[Dict[str, Any]]:
         try:
-            collection = self.db[self.collection_name]
-            result = collection.insert_one(calculation_data)
-            return str(result.inserted_id)
+            if MONGODB_TIMESERIES_ENABLED:
+                collection = self._read_collection(self.timeseries_collection_name)
+                pipeline = timeseries_points_pipeline(building_id, periods, start, end, limit)
+            else:
+                collection = self._read_collection(self.collection_name)
+                pipeline = embedded_points_pipeline(building_id, periods, start, end, limit)
+            return await collection.aggregate(pipeline, session=_read_session.get()).to_list(length=None)
         except OperationFailure as e:
             raise
             
-    def find_by_building_id(self, building_id: str) -> List[Dict[str, Any]]:
+    async def migrate_to_timeseries(self, batch_size: int = 5000) -> int:
+        # Rebuilds period_metrics from scratch. Inserting in created_at order
+        # lets MongoDB fill one bucket per building/period at a time.
+        await self.db.drop_collection(self.timeseries_collection_name)
+        await self.create_timeseries_collection()
+        timeseries = self._write_collection(self.timeseries_collection_name, BULK_WRITES)
+        started_at = datetime.now(timezone.utc)
+        
+        rows: List[Dict[str, Any]] = []
+        migrated = 0
+        cursor = self.db[self.collection_name].find(
+            {"created_at": {"$lt": started_at}},
+            batch_size=batch_size
+        ).sort("created_at", ASCENDING)
         try:
-            collection = self.db[self.collection_name]
+            async for calculation in cursor:
+                rows.extend(period_metric_rows(calculation["_id"], calculation))
+                if len(rows) >= batch_size:
+                    await timeseries.insert_many(rows, ordered=False)
+                    migrated += len(rows)
+                    rows = []
+        finally:
+            await cursor.close()
+        if rows:
+            await timeseries.insert_many(rows, ordered=False)
+            migrated += len(rows)
+        return migrated
+            
+    @timed_operation
+    async def find_by_building_id(self, building_id: str) -> List[Dict[str, Any]]:
+        try:
+            collection = self._read_collection(self.collection_name)
             cursor = collection.find(
-                {"building_id": building_id}
+                {"building_id": building_id},
+                session=_read_session.get()
             ).sort("created_at", DESCENDING)
             
             results = []
-            for doc in cursor:
+            async for doc in cursor:
                 doc["_id"] = str(doc["_id"])
                 results.append(doc)
             return results
         except OperationFailure as e:
             raise
             
-    def find_by_building_and_period(
+    @timed_operation
+    async def find_page_by_building_id(
+        self,
+        building_id: str,
+        limit: int,
+        after: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        try:
+            collection = self._read_collection(self.collection_name)
+            query: Dict[str, Any] = {"building_id": building_id}
+            if after:
+                query.update(keyset_filter(*decode_cursor(after)))
+            
+            cursor = collection.find(
+                query,
+                projection=build_projection(fields),
+                session=_read_session.get()
+            ).sort([("created_at", DESCENDING), ("_id", DESCENDING)]).limit(limit + 1)
+            
+            results = []
+            async for doc in cursor:
+                results.append(doc)
+            
+            next_cursor = None
+            if len(results) > limit:
+                results = results[:limit]
+                last = results[-1]
+                next_cursor = encode_cursor(last["created_at"], last["_id"])
+            
+            for doc in results:
+                doc["_id"] = str(doc["_id"])
+            return results, next_cursor
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def stream_calculations(
+        self,
+        building_ids: Optional[List[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 1000,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        collection = self._read_collection(self.collection_name)
+        async for doc in self._stream(collection, building_ids, start, end, batch_size, projection):
+            yield doc
+
+    async def _stream(
+        self,
+        collection,
+        building_ids: Optional[List[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 1000,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        query: Dict[str, Any] = {}
+        if building_ids:
+            query["building_id"] = {"$in": building_ids}
+        if start or end:
+            query["created_at"] = {}
+            if start:
+                query["created_at"]["$gte"] = start
+            if end:
+                query["created_at"]["$lt"] = end
+        
+        cursor = collection.find(query, projection, batch_size=batch_size, session=_read_session.get()).sort([
+            ("building_id", ASCENDING),
+            ("created_at", DESCENDING),
+            ("_id", DESCENDING)
+        ])
+        try:
+            async for doc in cursor:
+                doc["_id"] = str(doc["_id"])
+                yield doc
+        finally:
+            await cursor.close()
+            
+    async def watch_calculations(self, poll_interval: float = EVENTS_POLL_SECONDS) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        # A change stream where the deployment supports one (replica sets,
+        # Atlas); a standalone server is polled instead
+        collection = self.db[self.collection_name]
+        try:
+            async with collection.watch(CALCULATION_INSERTS_PIPELINE) as stream:
+                yield None
+                async for change in stream:
+                    document = change["fullDocument"]
+                    document["_id"] = str(document["_id"])
+                    yield document
+            return
+        except OperationFailure as e:
+            if e.code != CHANGE_STREAMS_UNSUPPORTED:
+                raise
+        
+        # ObjectIds from different processes are ordered only to the second, so
+        # every poll re-lists a short window of ids and skips those already seen
+        lookback = timedelta(seconds=EVENTS_POLL_LOOKBACK_SECONDS)
+        seen = set()
+        positioned = False
+        while True:
+            floor = ObjectId.from_datetime(datetime.now(timezone.utc) - lookback)
+            ids = [doc["_id"] async for doc in collection.find({"_id": {"$gte": floor}}, {"_id": 1})]
+            new_ids = [document_id for document_id in ids if document_id not in seen]
+            seen = {document_id for document_id in seen if document_id >= floor}
+            seen.update(new_ids)
+            if not positioned:
+                positioned = True
+                yield None
+            elif new_ids:
+                cursor = collection.find({"_id": {"$in": new_ids}}).sort("_id", ASCENDING)
+                async for document in cursor:
+                    document["_id"] = str(document["_id"])
+                    yield document
+            await asyncio.sleep(poll_interval)
+            
+    async def find_by_building_and_period(
         self, 
         building_id: str, 
         period: str
+    ) -> List[Dict[str, Any]]:
+        return await self.find_by_building_and_periods(building_id, [period])
+            
+    @timed_operation
+    async def find_by_building_and_periods(
+        self,
+        building_id: str,
+        periods: List[str]
     ) -> List[Dict[str, Any]]:
         try:
-            collection = self.db[self.collection_name]
-            cursor = collection.find({
-                "building_id": building_id,
-                "periods.period": period
-            }).sort("created_at", DESCENDING)
+            collection = self._read_collection(self.collection_name)
+            cursor = collection.aggregate(period_filter_pipeline(building_id, periods), session=_read_session.get())
             
             results = []
-            for doc in cursor:
+            async for doc in cursor:
                 doc["_id"] = str(doc["_id"])
-                doc["periods"] = [p for p in doc["periods"] if p["period"] == period]
                 results.append(doc)
             return results
         except OperationFailure as e:
             raise
             
-    def get_building_summary(self, building_id: str) -> Optional[Dict[str, Any]]:
+    @timed_operation
+    async def find_building_summaries(
+        self,
+        building_ids: Optional[List[str]] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
         try:
-            collection = self.db[self.collection_name]
-            result = collection.find_one(
+            collection = self._read_collection(self.summaries_collection_name)
+            query = {"building_id": {"$in": building_ids}} if building_ids else {}
+            cursor = collection.find(
+                query, projection={"_id": 0}, session=_read_session.get()
+            ).sort("building_id", ASCENDING).limit(limit)
+            return [doc async for doc in cursor]
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def rebuild_building_summaries(self, batch_size: int = 500) -> int:
+        started_at = datetime.now(timezone.utc)
+        rebuilt = await self._rebuild_summaries(batch_size=batch_size)
+        # Buildings that no longer have calculations were not touched above
+        await self._write_collection(self.summaries_collection_name, BULK_WRITES).delete_many(
+            {"updated_at": {"$lt": started_at}}
+        )
+        return rebuilt
+            
+    async def _rebuild_summaries(self, building_ids: Optional[List[str]] = None, batch_size: int = 500) -> int:
+        # Calculations arrive grouped by building, so only one building's
+        # summary is held in memory at a time. Reads the primary, since a
+        # lagging secondary would drop summaries of its missing buildings.
+        collection = self._write_collection(self.summaries_collection_name, BULK_WRITES)
+        pending: List[ReplaceOne] = []
+        rebuilt = 0
+        current: Optional[Dict[str, Any]] = None
+        
+        async def flush(force: bool = False):
+            nonlocal pending
+            if pending and (force or len(pending) >= batch_size):
+                await collection.bulk_write(pending, ordered=False)
+                pending = []
+        
+        async for calculation in self._stream(self.db[self.collection_name], building_ids):
+            if current is not None and current["building_id"] != calculation["building_id"]:
+                pending.append(ReplaceOne({"building_id": current["building_id"]}, current, upsert=True))
+                rebuilt += 1
+                current = None
+                await flush()
+            current = apply_building_summary_update(current, calculation["_id"], calculation)
+        
+        if current is not None:
+            pending.append(ReplaceOne({"building_id": current["building_id"]}, current, upsert=True))
+            rebuilt += 1
+        await flush(force=True)
+        return rebuilt
+            
+    @timed_operation
+    async def get_portfolio(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        top_n: int = 10,
+        bucket: Optional[str] = None
+    ) -> Dict[str, Any]:
+        try:
+            collection = self._read_collection(self.collection_name)
+            cursor = collection.aggregate(
+                portfolio_pipeline(start=start, end=end, top_n=top_n, bucket=bucket),
+                allowDiskUse=True,
+                session=_read_session.get()
+            )
+            results = await cursor.to_list(length=1)
+            return format_portfolio(results[0])
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def get_collection_version(self) -> Optional[str]:
+        # Latest calculation across all buildings, from the created_at index
+        try:
+            collection = self._read_collection(self.collection_name)
+            latest = await collection.find_one(
+                {},
+                {"_id": 1, "created_at": 1},
+                sort=[("created_at", DESCENDING)],
+                session=_read_session.get()
+            )
+            if latest is None:
+                return None
+            return f"{latest['_id']}:{latest['created_at'].isoformat()}"
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def get_building_version(self, building_id: str) -> Optional[str]:
+        # Covered by the (building_id, created_at, _id) index: no document is
+        # fetched. Not hinted, so a missing or still-building index only makes
+        # the lookup slower instead of failing every conditional read.
+        try:
+            collection = self._read_collection(self.collection_name)
+            latest = await collection.find_one(
+                {"building_id": building_id},
+                {"_id": 1, "created_at": 1},
+                sort=[("created_at", DESCENDING), ("_id", DESCENDING)],
+                session=_read_session.get()
+            )
+            if latest is None:
+                return None
+            return f"{latest['_id']}:{latest['created_at'].isoformat()}"
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def find_calculation_time_bounds(self, building_id: str) -> Optional[Tuple[datetime, datetime]]:
+        try:
+            collection = self._read_collection(self.collection_name)
+            projection = {"_id": 0, "created_at": 1}
+            session = _read_session.get()
+            first = await collection.find_one(
+                {"building_id": building_id}, projection, sort=[("created_at", ASCENDING)], session=session
+            )
+            if first is None:
+                return None
+            last = await collection.find_one(
+                {"building_id": building_id}, projection, sort=[("created_at", DESCENDING)], session=session
+            )
+            return first["created_at"], last["created_at"]
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def get_trend(
+        self,
+        building_id: str,
+        start: datetime,
+        end: datetime,
+        points: int,
+        period: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        try:
+            timeseries = MONGODB_TIMESERIES_ENABLED and period is not None
+            collection = self._read_collection(self.timeseries_collection_name if timeseries else self.collection_name)
+            bucket_ms = trend_bucket_ms(start, end, points)
+            cursor = collection.aggregate(
+                trend_pipeline(building_id, start, end, bucket_ms, period=period, timeseries=timeseries),
+                session=_read_session.get()
+            )
+            return format_trend_points(await cursor.to_list(length=None), start, bucket_ms), bucket_ms
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def get_building_summary(self, building_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            collection = self._read_collection(self.collection_name)
+            result = await collection.find_one(
                 {"building_id": building_id},
-                sort=[("created_at", DESCENDING)]
+                sort=[("created_at", DESCENDING)],
+                session=_read_session.get()
             )
             
             if result:
@@ -176,5 +896,154 @@ class Database:
         except OperationFailure as e:
             raise
 
+            
+    @timed_operation
+    async def create_job(self) -> str:
+        try:
+            result = await self.db[self.jobs_collection_name].insert_one({
+                "status": JOB_RECEIVING,
+                "created_at": datetime.now(timezone.utc),
+            })
+            return str(result.inserted_id)
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def insert_job_chunk(self, chunk: Dict[str, Any]) -> None:
+        try:
+            await self.db[self.job_chunks_collection_name].insert_one(chunk)
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def queue_job(self, job_id: str, fields: Dict[str, Any]) -> None:
+        # Staged chunks become claimable only once the whole upload is stored
+        try:
+            await self.db[self.jobs_collection_name].update_one(
+                {"_id": ObjectId(job_id)},
+                {"$set": {**fields, "status": JOB_QUEUED, "queued_at": datetime.now(timezone.utc)}}
+            )
+            await self.db[self.job_chunks_collection_name].update_many(
+                {"job_id": job_id, "status": CHUNK_STAGED},
+                {"$set": {"status": CHUNK_PENDING}}
+            )
+            await self.finish_job_if_done(job_id)
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def abort_job(self, job_id: str, error: str) -> None:
+        try:
+            await self.db[self.jobs_collection_name].update_one(
+                {"_id": ObjectId(job_id)},
+                {"$set": {"status": JOB_FAILED, "error": error, "completed_at": datetime.now(timezone.utc)}}
+            )
+            await self.db[self.job_chunks_collection_name].delete_many({"job_id": job_id, "status": CHUNK_STAGED})
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def claim_job_chunk(self, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        # Pending chunks first, then running chunks whose owner stopped renewing
+        try:
+            now = datetime.now(timezone.utc)
+            return await self.db[self.job_chunks_collection_name].find_one_and_update(
+                {"$or": [
+                    {"status": CHUNK_PENDING},
+                    {"status": CHUNK_RUNNING, "lease_expires_at": {"$lt": now}},
+                ]},
+                {
+                    "$set": {
+                        "status": CHUNK_RUNNING,
+                        "owner": owner,
+                        "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                    },
+                    "$inc": {"attempts": 1},
+                },
+                sort=[("_id", ASCENDING)],
+                return_document=ReturnDocument.AFTER
+            )
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def complete_job_chunk(self, chunk_id: ObjectId, owner: str, stats: Dict[str, Any]) -> bool:
+        # False when the lease was lost to another worker, which then owns the chunk
+        try:
+            result = await self.db[self.job_chunks_collection_name].update_one(
+                {"_id": chunk_id, "owner": owner, "status": CHUNK_RUNNING},
+                {
+                    "$set": {"status": CHUNK_COMPLETED, "stats": stats, "completed_at": datetime.now(timezone.utc)},
+                    "$unset": {"requests": "", "lease_expires_at": ""},
+                }
+            )
+            return result.modified_count == 1
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def renew_job_chunk(self, chunk_id: ObjectId, owner: str, lease_seconds: float) -> bool:
+        # False when the lease was already lost to another worker
+        try:
+            result = await self.db[self.job_chunks_collection_name].update_one(
+                {"_id": chunk_id, "owner": owner, "status": CHUNK_RUNNING},
+                {"$set": {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)}}
+            )
+            return result.matched_count == 1
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def release_job_chunk(self, chunk_id: ObjectId, owner: str, error: str, failed: bool) -> None:
+        try:
+            await self.db[self.job_chunks_collection_name].update_one(
+                {"_id": chunk_id, "owner": owner, "status": CHUNK_RUNNING},
+                {
+                    "$set": {"status": CHUNK_FAILED if failed else CHUNK_PENDING, "error": error},
+                    "$unset": {"lease_expires_at": ""},
+                }
+            )
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def finish_job_if_done(self, job_id: str) -> None:
+        try:
+            chunks = self.db[self.job_chunks_collection_name]
+            if await chunks.count_documents({"job_id": job_id, "status": {"$in": OPEN_CHUNK_STATES}}, limit=1):
+                return
+            failed = await chunks.count_documents({"job_id": job_id, "status": CHUNK_FAILED}, limit=1)
+            await self.db[self.jobs_collection_name].update_one(
+                {"_id": ObjectId(job_id), "status": JOB_QUEUED},
+                {"$set": {
+                    "status": JOB_FAILED if failed else JOB_COMPLETED,
+                    "completed_at": datetime.now(timezone.utc),
+                }}
+            )
+        except OperationFailure as e:
+            raise
+            
+    @timed_operation
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            job = await self.db[self.jobs_collection_name].find_one({"_id": ObjectId(job_id)})
+            if job is None:
+                return None
+            cursor = self.db[self.job_chunks_collection_name].find(
+                {"job_id": job_id},
+                {"requests": 0}
+            ).sort("index", ASCENDING)
+            return format_job(job, await cursor.to_list(length=None))
+        except OperationFailure as e:
+            raise
+
+
+def create_database(backend: str = STORAGE_BACKEND) -> Storage:
+    if backend == "sqlite":
+        return SQLiteDatabase()
+    if backend == "mongodb":
+        return Database()
+    raise ValueError(f"Invalid STORAGE_BACKEND: {backend}. Must be mongodb or sqlite")
+
 
-db = Database()
+db = create_database()
@@ -0,0 +1,33 @@
+import hashlib
+from typing import Any, Optional
+
+# Appended by CompressionMiddleware so each content-coding keeps a distinct strong ETag
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def make_etag(version: str, *variant: Any) -> str:
+    # version identifies the building's latest calculation; variant is the
+    # endpoint, query and media type, so each representation gets its own tag
+    digest = hashlib.sha256(repr((version,) + variant).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)]
+    return tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison (RFC 9110 13.1.2)
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    expected = _opaque_tag(etag)
+    return any(_opaque_tag(tag) == expected for tag in if_none_match.split(","))
@@ -0,0 +1,158 @@
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Set
+import asyncio
+import os
+from dotenv import load_dotenv
+
+from serialization import calculation_to_json
+from metrics import registry
+
+load_dotenv()
+
+# How often a backend without a push feed (SQLite, standalone MongoDB) looks for new rows
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", 0.5))
+# Standalone MongoDB polling re-reads this window, since ObjectIds from
+# different processes are only ordered to the second
+EVENTS_POLL_LOOKBACK_SECONDS = float(os.getenv("EVENTS_POLL_LOOKBACK_SECONDS", 5))
+# Comment lines keep proxies from closing idle streams and reveal dead clients
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+# Per subscriber; when a client falls behind its oldest events are dropped
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 32))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", 10000))
+EVENTS_MAX_BUILDINGS = 100
+EVENTS_RETRY_SECONDS = 5
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+KEEP_ALIVE = b": keep-alive\n\n"
+SUBSCRIBED = b"retry: 5000\n: subscribed\n\n"
+
+EVENTS_DROPPED = registry.counter(
+    "calculation_events_dropped_total",
+    "Calculation events dropped because a subscriber fell behind"
+)
+
+
+def format_event(document: Dict[str, Any]) -> bytes:
+    # calculation_to_json emits a single line, so it fits one data: field
+    return b"id: %s\nevent: calculation\ndata: %s\n\n" % (
+        str(document["_id"]).encode(), calculation_to_json(document)
+    )
+
+
+class Subscription:
+    def __init__(self, building_ids: Iterable[str], queue_size: int = EVENTS_QUEUE_SIZE):
+        self.building_ids = frozenset(building_ids)
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(queue_size)
+        self.dropped = 0
+
+    def deliver(self, event: bytes):
+        if self.queue.full():
+            # A dashboard only needs the latest summary, so the oldest event goes
+            self.queue.get_nowait()
+            self.dropped += 1
+            if registry.enabled:
+                EVENTS_DROPPED.inc()
+        self.queue.put_nowait(event)
+
+
+class CalculationBroker:
+    # Fans new calculations out to SSE subscribers. One watcher task per
+    # worker reads the storage change feed while anyone is subscribed; each
+    # calculation is encoded once and handed to the subscribers of its
+    # building, so subscribers cost queue slots, not queries.
+    def __init__(
+        self,
+        source: Callable[[], AsyncIterator[Optional[Dict[str, Any]]]],
+        max_subscribers: int = EVENTS_MAX_SUBSCRIBERS,
+        queue_size: int = EVENTS_QUEUE_SIZE,
+        retry_delay: float = EVENTS_RETRY_SECONDS
+    ):
+        self.source = source
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.retry_delay = retry_delay
+        self.subscriber_count = 0
+        self.watchers_started = 0
+        self.last_error: Optional[str] = None
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._watcher: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+
+    def full(self) -> bool:
+        return self.subscriber_count >= self.max_subscribers
+
+    def subscribe(self, building_ids: Iterable[str]) -> Subscription:
+        subscription = Subscription(building_ids, self.queue_size)
+        for building_id in subscription.building_ids:
+            self._subscribers.setdefault(building_id, set()).add(subscription)
+        self.subscriber_count += 1
+        if self._watcher is None or self._watcher.done():
+            self._ready = asyncio.Event()
+            self._watcher = asyncio.create_task(self._watch())
+            self.watchers_started += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for building_id in subscription.building_ids:
+            subscribers = self._subscribers.get(building_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[building_id]
+        self.subscriber_count -= 1
+        if self.subscriber_count == 0:
+            self.close()
+
+    def close(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+
+    async def wait_ready(self):
+        await self._ready.wait()
+
+    def publish(self, document: Dict[str, Any]):
+        subscribers = self._subscribers.get(document["building_id"])
+        if not subscribers:
+            return
+        event = format_event(document)
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    async def _watch(self):
+        ready = self._ready
+        while True:
+            feed = self.source()
+            try:
+                async for document in feed:
+                    # The feed yields None once it is positioned; anything
+                    # committed after that point will be delivered
+                    if document is None:
+                        ready.set()
+                    else:
+                        self.publish(document)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+            finally:
+                await feed.aclose()
+            await asyncio.sleep(self.retry_delay)
+
+    async def stream(self, building_ids: Iterable[str], heartbeat: float = EVENTS_HEARTBEAT_SECONDS) -> AsyncIterator[bytes]:
+        # Subscribes on first iteration, so a response that never starts
+        # streaming leaves no subscription behind
+        subscription = self.subscribe(building_ids)
+        try:
+            while not self._ready.is_set():
+                try:
+                    await asyncio.wait_for(self._ready.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield KEEP_ALIVE
+            yield SUBSCRIBED
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield KEEP_ALIVE
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,105 @@
+from typing import AsyncIterable, AsyncIterator, Dict, Any, List
+from datetime import datetime
+from bson import ObjectId
+import csv
+import io
+import json
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Rows are buffered and flushed in chunks so each yield carries a reasonable
+# amount of data without holding more than one chunk in memory.
+EXPORT_CHUNK_ROWS = 500
+
+CSV_COLUMNS = [
+    "calculation_id",
+    "building_id",
+    "measure_name",
+    "calculation_timestamp",
+    "created_at",
+    "period",
+    "time_range",
+    "days",
+    "current_electric_kwh",
+    "current_gas_therms",
+    "baseline_electric_kwh",
+    "baseline_gas_therms",
+    "electric_savings_kwh",
+    "gas_savings_therms",
+    "electric_cost_savings",
+    "gas_cost_savings",
+    "total_cost_savings",
+    "electric_efficiency_improvement_percent",
+    "gas_efficiency_improvement_percent",
+    "overall_efficiency_improvement_percent",
+    "performance_grade",
+]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _isoformat(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def calculation_to_csv_rows(doc: Dict[str, Any]) -> List[List[Any]]:
+    header = [
+        str(doc["_id"]),
+        doc.get("building_id"),
+        doc.get("measure_name"),
+        _isoformat(doc.get("calculation_timestamp")),
+        _isoformat(doc.get("created_at")),
+    ]
+    return [
+        header + [
+            period.get("period"),
+            period.get("time_range"),
+            ", ".join(period.get("days", [])),
+        ] + [period.get(column) for column in CSV_COLUMNS[8:]]
+        for period in doc.get("periods", [])
+    ]
+
+
+async def stream_ndjson(documents: AsyncIterable[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    buffer: List[str] = []
+    async for doc in documents:
+        buffer.append(json.dumps(doc, default=_json_default, separators=(",", ":")))
+        if len(buffer) >= EXPORT_CHUNK_ROWS:
+            yield ("\n".join(buffer) + "\n").encode()
+            buffer = []
+    if buffer:
+        yield ("\n".join(buffer) + "\n").encode()
+
+
+async def stream_csv(documents: AsyncIterable[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_COLUMNS)
+    rows = 0
+    async for doc in documents:
+        for row in calculation_to_csv_rows(doc):
+            writer.writerow(row)
+            rows += 1
+        if rows >= EXPORT_CHUNK_ROWS:
+            yield output.getvalue().encode()
+            output.seek(0)
+            output.truncate(0)
+            rows = 0
+    remaining = output.getvalue()
+    if remaining:
+        yield remaining.encode()
+
+
+def stream_export(documents: AsyncIterable[Dict[str, Any]], export_format: str) -> AsyncIterator[bytes]:
+    if export_format == "csv":
+        return stream_csv(documents)
+    return stream_ndjson(documents)
@@ -0,0 +1,32 @@
+import hashlib
+from typing import Optional
+
+from pydantic_core import to_json
+
+from models import CalculationRequest
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Bump when the formulas change so new requests are not answered with
+# documents computed by the old ones
+CALCULATION_HASH_VERSION = 1
+
+
+def canonical_request(request: CalculationRequest) -> bytes:
+    # Validated models serialize with coerced types (1 -> 1.0) and fixed field
+    # order, so equal requests produce equal bytes whatever the client sent.
+    return to_json({"v": CALCULATION_HASH_VERSION, "request": request.model_dump(mode="json")})
+
+
+def calculation_request_hash(request: CalculationRequest) -> str:
+    return hashlib.sha256(canonical_request(request)).hexdigest()
+
+
+def validate_idempotency_key(key: Optional[str]) -> Optional[str]:
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise ValueError(f"{IDEMPOTENCY_HEADER} must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+    return key
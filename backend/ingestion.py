@@ -0,0 +1,97 @@
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+import json
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from models import CalculationRequest
+from calculations import process_efficiency_calculation_batch
+from metrics import record_calculations
+
+INGEST_CHUNK_SIZE = 1000
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'body'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+    # Yields (record, error) per non-empty line without buffering the body
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+def _parse_line(line: bytes) -> Tuple[Any, Optional[str]]:
+    try:
+        return json.loads(line), None
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+
+
+async def iter_json_array(body: bytes) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+    try:
+        records = json.loads(body)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+    if not isinstance(records, list):
+        raise ValueError("Request body must be a JSON array of calculation requests")
+    for record in records:
+        yield record, None
+
+
+class BulkIngestion:
+    def __init__(self, database, chunk_size: int = INGEST_CHUNK_SIZE):
+        self.database = database
+        self.chunk_size = chunk_size
+        self.results: List[Dict[str, Any]] = []
+        self.building_ids = set()
+        self._pending: List[Tuple[int, Dict[str, Any]]] = []
+
+    @property
+    def inserted(self) -> int:
+        return sum(1 for result in self.results if result["status"] == "inserted")
+
+    async def run(self, records: AsyncIterable[Tuple[Any, Optional[str]]]) -> List[Dict[str, Any]]:
+        index = 0
+        async for record, error in records:
+            if error is None:
+                try:
+                    request = CalculationRequest.model_validate(record)
+                    self._pending.append((index, request.model_dump()))
+                except ValidationError as e:
+                    error = format_validation_error(e)
+            if error is not None:
+                self.results.append({"index": index, "status": "error", "error": error})
+            if len(self._pending) >= self.chunk_size:
+                await self._flush()
+            index += 1
+        await self._flush()
+        self.results.sort(key=lambda result: result["index"])
+        return self.results
+
+    async def _flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        indexes = [index for index, _ in pending]
+        calculations = await run_in_threadpool(
+            process_efficiency_calculation_batch,
+            [request_data for _, request_data in pending]
+        )
+        record_calculations("ingest", len(calculations), sum(len(c["periods"]) for c in calculations))
+        outcomes = await self.database.insert_calculations_unordered(calculations)
+        for index, calculation, (inserted_id, error) in zip(indexes, calculations, outcomes):
+            if error is None:
+                self.building_ids.add(calculation["building_id"])
+                self.results.append({"index": index, "status": "inserted", "id": inserted_id})
+            else:
+                self.results.append({"index": index, "status": "error", "error": error})
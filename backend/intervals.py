@@ -0,0 +1,346 @@
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+import re
+import numpy as np
+from pydantic_core import from_json
+from starlette.concurrency import run_in_threadpool
+
+from models import VALID_PERIODS
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DEFAULT_TIME_RANGE = "08:00-18:00"
+DEFAULT_BUSINESS_DAYS = DAY_NAMES[:5]
+MINUTES_PER_DAY = 24 * 60
+
+SERIES = ["baseline", "current"]
+INTERVAL_COLUMNS = ["timestamp", "electric_kwh", "gas_therms", "series"]
+INTERVAL_CHUNK_ROWS = 100000
+MAX_ROW_ERRORS = 100
+# A Z or +hh:mm/-hh:mm after the time part; numpy would silently shift such
+# timestamps to UTC, which moves readings into the wrong period
+UTC_OFFSET = re.compile(r"[Tt ]\S*(?:[Zz]|[+-]\d)")
+
+BUSINESS_HOURS = VALID_PERIODS.index("business_hours")
+AFTER_HOURS = VALID_PERIODS.index("after_hours")
+WEEKEND = VALID_PERIODS.index("weekend")
+
+
+def parse_clock(value: str) -> int:
+    hours, separator, minutes = value.strip().partition(":")
+    if not separator or not hours.isdigit() or not minutes.isdigit():
+        raise ValueError(f"Invalid time: {value}. Expected HH:MM")
+    total = int(hours) * 60 + int(minutes)
+    if not 0 <= total <= MINUTES_PER_DAY or not 0 <= int(minutes) < 60:
+        raise ValueError(f"Invalid time: {value}")
+    return total
+
+
+def parse_time_range(time_range: str) -> Tuple[int, int]:
+    start, separator, end = time_range.partition("-")
+    if not separator:
+        raise ValueError(f"Invalid time_range: {time_range}. Expected HH:MM-HH:MM")
+    start_minute, end_minute = parse_clock(start), parse_clock(end)
+    if start_minute == end_minute:
+        raise ValueError(f"Invalid time_range: {time_range}. Start and end must differ")
+    return start_minute, end_minute
+
+
+def format_clock(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def period_lookup(time_range: str = DEFAULT_TIME_RANGE, days: List[str] = DEFAULT_BUSINESS_DAYS) -> np.ndarray:
+    # Period code for every minute of the week, Monday 00:00 first. A range
+    # that ends before it starts (e.g. 22:00-06:00) wraps past midnight.
+    start, end = parse_time_range(time_range)
+    minutes = np.arange(MINUTES_PER_DAY)
+    in_range = (minutes >= start) & (minutes < end) if start < end else (minutes >= start) | (minutes < end)
+    business_day = np.where(in_range, BUSINESS_HOURS, AFTER_HOURS).astype(np.int8)
+    return np.concatenate([
+        business_day if day in days else np.full(MINUTES_PER_DAY, WEEKEND, dtype=np.int8)
+        for day in DAY_NAMES
+    ])
+
+
+def schedule_periods(time_range: str = DEFAULT_TIME_RANGE, days: List[str] = DEFAULT_BUSINESS_DAYS) -> Dict[str, Dict[str, Any]]:
+    # time_range/days of each PeriodInput built from the schedule
+    start, end = parse_time_range(time_range)
+    other_days = [day for day in DAY_NAMES if day not in days]
+    return {
+        "business_hours": {"time_range": time_range, "days": list(days)},
+        "after_hours": {"time_range": f"{format_clock(end)}-{format_clock(start)}", "days": list(days)},
+        "weekend": {"time_range": "00:00-24:00", "days": other_days},
+    }
+
+
+def time_of_week(timestamps: np.ndarray) -> np.ndarray:
+    # Minutes since Monday 00:00; 1970-01-01 was a Thursday
+    minutes = timestamps.astype("datetime64[m]").astype(np.int64)
+    return (minutes + 3 * MINUTES_PER_DAY) % (7 * MINUTES_PER_DAY)
+
+
+class IntervalAggregator:
+    def __init__(self, time_range: str = DEFAULT_TIME_RANGE, days: List[str] = DEFAULT_BUSINESS_DAYS):
+        self.time_range = time_range
+        self.days = list(days)
+        self.lookup = period_lookup(time_range, days)
+        # [series, period] totals
+        self.electric = np.zeros((len(SERIES), len(VALID_PERIODS)))
+        self.gas = np.zeros((len(SERIES), len(VALID_PERIODS)))
+        self.readings = np.zeros((len(SERIES), len(VALID_PERIODS)), dtype=np.int64)
+        self.start: Optional[np.datetime64] = None
+        self.end: Optional[np.datetime64] = None
+        self.skipped = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def add(self, timestamps: np.ndarray, electric: np.ndarray, gas: np.ndarray, series: np.ndarray):
+        if not len(timestamps):
+            return
+        cells = series.astype(np.intp) * len(VALID_PERIODS) + self.lookup[time_of_week(timestamps)]
+        size = len(SERIES) * len(VALID_PERIODS)
+        shape = self.electric.shape
+        self.electric += np.bincount(cells, weights=electric, minlength=size).reshape(shape)
+        self.gas += np.bincount(cells, weights=gas, minlength=size).reshape(shape)
+        self.readings += np.bincount(cells, minlength=size).reshape(shape)
+        first, last = timestamps.min(), timestamps.max()
+        self.start = first if self.start is None else min(self.start, first)
+        self.end = last if self.end is None else max(self.end, last)
+
+    def add_errors(self, errors: List[Dict[str, Any]]):
+        self.skipped += len(errors)
+        self.errors.extend(errors[:MAX_ROW_ERRORS - len(self.errors)])
+
+    @property
+    def rows(self) -> int:
+        return int(self.readings.sum())
+
+    def period_inputs(self, electric_rate: float, gas_rate: float) -> Tuple[List[Dict[str, Any]], List[str]]:
+        # PeriodInput fields need every total above zero; other periods are reported as incomplete
+        schedule = schedule_periods(self.time_range, self.days)
+        baseline, current = SERIES.index("baseline"), SERIES.index("current")
+        periods, incomplete = [], []
+        for code, period in enumerate(VALID_PERIODS):
+            totals = {
+                "current_electric_kwh": round(float(self.electric[current, code]), 4),
+                "current_gas_therms": round(float(self.gas[current, code]), 4),
+                "baseline_electric_kwh": round(float(self.electric[baseline, code]), 4),
+                "baseline_gas_therms": round(float(self.gas[baseline, code]), 4),
+            }
+            if not schedule[period]["days"] or min(totals.values()) <= 0:
+                incomplete.append(period)
+                continue
+            periods.append({
+                "period": period,
+                **schedule[period],
+                **totals,
+                "electric_rate": electric_rate,
+                "gas_rate": gas_rate,
+            })
+        return periods, incomplete
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "skipped_rows": self.skipped,
+            "errors": self.errors,
+            "start": self.start.astype("datetime64[s]").item() if self.start is not None else None,
+            "end": self.end.astype("datetime64[s]").item() if self.end is not None else None,
+            "readings": {
+                series: dict(zip(VALID_PERIODS, self.readings[index].tolist()))
+                for index, series in enumerate(SERIES)
+            },
+        }
+
+
+def _check_arrays(timestamps: np.ndarray, electric: np.ndarray, gas: np.ndarray):
+    if np.isnat(timestamps).any():
+        raise ValueError("timestamp is required")
+    if not (np.isfinite(electric).all() and np.isfinite(gas).all()):
+        raise ValueError("readings must be finite numbers")
+
+
+def _check_local_times(values: List[Any]):
+    if UTC_OFFSET.search("\n".join(map(str, values))):
+        raise ValueError("timestamp must be building-local time without a UTC offset")
+
+
+def _series_codes(values: List[str]) -> np.ndarray:
+    labels = np.array(values)
+    codes = np.where(labels == "baseline", 0, 1)
+    if not np.isin(labels, SERIES).all():
+        raise ValueError("series must be baseline or current")
+    return codes
+
+
+def parse_row(values: Dict[str, Any]) -> Tuple[np.datetime64, float, float, int]:
+    if not values.get("timestamp"):
+        raise ValueError("timestamp is required")
+    text = str(values["timestamp"]).strip()
+    _check_local_times([text])
+    timestamp = np.datetime64(text, "m")
+    electric = float(values.get("electric_kwh") or 0)
+    gas = float(values.get("gas_therms") or 0)
+    series = str(values.get("series") or "current").strip()
+    if series not in SERIES:
+        raise ValueError(f"series must be baseline or current, got {series!r}")
+    _check_arrays(np.array([timestamp]), np.array([electric]), np.array([gas]))
+    return timestamp, electric, gas, SERIES.index(series)
+
+
+def _rows_to_arrays(
+    rows: List[Tuple[int, Any]]
+) -> Tuple[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray], List[Dict[str, Any]]]:
+    # Slow path, one row at a time, used only for chunks the vectorized parse
+    # rejects. Each row is (line number, field dict or error message).
+    parsed, errors = [], []
+    for line, values in rows:
+        try:
+            if isinstance(values, str):
+                raise ValueError(values)
+            parsed.append(parse_row(values))
+        except (ValueError, TypeError) as e:
+            errors.append({"line": line, "error": str(e) or type(e).__name__})
+    if not parsed:
+        return _empty_arrays(), errors
+    timestamps, electric, gas, series = zip(*parsed)
+    return (
+        np.array(timestamps, dtype="datetime64[m]"),
+        np.array(electric, dtype=np.float64),
+        np.array(gas, dtype=np.float64),
+        np.array(series, dtype=np.int8),
+    ), errors
+
+
+def _empty_arrays():
+    return (
+        np.array([], dtype="datetime64[m]"),
+        np.array([], dtype=np.float64),
+        np.array([], dtype=np.float64),
+        np.array([], dtype=np.int8),
+    )
+
+
+def parse_csv_chunk(lines: List[str], header: List[str], line_numbers: List[int]):
+    # All fields are split in one pass and each column is a strided slice,
+    # so numpy parses whole columns at once. Any irregular row sends the
+    # chunk to the per-row path.
+    columns = {name: index for index, name in enumerate(header)}
+    width = len(header)
+    fields = ",".join(lines).split(",")
+    try:
+        if len(fields) != width * len(lines):
+            raise ValueError("ragged rows")
+        _check_local_times(fields[columns["timestamp"]::width])
+        timestamps = np.array(fields[columns["timestamp"]::width], dtype="datetime64[m]")
+        electric = (
+            np.array(fields[columns["electric_kwh"]::width], dtype=np.float64)
+            if "electric_kwh" in columns else np.zeros(len(lines))
+        )
+        gas = (
+            np.array(fields[columns["gas_therms"]::width], dtype=np.float64)
+            if "gas_therms" in columns else np.zeros(len(lines))
+        )
+        series = (
+            _series_codes(fields[columns["series"]::width])
+            if "series" in columns else np.ones(len(lines), dtype=np.int8)
+        )
+        _check_arrays(timestamps, electric, gas)
+        return (timestamps, electric, gas, series), []
+    except ValueError:
+        rows = []
+        for line_number, line in zip(line_numbers, lines):
+            values = line.split(",")
+            if len(values) != width:
+                rows.append((line_number, f"Expected {width} fields, got {len(values)}"))
+                continue
+            rows.append((line_number, dict(zip(header, values))))
+        return _rows_to_arrays(rows)
+
+
+def parse_ndjson_chunk(lines: List[bytes], line_numbers: List[int]):
+    try:
+        records = from_json(b"[" + b",".join(lines) + b"]")
+        _check_local_times([record["timestamp"] for record in records])
+        timestamps = np.array([record["timestamp"] for record in records], dtype="datetime64[m]")
+        electric = np.array([record.get("electric_kwh") or 0 for record in records], dtype=np.float64)
+        gas = np.array([record.get("gas_therms") or 0 for record in records], dtype=np.float64)
+        series = _series_codes([record.get("series") or "current" for record in records])
+        _check_arrays(timestamps, electric, gas)
+        return (timestamps, electric, gas, series), []
+    except (ValueError, KeyError, TypeError, AttributeError):
+        rows = []
+        for line_number, line in zip(line_numbers, lines):
+            try:
+                record = from_json(line)
+            except ValueError as e:
+                rows.append((line_number, f"Invalid JSON: {e}"))
+                continue
+            rows.append((line_number, record if isinstance(record, dict) else "Each line must be a JSON object"))
+        return _rows_to_arrays(rows)
+
+
+async def iter_lines(chunks: AsyncIterable[bytes], chunk_rows: int) -> AsyncIterator[Tuple[List[int], List[bytes]]]:
+    # Yields up to chunk_rows non-empty lines with their 1-based line numbers.
+    # Whole network chunks are split at once; the per-line filter only runs
+    # when a chunk has blank lines or CRLF endings.
+    buffer = b""
+    numbers: List[int] = []
+    pending: List[bytes] = []
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        first = line_number + 1
+        line_number += len(lines)
+        if b"\r" in chunk:
+            lines = [line.rstrip(b"\r") for line in lines]
+        if all(lines):
+            numbers.extend(range(first, line_number + 1))
+            pending.extend(lines)
+        else:
+            kept = [(number, line) for number, line in enumerate(lines, first) if line.strip()]
+            numbers.extend(number for number, _ in kept)
+            pending.extend(line for _, line in kept)
+        while len(pending) >= chunk_rows:
+            yield numbers[:chunk_rows], pending[:chunk_rows]
+            numbers, pending = numbers[chunk_rows:], pending[chunk_rows:]
+    buffer = buffer.rstrip(b"\r")
+    if buffer.strip():
+        numbers.append(line_number + 1)
+        pending.append(buffer)
+    if pending:
+        yield numbers, pending
+
+
+async def aggregate_csv(
+    chunks: AsyncIterable[bytes],
+    aggregator: IntervalAggregator,
+    chunk_rows: int = INTERVAL_CHUNK_ROWS
+) -> IntervalAggregator:
+    header: Optional[List[str]] = None
+    async for line_numbers, lines in iter_lines(chunks, chunk_rows):
+        text_lines = b"\n".join(lines).decode("utf-8").split("\n")
+        if header is None:
+            header = [name.strip().lower() for name in text_lines[0].split(",")]
+            if "timestamp" not in header:
+                raise ValueError("CSV header must include a timestamp column")
+            text_lines, line_numbers = text_lines[1:], line_numbers[1:]
+            if not text_lines:
+                continue
+        arrays, errors = await run_in_threadpool(parse_csv_chunk, text_lines, header, line_numbers)
+        aggregator.add(*arrays)
+        aggregator.add_errors(errors)
+    if header is None:
+        raise ValueError("CSV body is empty")
+    return aggregator
+
+
+async def aggregate_ndjson(
+    chunks: AsyncIterable[bytes],
+    aggregator: IntervalAggregator,
+    chunk_rows: int = INTERVAL_CHUNK_ROWS
+) -> IntervalAggregator:
+    async for line_numbers, lines in iter_lines(chunks, chunk_rows):
+        arrays, errors = await run_in_threadpool(parse_ndjson_chunk, lines, line_numbers)
+        aggregator.add(*arrays)
+        aggregator.add_errors(errors)
+    return aggregator
@@ -0,0 +1,338 @@
+from typing import Any, AsyncIterable, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import multiprocessing
+import os
+import socket
+import uuid
+from dotenv import load_dotenv
+from pydantic import ValidationError
+
+from models import CalculationRequest
+from calculations import process_efficiency_calculation_batch
+from ingestion import format_validation_error
+
+load_dotenv()
+
+JOB_RUNNER_ENABLED = os.getenv("JOB_RUNNER_ENABLED", "true").lower() == "true"
+# Per runner, and every API worker runs one; serve.py splits the CPUs across workers
+JOB_PROCESSES = int(os.getenv("JOB_PROCESSES", 1))
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", 2000))
+# A chunk whose worker died is picked up again once its lease runs out;
+# a live worker renews it every third of this while the chunk runs
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 120))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 2))
+JOB_MAX_ERRORS = 100
+
+# Chunks are staged while the upload is still arriving, so a half-received
+# job never starts running
+CHUNK_STAGED = "staged"
+CHUNK_PENDING = "pending"
+CHUNK_RUNNING = "running"
+CHUNK_COMPLETED = "completed"
+CHUNK_FAILED = "failed"
+OPEN_CHUNK_STATES = [CHUNK_STAGED, CHUNK_PENDING, CHUNK_RUNNING]
+
+JOB_RECEIVING = "receiving"
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Holds references to aborts started by cancelled submissions until they finish
+_background_aborts: set = set()
+
+
+def compute_chunk(requests_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Runs in a pool process; arguments and results cross as pickles
+    return process_efficiency_calculation_batch(requests_data)
+
+
+def chunk_stats(
+    results: List[Dict[str, Any]],
+    write_results: List[Tuple[Optional[str], Optional[str]]]
+) -> Dict[str, Any]:
+    # A duplicate (job_id, job_index) means an earlier attempt of this chunk
+    # already stored the calculation, so it counts as inserted
+    inserted = [
+        result for result, (inserted_id, error) in zip(results, write_results)
+        if inserted_id is not None or "E11000" in (error or "")
+    ]
+    grades: Dict[str, int] = {}
+    for result in inserted:
+        grade = result["summary"]["overall_performance_grade"]
+        grades[grade] = grades.get(grade, 0) + 1
+    return {
+        "calculations": len(results),
+        "inserted": len(inserted),
+        "failed": len(results) - len(inserted),
+        "total_cost_savings": round(sum(result["summary"]["total_cost_savings"] for result in inserted), 2),
+        "grades": grades,
+    }
+
+
+def format_job(job: Dict[str, Any], chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    counts = {state: 0 for state in [CHUNK_STAGED, CHUNK_PENDING, CHUNK_RUNNING, CHUNK_COMPLETED, CHUNK_FAILED]}
+    processed = inserted = failed = 0
+    total_cost_savings = 0.0
+    grades: Dict[str, int] = {}
+    chunk_errors = []
+    for chunk in chunks:
+        counts[chunk["status"]] += 1
+        stats = chunk.get("stats")
+        if stats:
+            processed += stats["calculations"]
+            inserted += stats["inserted"]
+            failed += stats["failed"]
+            total_cost_savings += stats["total_cost_savings"]
+            for grade, count in stats["grades"].items():
+                grades[grade] = grades.get(grade, 0) + count
+        if chunk["status"] == CHUNK_FAILED:
+            failed += chunk["size"]
+            chunk_errors.append({"chunk": chunk["index"], "error": chunk.get("error") or "Unknown error"})
+
+    status = job["status"]
+    if status == JOB_QUEUED and (counts[CHUNK_RUNNING] or counts[CHUNK_COMPLETED] or counts[CHUNK_FAILED]):
+        status = JOB_RUNNING
+    total = job.get("total_calculations", 0)
+    return {
+        "job_id": str(job["_id"]),
+        "status": status,
+        "created_at": job["created_at"],
+        "completed_at": job.get("completed_at"),
+        "total_calculations": total,
+        "processed_calculations": processed,
+        "progress_percent": round(processed / total * 100, 2) if total else (100.0 if status == JOB_COMPLETED else 0.0),
+        "invalid_count": job.get("invalid_count", 0),
+        "errors": job.get("errors", []),
+        "chunks": {
+            "total": len(chunks),
+            "pending": counts[CHUNK_STAGED] + counts[CHUNK_PENDING],
+            "running": counts[CHUNK_RUNNING],
+            "completed": counts[CHUNK_COMPLETED],
+            "failed": counts[CHUNK_FAILED],
+        },
+        "chunk_errors": chunk_errors,
+        "result": {
+            "inserted_count": inserted,
+            "failed_count": failed,
+            "total_cost_savings": round(total_cost_savings, 2),
+            "grade_distribution": dict(sorted(grades.items())),
+        },
+        "error": job.get("error"),
+    }
+
+
+class JobSubmission:
+    # Validates records as they stream in and stages them as chunks, so the
+    # upload is never held in memory as a whole
+    def __init__(self, database, chunk_size: int = JOB_CHUNK_SIZE):
+        self.database = database
+        self.chunk_size = chunk_size
+        self.job_id: Optional[str] = None
+        self.total = 0
+        self.invalid_count = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.chunk_count = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._staged = 0
+
+    async def run(self, records: AsyncIterable[Tuple[Any, Optional[str]]]) -> str:
+        self.job_id = await self.database.create_job()
+        try:
+            index = 0
+            async for record, error in records:
+                if error is None:
+                    try:
+                        request = CalculationRequest.model_validate(record)
+                        self._pending.append(request.model_dump())
+                    except ValidationError as e:
+                        error = format_validation_error(e)
+                if error is not None:
+                    self.invalid_count += 1
+                    if len(self.errors) < JOB_MAX_ERRORS:
+                        self.errors.append({"index": index, "error": error})
+                if len(self._pending) >= self.chunk_size:
+                    await self._flush()
+                index += 1
+            await self._flush()
+            self.total = index - self.invalid_count
+        except asyncio.CancelledError:
+            # The upload was cancelled; abort in the background rather than
+            # awaiting while the cancellation unwinds
+            abort = asyncio.create_task(self.database.abort_job(self.job_id, "Upload cancelled"))
+            _background_aborts.add(abort)
+            abort.add_done_callback(_background_aborts.discard)
+            raise
+        except Exception as e:
+            await self.database.abort_job(self.job_id, str(e) or type(e).__name__)
+            raise
+        await self.database.queue_job(self.job_id, {
+            "total_calculations": self.total,
+            "invalid_count": self.invalid_count,
+            "errors": self.errors,
+            "chunk_count": self.chunk_count,
+        })
+        return self.job_id
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        await self.database.insert_job_chunk({
+            "job_id": self.job_id,
+            "index": self.chunk_count,
+            # job_index of the chunk's first calculation: valid records are numbered 0..total-1
+            "first_index": self._staged,
+            "size": len(self._pending),
+            "requests": self._pending,
+            "status": CHUNK_STAGED,
+            "attempts": 0,
+        })
+        self.chunk_count += 1
+        self._staged += len(self._pending)
+        self._pending = []
+
+
+class JobRunner:
+    # One per API worker. Claims chunks from any job, computes them in a
+    # process pool and writes the calculations back. All progress lives in
+    # MongoDB, so a crashed worker only loses its leases.
+    def __init__(
+        self,
+        database,
+        processes: int = JOB_PROCESSES,
+        compute: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]] = compute_chunk,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        poll_seconds: float = JOB_POLL_SECONDS,
+        on_inserted: Optional[Callable[[set], Any]] = None
+    ):
+        self.database = database
+        self.processes = processes
+        self.compute = compute
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.on_inserted = on_inserted
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._wake = asyncio.Event()
+
+    def notify(self):
+        self._wake.set()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and driver threads is unsafe
+            self._pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _reset_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def close(self):
+        self._reset_pool()
+
+    async def _idle(self):
+        try:
+            await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        if self.database.state != "ready":
+            return None
+        try:
+            return await self.database.claim_job_chunk(self.owner, self.lease_seconds)
+        except Exception:
+            return None
+
+    async def run(self):
+        slots = asyncio.Semaphore(self.processes)
+        tasks = set()
+        try:
+            while True:
+                await slots.acquire()
+                chunk = await self._claim()
+                if chunk is None:
+                    slots.release()
+                    await self._idle()
+                    continue
+                task = asyncio.create_task(self.run_chunk(chunk))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: slots.release())
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run_until_idle(self):
+        # Drains every claimable chunk, then returns; used by manage.py and tests
+        while True:
+            chunks = []
+            for _ in range(self.processes):
+                chunk = await self._claim()
+                if chunk is None:
+                    break
+                chunks.append(chunk)
+            if not chunks:
+                return
+            await asyncio.gather(*[self.run_chunk(chunk) for chunk in chunks])
+
+    async def run_chunk(self, chunk: Dict[str, Any]):
+        if chunk["attempts"] > self.max_attempts:
+            await self._release(chunk, f"Gave up after {self.max_attempts} attempts", failed=True)
+            return
+        heartbeat = asyncio.create_task(self._renew(chunk))
+        try:
+            await self._run_claimed_chunk(chunk)
+        finally:
+            heartbeat.cancel()
+
+    async def _renew(self, chunk: Dict[str, Any]):
+        # Keeps the lease while the chunk computes and writes, so only the
+        # chunks of a dead worker expire and get claimed again
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                if not await self.database.renew_job_chunk(chunk["_id"], self.owner, self.lease_seconds):
+                    return
+            except Exception:
+                pass  # the lease has time left for the next beat
+
+    async def _run_claimed_chunk(self, chunk: Dict[str, Any]):
+        job_id = chunk["job_id"]
+        try:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(self._get_pool(), self.compute, chunk["requests"])
+            for offset, result in enumerate(results):
+                result["job_id"] = job_id
+                result["job_index"] = chunk["first_index"] + offset
+            write_results = await self.database.insert_calculations_unordered(results)
+            stats = chunk_stats(results, write_results)
+            if await self.database.complete_job_chunk(chunk["_id"], self.owner, stats) and self.on_inserted:
+                self.on_inserted({result["building_id"] for result in results})
+        except BrokenProcessPool:
+            # A pool process died (OOM kill, segfault); start a fresh pool for the retry
+            self._reset_pool()
+            await self._release(chunk, "Worker process died", failed=chunk["attempts"] >= self.max_attempts)
+            return
+        except Exception as e:
+            await self._release(chunk, str(e), failed=chunk["attempts"] >= self.max_attempts)
+            return
+        await self._finish(job_id)
+
+    async def _release(self, chunk: Dict[str, Any], error: str, failed: bool):
+        try:
+            await self.database.release_job_chunk(chunk["_id"], self.owner, error, failed)
+            await self._finish(chunk["job_id"])
+        except Exception:
+            pass  # the lease expires and another claim retries the chunk
+
+    async def _finish(self, job_id: str):
+        await self.database.finish_job_if_done(job_id)
@@ -1,28 +1,128 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
-from typing import List
-from datetime import datetime
+from typing import Hashable, List, Optional, Literal
+from datetime import datetime, timedelta
+import asyncio
 import os
 from dotenv import load_dotenv
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
 
-from models import CalculationRequest, CalculationResponse, ErrorResponse
-from calculations import process_efficiency_calculation
+from models import (
+    CalculationRequest,
+    CalculationResponse,
+    BatchCalculationRequest,
+    BatchCalculationResponse,
+    BatchCalculationResult,
+    BuildingSummaryResponse,
+    IngestionResponse,
+    PortfolioResponse,
+    PeriodMetricsPoint,
+    TrendResponse,
+    ScenarioRequest,
+    ScenarioResponse,
+    JobResponse,
+    IntervalIngestionResponse,
+    ErrorResponse,
+    VALID_PERIODS
+)
+from calculations import process_calculation_request, process_efficiency_calculation_batch
 from database import db
+from pagination import parse_fields, DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+from export import stream_export, EXPORT_FORMATS
+from cache import response_cache, CachedResponse
+from serialization import (
+    calculation_to_json, calculations_to_json, documents_to_json,
+    encode_calculations, encode_documents, negotiate_media_type, JSON_MEDIA_TYPE
+)
+from compression import CompressionMiddleware
+from admission import AdmissionMiddleware
+from etags import make_etag, etag_matches
+from ingestion import BulkIngestion, iter_ndjson, iter_json_array
+from intervals import IntervalAggregator, aggregate_csv, aggregate_ndjson, DAY_NAMES, DEFAULT_TIME_RANGE, DEFAULT_BUSINESS_DAYS
+from jobs import JobRunner, JobSubmission, JOB_RUNNER_ENABLED
+from scenarios import SCENARIO_PROJECTION, ScenarioPricer, scenario_hash, price_scenarios, stream_scenario_rows
+from trend import DEFAULT_TREND_POINTS, MAX_TREND_POINTS, to_utc_naive
+from timeseries import DEFAULT_POINT_LIMIT, MAX_POINT_LIMIT
+from idempotency import IDEMPOTENCY_HEADER, calculation_request_hash, validate_idempotency_key
+from metrics import registry, MetricsMiddleware, time_stage, observe_request_stage, record_calculations
+from events import CalculationBroker, EVENT_STREAM_MEDIA_TYPE, EVENTS_MAX_BUILDINGS
 
 load_dotenv()
 
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
+READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", 2))
+# Cache tags are building ids otherwise; a tuple can never equal one
+SCENARIOS_CACHE_TAG = ("scenarios",)
+
+
+def invalidate_buildings(building_ids):
+    for building_id in building_ids:
+        response_cache.invalidate_tag(building_id)
+
+
+job_runner = JobRunner(db, on_inserted=invalidate_buildings)
+# One change-feed watcher per worker serves every event-stream subscriber
+calculation_events = CalculationBroker(lambda: db.watch_calculations())
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    db.connect()
+    # Serve immediately; connecting and index builds continue in the background
+    db.open()
+    background = [asyncio.create_task(db.warm_up())]
+    if JOB_RUNNER_ENABLED:
+        background.append(asyncio.create_task(job_runner.run()))
     yield
+    for task in background:
+        task.cancel()
+    calculation_events.close()
+    job_runner.close()
     db.disconnect()
 
 
+async def consistent_reads():
+    # The version behind an ETag or cache key and the body it describes are
+    # read in one session, so a lagging secondary cannot pair a new version
+    # with an old body
+    async with db.read_session():
+        yield
+
+
+def cached_json_response(cached: CachedResponse) -> Response:
+    return Response(content=cached.body, media_type=cached.media_type, headers=cached.headers)
+
+
+def cache_json_response(key, tag: Hashable, body: bytes, headers=None, media_type=JSON_MEDIA_TYPE, etag=None) -> Response:
+    headers = dict(headers or {})
+    if etag:
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "no-cache"
+    cached = CachedResponse(body=body, headers=headers, media_type=media_type)
+    response_cache.set(key, cached, size=len(body), tag=tag)
+    return cached_json_response(cached)
+
+
+async def check_building_etag(http_request: Request, building_id: str, cache_key: tuple):
+    # One index-only lookup decides both the ETag and whether to answer 304.
+    # The version also goes into the cache key, so a write seen by another
+    # worker can no longer be hidden by this worker's cached body.
+    version = await db.get_building_version(building_id)
+    if version is None:
+        return None, None
+    etag = make_etag(version, *cache_key)
+    if etag_matches(http_request.headers.get("if-none-match"), etag):
+        not_modified = Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
+        return etag, not_modified
+    return etag, None
+
+
 app = FastAPI(
     title="Energy Efficiency Tracker API",
     description="API for tracking and calculating energy efficiency improvements in buildings",
@@ -30,13 +130,18 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Innermost, so rejections still carry CORS headers and are counted by metrics
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "Idempotent-Replayed", "ETag", "X-Scenario-Hash", "Retry-After"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/", tags=["Health"])
@@ -52,7 +157,7 @@ async def root():
 @app.get("/health", tags=["Health"])
 async def health_check():
     try:
-        db.client.admin.command('ping')
+        await db.ping()
         return {
             "status": "healthy",
             "database": "connected",
@@ -70,18 +175,97 @@ async def health_check():
         )
 
 
+@app.get("/health/live", tags=["Health"])
+async def liveness_check():
+    return {"status": "alive", "timestamp": datetime.utcnow().isoformat()}
+
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness_check():
+    body = {
+        "status": "ready",
+        "database": db.state,
+        "indexes": db.index_state,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    if db.state == "ready":
+        try:
+            await asyncio.wait_for(db.ping(), timeout=READINESS_TIMEOUT_SECONDS)
+            return body
+        except Exception as e:
+            body["database"] = "unavailable"
+            body["error"] = str(e) or type(e).__name__
+    elif db.last_error:
+        body["error"] = db.last_error
+    body["status"] = "not_ready"
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=body)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/cache/stats", tags=["Health"])
+async def cache_stats():
+    return response_cache.snapshot()
+
+
 @app.post(
     "/api/efficiency/calculate",
     response_model=CalculationResponse,
     status_code=status.HTTP_201_CREATED,
     tags=["Efficiency Calculations"]
 )
-async def calculate_efficiency(request: CalculationRequest):
+async def calculate_efficiency(request: CalculationRequest, http_request: Request):
+    route = "/api/efficiency/calculate"
+    observe_request_stage(http_request.scope, route, "validation")
     try:
-        calculation_result = process_efficiency_calculation(request.model_dump())
-        inserted_id = db.insert_calculation(calculation_result)
-        calculation_result["_id"] = inserted_id
-        return CalculationResponse(**calculation_result)
+        idempotency_key = validate_idempotency_key(http_request.headers.get(IDEMPOTENCY_HEADER))
+        request_hash = calculation_request_hash(request)
+        with time_stage(route, "database"):
+            # Bound before the hash lookup, so a key first used on a replayed
+            # request still rejects a different body later
+            if idempotency_key and await db.bind_idempotency_key(idempotency_key, request_hash) != request_hash:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"{IDEMPOTENCY_HEADER} was already used for a different request"
+                )
+            existing = await db.find_existing_calculation(request_hash, idempotency_key)
+        if existing is None:
+            with time_stage(route, "compute"):
+                calculation_result = process_calculation_request(request)
+            calculation_result["request_hash"] = request_hash
+            if idempotency_key:
+                calculation_result["idempotency_key"] = idempotency_key
+            try:
+                with time_stage(route, "database"):
+                    inserted_id = await db.insert_calculation(calculation_result)
+                record_calculations("calculate", 1, len(request.periods))
+                response_cache.invalidate_tag(calculation_result["building_id"])
+                calculation_result["_id"] = inserted_id
+            except DuplicateKeyError:
+                # A concurrent duplicate was inserted between the lookup and ours
+                existing = await db.find_existing_calculation(request_hash, idempotency_key)
+                if existing is None:
+                    raise
+        if existing is not None:
+            if existing["request_hash"] != request_hash:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"{IDEMPOTENCY_HEADER} was already used for a different request"
+                )
+            calculation_result = existing
+        with time_stage(route, "serialize"):
+            body = calculation_to_json(calculation_result)
+        return Response(
+            content=body,
+            status_code=status.HTTP_201_CREATED if existing is None else status.HTTP_200_OK,
+            media_type="application/json",
+            headers=None if existing is None else {"Idempotent-Replayed": "true"}
+        )
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -94,22 +278,259 @@ async def calculate_efficiency(request: CalculationRequest):
         )
 
 
+@app.post(
+    "/api/efficiency/calculate/batch",
+    response_model=BatchCalculationResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Efficiency Calculations"]
+)
+async def calculate_efficiency_batch(request: BatchCalculationRequest, http_request: Request):
+    route = "/api/efficiency/calculate/batch"
+    observe_request_stage(http_request.scope, route, "validation")
+    try:
+        requests_data = [calculation.model_dump() for calculation in request.calculations]
+        with time_stage(route, "compute"):
+            calculation_results = await run_in_threadpool(process_efficiency_calculation_batch, requests_data)
+        record_calculations("batch", len(requests_data), sum(len(r["periods"]) for r in requests_data))
+        with time_stage(route, "database"):
+            inserted_ids = await db.insert_calculations(calculation_results)
+        for building_id in {result["building_id"] for result in calculation_results}:
+            response_cache.invalidate_tag(building_id)
+        return BatchCalculationResponse(
+            inserted_count=len(inserted_ids),
+            results=[
+                BatchCalculationResult(
+                    id=inserted_id,
+                    building_id=result["building_id"],
+                    summary=result["summary"]
+                )
+                for inserted_id, result in zip(inserted_ids, calculation_results)
+            ]
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Validation error: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process batch calculation: {str(e)}"
+        )
+
+
+@app.post(
+    "/api/efficiency/ingest",
+    response_model=IngestionResponse,
+    tags=["Efficiency Calculations"]
+)
+async def ingest_calculations(request: Request):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+            records = iter_ndjson(request.stream())
+        else:
+            records = iter_json_array(await request.body())
+        
+        ingestion = BulkIngestion(db)
+        results = await ingestion.run(records)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Validation error: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to ingest calculations: {str(e)}"
+        )
+    
+    for building_id in ingestion.building_ids:
+        response_cache.invalidate_tag(building_id)
+    
+    inserted = ingestion.inserted
+    return IngestionResponse(
+        received=len(results),
+        inserted=inserted,
+        failed=len(results) - inserted,
+        results=results
+    )
+
+
+@app.post(
+    "/api/efficiency/intervals",
+    response_model=IntervalIngestionResponse,
+    response_model_exclude_none=True,
+    tags=["Efficiency Calculations"]
+)
+async def ingest_interval_readings(
+    request: Request,
+    response: Response,
+    electric_rate: float = Query(..., gt=0),
+    gas_rate: float = Query(..., gt=0),
+    time_range: str = Query(DEFAULT_TIME_RANGE),
+    days: List[str] = Query(DEFAULT_BUSINESS_DAYS),
+    calculate: bool = False,
+    building_id: Optional[str] = None,
+    measure_name: Optional[str] = None
+):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        invalid_days = [day for day in days if day not in DAY_NAMES]
+        if invalid_days:
+            raise ValueError(f"Invalid day: {invalid_days[0]}. Must be one of {DAY_NAMES}")
+        if calculate and not (building_id and measure_name):
+            raise ValueError("building_id and measure_name are required when calculate=true")
+        
+        aggregator = IntervalAggregator(time_range, days)
+        if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+            await aggregate_ndjson(request.stream(), aggregator)
+        else:
+            await aggregate_csv(request.stream(), aggregator)
+        periods, incomplete = aggregator.period_inputs(electric_rate, gas_rate)
+        result = {**aggregator.summary(), "periods": periods, "incomplete_periods": incomplete}
+        
+        if calculate:
+            if not periods:
+                raise ValueError("No period has both baseline and current readings")
+            calculation_request = CalculationRequest(building_id=building_id, measure_name=measure_name, periods=periods)
+            calculation_result = await run_in_threadpool(process_calculation_request, calculation_request)
+            inserted_id = await db.insert_calculation(calculation_result)
+            record_calculations("intervals", 1, len(periods))
+            response_cache.invalidate_tag(building_id)
+            result["calculation"] = {
+                "id": inserted_id,
+                "building_id": building_id,
+                "summary": calculation_result["summary"],
+            }
+            response.status_code = status.HTTP_201_CREATED
+        return result
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Validation error: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to ingest interval readings: {str(e)}"
+        )
+
+
+@app.post(
+    "/api/jobs/calculate",
+    response_model=JobResponse,
+    response_model_exclude_none=True,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["Jobs"]
+)
+async def submit_calculation_job(request: Request):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+            records = iter_ndjson(request.stream())
+        else:
+            records = iter_json_array(await request.body())
+        
+        job_id = await JobSubmission(db).run(records)
+        job_runner.notify()
+        return await db.get_job(job_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Validation error: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to submit job: {str(e)}"
+        )
+
+
+@app.get(
+    "/api/jobs/{job_id}",
+    response_model=JobResponse,
+    response_model_exclude_none=True,
+    tags=["Jobs"]
+)
+async def get_job(job_id: str):
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job not found: {job_id}"
+        )
+    try:
+        job = await db.get_job(job_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve job: {str(e)}"
+        )
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job not found: {job_id}"
+        )
+    return job
+
+
 @app.get(
     "/api/efficiency/building/{building_id}",
     response_model=List[CalculationResponse],
+    dependencies=[Depends(consistent_reads)],
     tags=["Efficiency Calculations"]
 )
-async def get_building_calculations(building_id: str):
+async def get_building_calculations(
+    building_id: str,
+    http_request: Request,
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = Query(None, description="Cursor returned in the X-Next-Cursor header"),
+    fields: Optional[str] = Query(None, description="Comma-separated top-level fields to return")
+):
+    media_type = negotiate_media_type(http_request.headers.get("accept"))
+    cache_key = ("history", building_id, limit, after, fields, media_type)
     try:
-        results = db.find_by_building_id(building_id)
-        if not results:
+        etag, not_modified = await check_building_etag(http_request, building_id, cache_key)
+        if not_modified:
+            return not_modified
+        cache_key += (etag,)
+        cached = response_cache.get(cache_key)
+        if cached:
+            return cached_json_response(cached)
+        
+        projected_fields = parse_fields(fields)
+        results, next_cursor = await db.find_page_by_building_id(
+            building_id,
+            limit=limit,
+            after=after,
+            fields=projected_fields
+        )
+        if not results and not after:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"No calculations found for building ID: {building_id}"
             )
-        return [CalculationResponse(**result) for result in results]
+        
+        headers = {"Vary": "Accept"}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = (
+                f'</api/efficiency/building/{building_id}?limit={limit}&after={next_cursor}'
+                f'{"&fields=" + fields if fields else ""}>; rel="next"'
+            )
+        
+        if projected_fields:
+            body = encode_documents(results, media_type)
+        else:
+            body = encode_calculations(results, media_type)
+        return cache_json_response(cache_key, building_id, body, headers, media_type, etag=etag)
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -120,24 +541,80 @@ async def get_building_calculations(building_id: str):
 @app.get(
     "/api/efficiency/building/{building_id}/period/{period}",
     response_model=List[CalculationResponse],
+    dependencies=[Depends(consistent_reads)],
     tags=["Efficiency Calculations"]
 )
-async def get_building_period_calculations(building_id: str, period: str):
-    valid_periods = ["business_hours", "after_hours", "weekend"]
-    if period not in valid_periods:
+async def get_building_period_calculations(building_id: str, period: str, http_request: Request):
+    if period not in VALID_PERIODS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid period. Must be one of: {', '.join(valid_periods)}"
+            detail=f"Invalid period. Must be one of: {', '.join(VALID_PERIODS)}"
         )
     
+    cache_key = ("period", building_id, period)
     try:
-        results = db.find_by_building_and_period(building_id, period)
+        etag, not_modified = await check_building_etag(http_request, building_id, cache_key)
+        if not_modified:
+            return not_modified
+        cache_key += (etag,)
+        cached = response_cache.get(cache_key)
+        if cached:
+            return cached_json_response(cached)
+        
+        results = await db.find_by_building_and_period(building_id, period)
         if not results:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"No calculations found for building ID: {building_id} and period: {period}"
             )
-        return [CalculationResponse(**result) for result in results]
+        body = calculations_to_json(results)
+        return cache_json_response(cache_key, building_id, body, etag=etag)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve calculations: {str(e)}"
+        )
+
+
+@app.get(
+    "/api/efficiency/building/{building_id}/periods",
+    response_model=List[CalculationResponse],
+    dependencies=[Depends(consistent_reads)],
+    tags=["Efficiency Calculations"]
+)
+async def get_building_multi_period_calculations(
+    building_id: str,
+    http_request: Request,
+    period: List[str] = Query(..., description="Repeat to request several periods")
+):
+    invalid_periods = [p for p in period if p not in VALID_PERIODS]
+    if invalid_periods:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid period. Must be one of: {', '.join(VALID_PERIODS)}"
+        )
+    
+    periods = list(dict.fromkeys(period))
+    cache_key = ("periods", building_id, tuple(periods))
+    try:
+        etag, not_modified = await check_building_etag(http_request, building_id, cache_key)
+        if not_modified:
+            return not_modified
+        cache_key += (etag,)
+        cached = response_cache.get(cache_key)
+        if cached:
+            return cached_json_response(cached)
+        
+        results = await db.find_by_building_and_periods(building_id, periods)
+        if not results:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No calculations found for building ID: {building_id} and periods: {', '.join(periods)}"
+            )
+        body = calculations_to_json(results)
+        return cache_json_response(cache_key, building_id, body, etag=etag)
     except HTTPException:
         raise
     except Exception as e:
@@ -150,17 +627,28 @@ async def get_building_period_calculations(building_id: str, period: str):
 @app.get(
     "/api/efficiency/building/{building_id}/summary",
     response_model=CalculationResponse,
+    dependencies=[Depends(consistent_reads)],
     tags=["Efficiency Calculations"]
 )
-async def get_building_summary(building_id: str):
+async def get_building_summary(building_id: str, http_request: Request):
+    cache_key = ("summary", building_id)
     try:
-        result = db.get_building_summary(building_id)
+        etag, not_modified = await check_building_etag(http_request, building_id, cache_key)
+        if not_modified:
+            return not_modified
+        cache_key += (etag,)
+        cached = response_cache.get(cache_key)
+        if cached:
+            return cached_json_response(cached)
+        
+        result = await db.get_building_summary(building_id)
         if not result:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"No summary found for building ID: {building_id}"
             )
-        return CalculationResponse(**result)
+        body = calculation_to_json(result)
+        return cache_json_response(cache_key, building_id, body, etag=etag)
     except HTTPException:
         raise
     except Exception as e:
@@ -170,6 +658,270 @@ async def get_building_summary(building_id: str):
         )
 
 
+@app.get(
+    "/api/efficiency/building/{building_id}/period-metrics",
+    response_model=List[PeriodMetricsPoint],
+    tags=["Efficiency Calculations"]
+)
+async def get_building_period_metrics(
+    building_id: str,
+    period: Optional[List[str]] = Query(None, description="Repeat to request several periods; all if omitted"),
+    start: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    end: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+    limit: int = Query(DEFAULT_POINT_LIMIT, ge=1, le=MAX_POINT_LIMIT)
+):
+    invalid_periods = [p for p in period or [] if p not in VALID_PERIODS]
+    if invalid_periods:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid period. Must be one of: {', '.join(VALID_PERIODS)}"
+        )
+    if start and end and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be earlier than end"
+        )
+    
+    try:
+        points = await db.find_period_metrics(
+            building_id,
+            periods=list(dict.fromkeys(period)) if period else None,
+            start=start,
+            end=end,
+            limit=limit
+        )
+        return Response(content=documents_to_json(points), media_type="application/json")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve period metrics: {str(e)}"
+        )
+
+
+@app.get(
+    "/api/efficiency/building/{building_id}/trend",
+    response_model=TrendResponse,
+    dependencies=[Depends(consistent_reads)],
+    response_model_exclude_none=True,
+    tags=["Efficiency Calculations"]
+)
+async def get_building_trend(
+    building_id: str,
+    http_request: Request,
+    start: Optional[datetime] = Query(None, description="Inclusive lower bound; defaults to the first calculation"),
+    end: Optional[datetime] = Query(None, description="Exclusive upper bound; defaults to just after the last calculation"),
+    points: int = Query(DEFAULT_TREND_POINTS, ge=2, le=MAX_TREND_POINTS, description="Maximum number of points"),
+    period: Optional[str] = Query(None, description="Chart one period instead of the calculation summary")
+):
+    if period is not None and period not in VALID_PERIODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid period. Must be one of: {', '.join(VALID_PERIODS)}"
+        )
+    
+    cache_key = ("trend", building_id, start, end, points, period)
+    try:
+        etag, not_modified = await check_building_etag(http_request, building_id, cache_key)
+        if not_modified:
+            return not_modified
+        cache_key += (etag,)
+        cached = response_cache.get(cache_key)
+        if cached:
+            return cached_json_response(cached)
+        
+        if start is None or end is None:
+            bounds = await db.find_calculation_time_bounds(building_id)
+            if bounds is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"No calculations found for building ID: {building_id}"
+                )
+            start = start or bounds[0]
+            end = end or bounds[1] + timedelta(milliseconds=1)
+        start, end = to_utc_naive(start), to_utc_naive(end)
+        if start >= end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start must be earlier than end"
+            )
+        
+        trend_points, bucket_ms = await db.get_trend(building_id, start, end, points, period=period)
+        trend = {
+            "building_id": building_id,
+            "start": start,
+            "end": end,
+            "bucket_seconds": bucket_ms / 1000,
+            "points": trend_points,
+        }
+        if period is not None:
+            trend["period"] = period
+        return cache_json_response(cache_key, building_id, documents_to_json(trend), etag=etag)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to compute trend: {str(e)}"
+        )
+
+
+@app.get(
+    "/api/efficiency/buildings/summaries",
+    response_model=List[BuildingSummaryResponse],
+    tags=["Efficiency Calculations"]
+)
+async def get_building_summaries(
+    building_id: Optional[List[str]] = Query(None, description="Repeat to request several buildings"),
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT)
+):
+    try:
+        results = await db.find_building_summaries(building_ids=building_id, limit=limit)
+        return [BuildingSummaryResponse(**result) for result in results]
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve building summaries: {str(e)}"
+        )
+
+
+@app.get(
+    "/api/efficiency/portfolio",
+    response_model=PortfolioResponse,
+    response_model_exclude_none=True,
+    tags=["Portfolio"]
+)
+async def get_portfolio(
+    top: int = Query(10, ge=1, le=100, description="Number of top and bottom buildings"),
+    bucket: Optional[Literal["week", "month", "quarter", "year"]] = Query(None),
+    start: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    end: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at")
+):
+    if start and end and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be earlier than end"
+        )
+    
+    try:
+        return await db.get_portfolio(start=start, end=end, top_n=top, bucket=bucket)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to compute portfolio: {str(e)}"
+        )
+
+
+def scenario_documents(request: ScenarioRequest):
+    return db.stream_calculations(
+        building_ids=request.building_ids,
+        start=request.start,
+        end=request.end,
+        projection=SCENARIO_PROJECTION
+    )
+
+
+def validate_scenario_window(request: ScenarioRequest):
+    if request.start and request.end and request.start >= request.end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be earlier than end"
+        )
+
+
+@app.post(
+    "/api/efficiency/scenarios",
+    response_model=ScenarioResponse,
+    dependencies=[Depends(consistent_reads)],
+    tags=["Scenarios"]
+)
+async def price_rate_scenarios(request: ScenarioRequest):
+    validate_scenario_window(request)
+    request_hash = scenario_hash(request)
+    headers = {"X-Scenario-Hash": request_hash}
+    
+    try:
+        # Any new calculation changes the version, so cached totals never go stale
+        cache_key = ("scenarios", request_hash, await db.get_collection_version())
+        cached = response_cache.get(cache_key)
+        if cached:
+            return cached_json_response(cached)
+        
+        totals = await price_scenarios(ScenarioPricer(request.scenarios), scenario_documents(request))
+        body = documents_to_json({"scenario_hash": request_hash, **totals})
+        return cache_json_response(cache_key, SCENARIOS_CACHE_TAG, body, headers=headers)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to price scenarios: {str(e)}"
+        )
+
+
+@app.post(
+    "/api/efficiency/scenarios/stream",
+    response_class=StreamingResponse,
+    tags=["Scenarios"]
+)
+async def stream_rate_scenarios(request: ScenarioRequest):
+    validate_scenario_window(request)
+    return StreamingResponse(
+        stream_scenario_rows(ScenarioPricer(request.scenarios), scenario_documents(request)),
+        media_type="application/x-ndjson",
+        headers={"X-Scenario-Hash": scenario_hash(request)}
+    )
+
+
+@app.get(
+    "/api/efficiency/export",
+    response_class=StreamingResponse,
+    tags=["Export"]
+)
+async def export_calculations(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    building_id: Optional[List[str]] = Query(None, description="Repeat to export several buildings"),
+    start: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    end: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at")
+):
+    if start and end and start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be earlier than end"
+        )
+    
+    documents = db.stream_calculations(building_ids=building_id, start=start, end=end)
+    filename = f"efficiency_export_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{format}"
+    return StreamingResponse(
+        stream_export(documents, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.get(
+    "/api/efficiency/events",
+    response_class=StreamingResponse,
+    tags=["Efficiency Calculations"]
+)
+async def stream_calculation_events(
+    building_id: List[str] = Query(..., description="Repeat to subscribe to several buildings")
+):
+    if len(building_id) > EVENTS_MAX_BUILDINGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {EVENTS_MAX_BUILDINGS} building IDs per subscription"
+        )
+    if calculation_events.full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event subscribers, retry shortly"
+        )
+    
+    return StreamingResponse(
+        calculation_events.stream(building_id),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     return JSONResponse(
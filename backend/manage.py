@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import os
+
+from database import db
+from jobs import JobRunner
+
+
+async def rebuild_summaries(args):
+    await db.connect()
+    try:
+        rebuilt = await db.rebuild_building_summaries()
+        print(f"Rebuilt {rebuilt} building summaries")
+    finally:
+        db.disconnect()
+
+
+async def create_indexes(args):
+    await db.connect()
+    try:
+        await db.create_indexes()
+        print("Indexes created")
+    finally:
+        db.disconnect()
+
+
+async def migrate_timeseries(args):
+    await db.connect()
+    try:
+        migrated = await db.migrate_to_timeseries()
+        print(f"Wrote {migrated} period rows to {db.timeseries_collection_name}")
+    finally:
+        db.disconnect()
+
+
+async def run_jobs(args):
+    # Dedicated job worker, e.g. with JOB_RUNNER_ENABLED=false on the API servers
+    await db.connect()
+    # Unlike the API workers, a dedicated worker uses every CPU by default
+    runner = JobRunner(db, processes=int(os.getenv("JOB_PROCESSES", os.cpu_count() or 1)))
+    try:
+        await runner.run_until_idle()
+        print("No claimable job chunks left")
+    finally:
+        runner.close()
+        db.disconnect()
+
+
+COMMANDS = {
+    "rebuild-summaries": (rebuild_summaries, "Recompute building_summaries from efficiency_calculations"),
+    "create-indexes": (create_indexes, "Create or update all MongoDB indexes"),
+    "migrate-timeseries": (migrate_timeseries, "Rebuild the period_metrics time-series collection from history"),
+    "run-jobs": (run_jobs, "Process queued calculation job chunks until none are left"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Energy Efficiency Tracker maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text)
+    args = parser.parse_args()
+
+    command, _ = COMMANDS[args.command]
+    asyncio.run(command(args))
+
+
+if __name__ == "__main__":
+    main()
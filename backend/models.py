@@ -1,8 +1,10 @@
-from typing import List, Literal
+from typing import Dict, List, Literal, Optional
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 from datetime import datetime, timezone
 from bson import ObjectId
 
+VALID_PERIODS = ["business_hours", "after_hours", "weekend"]
+
 
 class PeriodInput(BaseModel):
     period: Literal["business_hours", "after_hours", "weekend"]
@@ -38,6 +40,10 @@ class CalculationRequest(BaseModel):
         return v
 
 
+class BatchCalculationRequest(BaseModel):
+    calculations: List[CalculationRequest] = Field(..., min_length=1, max_length=20000)
+
+
 class PeriodMetrics(BaseModel):
     period: str
     time_range: str
@@ -82,6 +88,207 @@ class CalculationResponse(BaseModel):
     created_at: datetime
 
 
+class LatestCalculation(BaseModel):
+    calculation_id: str
+    measure_name: str
+    created_at: datetime
+    summary: EfficiencySummary
+
+
+class PeriodHighlight(BaseModel):
+    calculation_id: str
+    period: str
+    overall_efficiency_improvement_percent: float
+    created_at: datetime
+
+
+class BuildingSummaryResponse(BaseModel):
+    building_id: str
+    calculation_count: int
+    total_electric_savings_kwh: float
+    total_gas_savings_therms: float
+    total_cost_savings: float
+    latest: LatestCalculation
+    best_period: Optional[PeriodHighlight] = None
+    worst_period: Optional[PeriodHighlight] = None
+    updated_at: datetime
+
+
+class BatchCalculationResult(BaseModel):
+    id: str
+    building_id: str
+    summary: EfficiencySummary
+
+
+class BatchCalculationResponse(BaseModel):
+    inserted_count: int
+    results: List[BatchCalculationResult]
+
+
+class IngestionItemResult(BaseModel):
+    index: int
+    status: Literal["inserted", "error"]
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class IngestionResponse(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    results: List[IngestionItemResult]
+
+
+class PortfolioTotals(BaseModel):
+    calculation_count: int
+    total_electric_savings_kwh: float
+    total_gas_savings_therms: float
+    total_cost_savings: float
+    average_efficiency_improvement_percent: float
+
+
+class PortfolioBuilding(PortfolioTotals):
+    building_id: str
+
+
+class PortfolioBucket(PortfolioTotals):
+    period_start: datetime
+
+
+class PortfolioResponse(PortfolioTotals):
+    building_count: int
+    grade_distribution: Dict[str, int]
+    top_buildings: List[PortfolioBuilding]
+    bottom_buildings: List[PortfolioBuilding]
+    buckets: Optional[List[PortfolioBucket]] = None
+
+
+class PeriodMetricsPoint(PeriodMetrics):
+    timestamp: datetime
+    building_id: str
+    calculation_id: str
+
+
+class TrendPoint(BaseModel):
+    timestamp: datetime
+    calculation_count: int
+    cost_savings: float
+    electric_savings_kwh: float
+    gas_savings_therms: float
+    efficiency_improvement_percent: float
+
+
+class TrendResponse(BaseModel):
+    building_id: str
+    period: Optional[str] = None
+    start: datetime
+    end: datetime
+    bucket_seconds: float
+    points: List[TrendPoint]
+
+
+class PeriodRates(BaseModel):
+    electric_rate: float = Field(..., gt=0)
+    gas_rate: float = Field(..., gt=0)
+
+
+class RateScenario(PeriodRates):
+    name: str = Field(..., min_length=1, max_length=100)
+    # Time-of-use: per-period rates that replace the flat ones for that period
+    time_of_use: Optional[Dict[Literal["business_hours", "after_hours", "weekend"], PeriodRates]] = None
+
+
+class ScenarioRequest(BaseModel):
+    scenarios: List[RateScenario] = Field(..., min_length=1, max_length=10)
+    building_ids: Optional[List[str]] = Field(None, max_length=1000)
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+    @field_validator('scenarios')
+    @classmethod
+    def validate_unique_names(cls, v):
+        names = [scenario.name for scenario in v]
+        if len(set(names)) != len(names):
+            raise ValueError("Scenario names must be unique")
+        return v
+
+
+class ScenarioTotals(BaseModel):
+    name: str
+    electric_cost_savings: float
+    gas_cost_savings: float
+    total_cost_savings: float
+    delta_cost_savings: float
+    average_efficiency_improvement_percent: float
+    grade_distribution: Dict[str, int]
+
+
+class ScenarioResponse(BaseModel):
+    scenario_hash: str
+    calculation_count: int
+    building_count: int
+    stored_total_cost_savings: float
+    scenarios: List[ScenarioTotals]
+
+
+class JobRecordError(BaseModel):
+    index: int
+    error: str
+
+
+class JobChunkError(BaseModel):
+    chunk: int
+    error: str
+
+
+class JobChunkCounts(BaseModel):
+    total: int
+    pending: int
+    running: int
+    completed: int
+    failed: int
+
+
+class JobResult(BaseModel):
+    inserted_count: int
+    failed_count: int
+    total_cost_savings: float
+    grade_distribution: Dict[str, int]
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: Literal["receiving", "queued", "running", "completed", "failed"]
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    total_calculations: int
+    processed_calculations: int
+    progress_percent: float
+    invalid_count: int
+    errors: List[JobRecordError]
+    chunks: JobChunkCounts
+    chunk_errors: List[JobChunkError]
+    result: JobResult
+    error: Optional[str] = None
+
+
+class IntervalRowError(BaseModel):
+    line: int
+    error: str
+
+
+class IntervalIngestionResponse(BaseModel):
+    rows: int
+    skipped_rows: int
+    errors: List[IntervalRowError]
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    readings: Dict[str, Dict[str, int]]
+    periods: List[PeriodInput]
+    incomplete_periods: List[str]
+    calculation: Optional[BatchCalculationResult] = None
+
+
 class ErrorResponse(BaseModel):
     error: str
     detail: str
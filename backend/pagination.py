@@ -0,0 +1,69 @@
+from typing import Tuple, Optional, List, Dict, Any
+from datetime import datetime, timezone, timedelta
+from bson import ObjectId
+import base64
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+PROJECTABLE_FIELDS = [
+    "building_id",
+    "measure_name",
+    "calculation_timestamp",
+    "periods",
+    "summary",
+    "created_at",
+]
+
+# Always returned so that every item can produce the next cursor
+REQUIRED_FIELDS = ["_id", "created_at"]
+
+
+def _to_milliseconds(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(milliseconds=1)
+
+
+def encode_cursor(created_at: datetime, document_id: Any) -> str:
+    raw = f"{_to_milliseconds(created_at)}:{document_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        milliseconds, document_id = base64.urlsafe_b64decode(padded).decode().split(":", 1)
+        return EPOCH + timedelta(milliseconds=int(milliseconds)), ObjectId(document_id)
+    except Exception as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor}") from e
+
+
+def keyset_filter(created_at: datetime, document_id: ObjectId) -> Dict[str, Any]:
+    # Matches documents strictly after the cursor in (created_at desc, _id desc) order
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": document_id}},
+        ]
+    }
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    invalid = [field for field in requested if field not in PROJECTABLE_FIELDS]
+    if invalid:
+        raise ValueError(
+            f"Invalid fields: {', '.join(invalid)}. Must be a subset of: {', '.join(PROJECTABLE_FIELDS)}"
+        )
+    return requested
+
+
+def build_projection(fields: Optional[List[str]]) -> Optional[Dict[str, int]]:
+    if not fields:
+        return None
+    return {field: 1 for field in REQUIRED_FIELDS + fields}
@@ -0,0 +1,105 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+SUMMARY_SUM_FIELDS = {
+    "total_electric_savings_kwh": "$summary.total_electric_savings_kwh",
+    "total_gas_savings_therms": "$summary.total_gas_savings_therms",
+    "total_cost_savings": "$summary.total_cost_savings",
+}
+
+# Fields read by the pipeline; the matching compound index lets MongoDB
+# answer the $match/$project stages from the index alone.
+PORTFOLIO_INDEX_FIELDS = [
+    "created_at",
+    "building_id",
+    "summary.total_electric_savings_kwh",
+    "summary.total_gas_savings_therms",
+    "summary.total_cost_savings",
+    "summary.average_efficiency_improvement_percent",
+    "summary.overall_performance_grade",
+]
+
+
+def _totals_group(group_id: Any) -> Dict[str, Any]:
+    group: Dict[str, Any] = {"_id": group_id, "calculation_count": {"$sum": 1}}
+    for field, path in SUMMARY_SUM_FIELDS.items():
+        group[field] = {"$sum": path}
+    group["average_efficiency_improvement_percent"] = {
+        "$avg": "$summary.average_efficiency_improvement_percent"
+    }
+    return group
+
+
+def portfolio_pipeline(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    top_n: int = 10,
+    bucket: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    match: Dict[str, Any] = {}
+    if start or end:
+        match["created_at"] = {}
+        if start:
+            match["created_at"]["$gte"] = start
+        if end:
+            match["created_at"]["$lt"] = end
+
+    by_building = [{"$group": _totals_group("$building_id")}]
+    facets: Dict[str, Any] = {
+        "totals": [{"$group": _totals_group(None)}],
+        "grade_distribution": [
+            {"$group": {"_id": "$summary.overall_performance_grade", "count": {"$sum": 1}}},
+            {"$sort": {"_id": 1}}
+        ],
+        "building_count": [{"$group": {"_id": "$building_id"}}, {"$count": "count"}],
+        "top_buildings": by_building + [
+            {"$sort": {"total_cost_savings": -1, "_id": 1}},
+            {"$limit": top_n}
+        ],
+        "bottom_buildings": by_building + [
+            {"$sort": {"total_cost_savings": 1, "_id": 1}},
+            {"$limit": top_n}
+        ],
+    }
+    if bucket:
+        facets["buckets"] = [
+            {"$group": _totals_group({"$dateTrunc": {"date": "$created_at", "unit": bucket}})},
+            {"$sort": {"_id": 1}}
+        ]
+
+    return [
+        {"$match": match},
+        {"$project": {"_id": 0, **{field: 1 for field in PORTFOLIO_INDEX_FIELDS}}},
+        {"$facet": facets},
+    ]
+
+
+def _rounded_totals(group: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "calculation_count": group.get("calculation_count", 0),
+        "total_electric_savings_kwh": round(group.get("total_electric_savings_kwh") or 0.0, 2),
+        "total_gas_savings_therms": round(group.get("total_gas_savings_therms") or 0.0, 2),
+        "total_cost_savings": round(group.get("total_cost_savings") or 0.0, 2),
+        "average_efficiency_improvement_percent": round(group.get("average_efficiency_improvement_percent") or 0.0, 2),
+    }
+
+
+def format_portfolio(result: Dict[str, Any]) -> Dict[str, Any]:
+    totals = result["totals"][0] if result["totals"] else {}
+    building_count = result["building_count"][0]["count"] if result["building_count"] else 0
+    portfolio = {
+        "building_count": building_count,
+        **_rounded_totals(totals),
+        "grade_distribution": {g["_id"]: g["count"] for g in result["grade_distribution"]},
+        "top_buildings": [
+            {"building_id": b["_id"], **_rounded_totals(b)} for b in result["top_buildings"]
+        ],
+        "bottom_buildings": [
+            {"building_id": b["_id"], **_rounded_totals(b)} for b in result["bottom_buildings"]
+        ],
+    }
+    if "buckets" in result:
+        portfolio["buckets"] = [
+            {"period_start": b["_id"], **_rounded_totals(b)} for b in result["buckets"]
+        ]
+    return portfolio
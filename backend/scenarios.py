@@ -0,0 +1,181 @@
+import hashlib
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Tuple
+import numpy as np
+from pydantic_core import to_json
+from starlette.concurrency import run_in_threadpool
+
+from calculations import calculate_period_metrics_batch, calculate_performance_grades, round_array
+from models import RateScenario, ScenarioRequest, VALID_PERIODS
+
+SCENARIO_CHUNK_SIZE = 2000
+
+PERIOD_CODES = {period: code for code, period in enumerate(VALID_PERIODS)}
+
+USAGE_COLUMNS = [
+    "current_electric_kwh",
+    "current_gas_therms",
+    "baseline_electric_kwh",
+    "baseline_gas_therms",
+]
+
+# Only what re-pricing reads is sent by MongoDB
+SCENARIO_PROJECTION = {
+    "building_id": 1,
+    "measure_name": 1,
+    "created_at": 1,
+    "summary.total_cost_savings": 1,
+    "periods.period": 1,
+    **{f"periods.{column}": 1 for column in USAGE_COLUMNS},
+}
+
+
+def scenario_hash(request: ScenarioRequest) -> str:
+    return hashlib.sha256(to_json(request.model_dump(mode="json"))).hexdigest()
+
+
+def rate_vectors(scenario: RateScenario) -> Tuple[np.ndarray, np.ndarray]:
+    # One rate per period code, so a whole chunk is priced with a single take()
+    electric = np.full(len(VALID_PERIODS), scenario.electric_rate, dtype=np.float64)
+    gas = np.full(len(VALID_PERIODS), scenario.gas_rate, dtype=np.float64)
+    for period, rates in (scenario.time_of_use or {}).items():
+        electric[PERIOD_CODES[period]] = rates.electric_rate
+        gas[PERIOD_CODES[period]] = rates.gas_rate
+    return electric, gas
+
+
+class ScenarioPricer:
+    # Re-prices stored kWh/therm figures under every scenario, one chunk of
+    # calculations at a time. Stored documents are only read.
+    def __init__(self, scenarios: List[RateScenario]):
+        self.scenarios = scenarios
+        self.rates = [rate_vectors(scenario) for scenario in scenarios]
+        self.calculation_count = 0
+        self.building_ids = set()
+        self.stored_total_cost_savings = 0.0
+        self._totals = [
+            {"electric": 0.0, "gas": 0.0, "total": 0.0, "efficiency": 0.0, "grades": {}}
+            for _ in scenarios
+        ]
+
+    def price(self, calculations: List[Dict[str, Any]], with_rows: bool = True) -> List[Dict[str, Any]]:
+        # with_rows=False only accumulates the totals
+        if not calculations:
+            return []
+        periods = [period for calculation in calculations for period in calculation["periods"]]
+        period_counts = np.fromiter(
+            (len(calculation["periods"]) for calculation in calculations), dtype=np.intp, count=len(calculations)
+        )
+        group_index = np.repeat(np.arange(len(calculations)), period_counts)
+        codes = np.fromiter((PERIOD_CODES[period["period"]] for period in periods), dtype=np.intp, count=len(periods))
+        columns = {
+            column: np.fromiter((period[column] for period in periods), dtype=np.float64, count=len(periods))
+            for column in USAGE_COLUMNS
+        }
+
+        def group_sum(values: np.ndarray) -> np.ndarray:
+            # bincount adds in index order, like summary_values' sum()
+            return np.bincount(group_index, weights=values, minlength=len(calculations))
+
+        stored_costs = [calculation["summary"]["total_cost_savings"] for calculation in calculations]
+        rows = [] if not with_rows else [
+            {
+                "calculation_id": str(calculation["_id"]),
+                "building_id": calculation["building_id"],
+                "measure_name": calculation.get("measure_name"),
+                "created_at": calculation.get("created_at"),
+                "stored_total_cost_savings": stored_cost,
+                "scenarios": {},
+            }
+            for calculation, stored_cost in zip(calculations, stored_costs)
+        ]
+        for scenario, (electric, gas), totals in zip(self.scenarios, self.rates, self._totals):
+            metrics = calculate_period_metrics_batch(
+                **columns,
+                electric_rate=electric[codes],
+                gas_rate=gas[codes]
+            )
+            electric_cost = round_array(group_sum(metrics["electric_cost_savings"]))
+            gas_cost = round_array(group_sum(metrics["gas_cost_savings"]))
+            total_cost = round_array(group_sum(metrics["total_cost_savings"]))
+            efficiency = group_sum(metrics["overall_efficiency_improvement_percent"]) / np.maximum(period_counts, 1)
+            grades = calculate_performance_grades(efficiency)
+            
+            per_calculation = zip(
+                electric_cost.tolist(), gas_cost.tolist(), total_cost.tolist(),
+                round_array(efficiency).tolist(), grades.tolist()
+            ) if with_rows else []
+            for row, (electric_value, gas_value, total_value, efficiency_value, grade) in zip(rows, per_calculation):
+                row["scenarios"][scenario.name] = {
+                    "electric_cost_savings": electric_value,
+                    "gas_cost_savings": gas_value,
+                    "total_cost_savings": total_value,
+                    "delta_cost_savings": round(total_value - row["stored_total_cost_savings"], 2),
+                    "average_efficiency_improvement_percent": efficiency_value,
+                    "overall_performance_grade": grade,
+                }
+            
+            totals["electric"] += float(electric_cost.sum())
+            totals["gas"] += float(gas_cost.sum())
+            totals["total"] += float(total_cost.sum())
+            totals["efficiency"] += float(efficiency.sum())
+            for grade, count in zip(*np.unique(grades, return_counts=True)):
+                totals["grades"][str(grade)] = totals["grades"].get(str(grade), 0) + int(count)
+        
+        self.calculation_count += len(calculations)
+        self.building_ids.update(calculation["building_id"] for calculation in calculations)
+        self.stored_total_cost_savings += sum(stored_costs)
+        return rows
+
+    def totals(self) -> Dict[str, Any]:
+        stored = round(self.stored_total_cost_savings, 2)
+        return {
+            "calculation_count": self.calculation_count,
+            "building_count": len(self.building_ids),
+            "stored_total_cost_savings": stored,
+            "scenarios": [
+                {
+                    "name": scenario.name,
+                    "electric_cost_savings": round(totals["electric"], 2),
+                    "gas_cost_savings": round(totals["gas"], 2),
+                    "total_cost_savings": round(totals["total"], 2),
+                    "delta_cost_savings": round(totals["total"] - stored, 2),
+                    "average_efficiency_improvement_percent": round(
+                        totals["efficiency"] / self.calculation_count, 2
+                    ) if self.calculation_count else 0.0,
+                    "grade_distribution": dict(sorted(totals["grades"].items())),
+                }
+                for scenario, totals in zip(self.scenarios, self._totals)
+            ],
+        }
+
+
+async def chunked(documents: AsyncIterable[Dict[str, Any]], chunk_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    chunk: List[Dict[str, Any]] = []
+    async for doc in documents:
+        chunk.append(doc)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def stream_scenario_rows(
+    pricer: ScenarioPricer,
+    documents: AsyncIterable[Dict[str, Any]],
+    chunk_size: int = SCENARIO_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    # NDJSON, one re-priced calculation per line; numpy work runs off the event loop
+    async for chunk in chunked(documents, chunk_size):
+        rows = await run_in_threadpool(pricer.price, chunk)
+        yield b"".join(to_json(row) + b"\n" for row in rows)
+
+
+async def price_scenarios(
+    pricer: ScenarioPricer,
+    documents: AsyncIterable[Dict[str, Any]],
+    chunk_size: int = SCENARIO_CHUNK_SIZE
+) -> Dict[str, Any]:
+    async for chunk in chunked(documents, chunk_size):
+        await run_in_threadpool(pricer.price, chunk, False)
+    return pricer.totals()
@@ -0,0 +1,126 @@
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime
+from pydantic_core import to_json
+
+try:
+    import msgpack
+except ImportError:  # in requirements.txt; without it MessagePack requests get JSON
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.efficiency.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Field order of CalculationResponse, with the "_id" alias it is served under
+CALCULATION_RESPONSE_FIELDS = [
+    "building_id",
+    "measure_name",
+    "calculation_timestamp",
+    "periods",
+    "summary",
+    "created_at",
+]
+
+
+def _trusted_calculation(doc: Dict[str, Any]) -> Dict[str, Any]:
+    # Documents written by process_efficiency_calculation already have the
+    # CalculationResponse shape, so they are only re-keyed, not re-validated.
+    result = {"_id": str(doc["_id"])}
+    for field in CALCULATION_RESPONSE_FIELDS:
+        result[field] = doc[field]
+    return result
+
+
+def calculation_to_json(doc: Dict[str, Any]) -> bytes:
+    return to_json(_trusted_calculation(doc), fallback=str)
+
+
+def calculations_to_json(docs: Iterable[Dict[str, Any]]) -> bytes:
+    return to_json([_trusted_calculation(doc) for doc in docs], fallback=str)
+
+
+def documents_to_json(docs: Any) -> bytes:
+    # Projected or ad-hoc documents: any subset of fields, ObjectIds as strings
+    return to_json(docs, fallback=str)
+
+
+def available_media_types() -> List[str]:
+    media_types = [JSON_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE]
+    if msgpack is not None:
+        media_types.append(MSGPACK_MEDIA_TYPE)
+    return media_types
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    # Highest q wins, earlier entries break ties; anything unsupported or a
+    # wildcard falls back to plain JSON rather than a 406.
+    available = available_media_types()
+    best, best_q = JSON_MEDIA_TYPE, 0.0
+    for entry in (accept or "").split(","):
+        media_type, _, params = entry.strip().partition(";")
+        media_type = media_type.strip().lower()
+        if media_type not in available:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def to_columnar(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # One array per field instead of one object per document, so key names are
+    # sent once. Periods become a second table pointing back at their
+    # calculation by index. All documents in a page share one shape.
+    columns: Dict[str, List[Any]] = {}
+    periods: Dict[str, List[Any]] = {}
+    if docs:
+        keys = [key for key in docs[0] if key != "periods"]
+        summary_keys = list(docs[0]["summary"]) if isinstance(docs[0].get("summary"), dict) else []
+        for key in keys:
+            if key == "summary" and summary_keys:
+                for summary_key in summary_keys:
+                    columns[f"summary.{summary_key}"] = [doc["summary"].get(summary_key) for doc in docs]
+            else:
+                columns[key] = [doc.get(key) for doc in docs]
+        
+        period_keys = None
+        for index, doc in enumerate(docs):
+            for period in doc.get("periods") or []:
+                if period_keys is None:
+                    period_keys = list(period)
+                    periods = {"calculation": [], **{key: [] for key in period_keys}}
+                periods["calculation"].append(index)
+                for key in period_keys:
+                    periods[key].append(period.get(key))
+    
+    result: Dict[str, Any] = {"count": len(docs), "columns": columns}
+    if periods:
+        result["periods"] = periods
+    return result
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_documents(docs: List[Dict[str, Any]], media_type: str) -> bytes:
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        return to_json(to_columnar(docs), fallback=str)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(docs, default=_msgpack_default)
+    return to_json(docs, fallback=str)
+
+
+def encode_calculations(docs: Iterable[Dict[str, Any]], media_type: str) -> bytes:
+    if media_type == JSON_MEDIA_TYPE:
+        return calculations_to_json(docs)
+    return encode_documents([_trusted_calculation(doc) for doc in docs], media_type)
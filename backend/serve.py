@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def worker_pool_size(total_pool_size: int, workers: int) -> int:
+    # Split the connection budget so N workers together stay within it
+    return max(1, total_pool_size // workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with multiple worker processes")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", 8000)))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("API_WORKERS", os.cpu_count() or 1)),
+        help="Worker processes (default: API_WORKERS or CPU count)"
+    )
+    parser.add_argument(
+        "--total-pool-size",
+        type=int,
+        default=int(os.getenv("MONGODB_TOTAL_POOL_SIZE", 200)),
+        help="MongoDB connections shared across all workers"
+    )
+    parser.add_argument(
+        "--total-job-processes",
+        type=int,
+        default=int(os.getenv("JOB_TOTAL_PROCESSES", os.cpu_count() or 1)),
+        help="Job pool processes shared across all workers"
+    )
+    parser.add_argument(
+        "--create-indexes",
+        action="store_true",
+        help="Create indexes once in the parent process before starting workers"
+    )
+    args = parser.parse_args()
+
+    # Workers are separate processes that read these at import time
+    os.environ["MONGODB_MAX_POOL_SIZE"] = str(worker_pool_size(args.total_pool_size, args.workers))
+    os.environ["MONGODB_CREATE_INDEXES_ON_STARTUP"] = "false"
+    # Each worker runs a job runner, so its pool gets a share of the CPUs
+    os.environ["JOB_PROCESSES"] = str(worker_pool_size(args.total_job_processes, args.workers))
+
+    if args.create_indexes:
+        from manage import create_indexes
+        asyncio.run(create_indexes(args))
+
+    import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=False,
+        access_log=False,
+        timeout_graceful_shutdown=30
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1052 @@
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import bson
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo.errors import DuplicateKeyError
+
+from pagination import decode_cursor, encode_cursor, build_projection
+from summaries import apply_building_summary_update
+from portfolio import format_portfolio
+from trend import trend_bucket_ms, format_trend_points
+from metrics import timed_operation
+from jobs import (
+    CHUNK_STAGED, CHUNK_PENDING, CHUNK_RUNNING, CHUNK_COMPLETED, CHUNK_FAILED, OPEN_CHUNK_STATES,
+    JOB_RECEIVING, JOB_QUEUED, JOB_COMPLETED, JOB_FAILED, format_job
+)
+from timeseries import TIMESERIES_COLLECTION, PERIOD_METRIC_FIELDS, DEFAULT_POINT_LIMIT
+from events import EVENTS_POLL_SECONDS
+
+load_dotenv()
+
+# ":memory:" keeps everything in process, e.g. for tests and benchmarks
+SQLITE_PATH = os.getenv("SQLITE_PATH", "energy_efficiency.db")
+# Reader threads, each with its own connection; WAL lets them run alongside the writer
+SQLITE_READ_CONNECTIONS = int(os.getenv("SQLITE_READ_CONNECTIONS", 4))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+EPOCH = datetime(1970, 1, 1)
+
+SCHEMA = [
+    # Summary totals are copied into columns so that portfolio and trend
+    # queries aggregate in SQL without decoding documents
+    """CREATE TABLE IF NOT EXISTS efficiency_calculations (
+        id TEXT PRIMARY KEY,
+        building_id TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        request_hash TEXT,
+        idempotency_key TEXT,
+        job_id TEXT,
+        job_index INTEGER,
+        total_electric_savings_kwh REAL,
+        total_gas_savings_therms REAL,
+        total_cost_savings REAL,
+        average_efficiency_improvement_percent REAL,
+        overall_performance_grade TEXT,
+        document BLOB NOT NULL
+    )""",
+    """CREATE INDEX IF NOT EXISTS calculations_building_created
+        ON efficiency_calculations (building_id, created_at DESC, id DESC)""",
+    "CREATE INDEX IF NOT EXISTS calculations_created ON efficiency_calculations (created_at DESC)",
+    """CREATE INDEX IF NOT EXISTS calculations_portfolio ON efficiency_calculations (
+        created_at, building_id, total_electric_savings_kwh, total_gas_savings_therms, total_cost_savings,
+        average_efficiency_improvement_percent, overall_performance_grade
+    )""",
+    """CREATE UNIQUE INDEX IF NOT EXISTS calculations_request_hash
+        ON efficiency_calculations (request_hash) WHERE request_hash IS NOT NULL""",
+    """CREATE UNIQUE INDEX IF NOT EXISTS calculations_idempotency_key
+        ON efficiency_calculations (idempotency_key) WHERE idempotency_key IS NOT NULL""",
+    """CREATE UNIQUE INDEX IF NOT EXISTS calculations_job_index
+        ON efficiency_calculations (job_id, job_index) WHERE job_id IS NOT NULL""",
+    # The request hash each Idempotency-Key was first used with
+    """CREATE TABLE IF NOT EXISTS idempotency_keys (
+        key TEXT PRIMARY KEY,
+        request_hash TEXT NOT NULL,
+        created_at INTEGER NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS building_summaries (
+        building_id TEXT PRIMARY KEY,
+        document BLOB NOT NULL
+    )""",
+    # One row per period of every calculation, like the MongoDB time-series layout
+    """CREATE TABLE IF NOT EXISTS period_metrics (
+        calculation_id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        building_id TEXT NOT NULL,
+        period TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        total_cost_savings REAL,
+        electric_savings_kwh REAL,
+        gas_savings_therms REAL,
+        overall_efficiency_improvement_percent REAL,
+        metrics BLOB NOT NULL,
+        PRIMARY KEY (calculation_id, position)
+    )""",
+    """CREATE INDEX IF NOT EXISTS period_metrics_building_period
+        ON period_metrics (building_id, period, created_at)""",
+    """CREATE INDEX IF NOT EXISTS period_metrics_building_created
+        ON period_metrics (building_id, created_at)""",
+    """CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        document BLOB NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS job_chunks (
+        id TEXT PRIMARY KEY,
+        job_id TEXT NOT NULL,
+        chunk_index INTEGER NOT NULL,
+        first_index INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL,
+        owner TEXT,
+        lease_expires_at INTEGER,
+        error TEXT,
+        stats BLOB,
+        completed_at INTEGER,
+        requests BLOB
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS job_chunks_job_index ON job_chunks (job_id, chunk_index)",
+    "CREATE INDEX IF NOT EXISTS job_chunks_status_lease ON job_chunks (status, lease_expires_at)",
+]
+
+CALCULATION_COLUMNS = (
+    "id, building_id, created_at, request_hash, idempotency_key, job_id, job_index, total_electric_savings_kwh, "
+    "total_gas_savings_therms, total_cost_savings, average_efficiency_improvement_percent, "
+    "overall_performance_grade, document"
+)
+PERIOD_COLUMNS = (
+    "calculation_id, position, building_id, period, created_at, total_cost_savings, electric_savings_kwh, "
+    "gas_savings_therms, overall_efficiency_improvement_percent, metrics"
+)
+CHUNK_COLUMNS = (
+    "id, job_id, chunk_index, first_index, size, status, attempts, owner, lease_expires_at, error, stats, "
+    "completed_at"
+)
+
+TOTALS_SELECT = (
+    "COUNT(*), SUM(total_electric_savings_kwh), SUM(total_gas_savings_therms), SUM(total_cost_savings), "
+    "AVG(average_efficiency_improvement_percent)"
+)
+
+# $dateTrunc equivalents on created_at (epoch milliseconds); weeks start on Sunday
+BUCKET_EXPRESSIONS = {
+    "week": "date(created_at / 1000, 'unixepoch', '-6 days', 'weekday 0')",
+    "month": "strftime('%Y-%m-01', created_at / 1000, 'unixepoch')",
+    "quarter": (
+        "printf('%s-%02d-01', strftime('%Y', created_at / 1000, 'unixepoch'), "
+        "(CAST(strftime('%m', created_at / 1000, 'unixepoch') AS INTEGER) - 1) / 3 * 3 + 1)"
+    ),
+    "year": "strftime('%Y-01-01', created_at / 1000, 'unixepoch')",
+}
+
+
+def to_milliseconds(value: datetime) -> int:
+    # BSON dates keep milliseconds, so stored and queried values agree exactly
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // timedelta(milliseconds=1)
+
+
+def from_milliseconds(value: int) -> datetime:
+    return EPOCH + timedelta(milliseconds=value)
+
+
+def _in_list(values: List[str]) -> str:
+    # One JSON parameter instead of one placeholder per value
+    return json.dumps(values)
+
+
+def _project(document: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # Top-level inclusion only; nested paths keep their whole parent field
+    if not projection:
+        return document
+    fields = {path.split(".")[0] for path, include in projection.items() if include}
+    if projection.get("_id", 1):
+        fields.add("_id")
+    return {field: value for field, value in document.items() if field in fields}
+
+
+def _calculation_row(document: Dict[str, Any], encoded: bytes) -> Tuple:
+    summary = document["summary"]
+    return (
+        str(document["_id"]),
+        document["building_id"],
+        to_milliseconds(document["created_at"]),
+        document.get("request_hash"),
+        document.get("idempotency_key"),
+        document.get("job_id"),
+        document.get("job_index"),
+        summary["total_electric_savings_kwh"],
+        summary["total_gas_savings_therms"],
+        summary["total_cost_savings"],
+        summary["average_efficiency_improvement_percent"],
+        summary["overall_performance_grade"],
+        encoded,
+    )
+
+
+def _period_rows(document: Dict[str, Any]) -> List[Tuple]:
+    created_at = to_milliseconds(document["created_at"])
+    return [
+        (
+            str(document["_id"]),
+            position,
+            document["building_id"],
+            metrics["period"],
+            created_at,
+            metrics["total_cost_savings"],
+            metrics["electric_savings_kwh"],
+            metrics["gas_savings_therms"],
+            metrics["overall_efficiency_improvement_percent"],
+            bson.encode({field: metrics[field] for field in PERIOD_METRIC_FIELDS}),
+        )
+        for position, metrics in enumerate(document["periods"])
+    ]
+
+
+def _chunk_from_row(row: Tuple, requests: Optional[bytes] = None) -> Dict[str, Any]:
+    (chunk_id, job_id, index, first_index, size, status, attempts, owner, lease_expires_at, error, stats,
+     completed_at) = row
+    chunk: Dict[str, Any] = {
+        "_id": ObjectId(chunk_id),
+        "job_id": job_id,
+        "index": index,
+        "first_index": first_index,
+        "size": size,
+        "status": status,
+        "attempts": attempts,
+    }
+    if owner is not None:
+        chunk["owner"] = owner
+    if lease_expires_at is not None:
+        chunk["lease_expires_at"] = from_milliseconds(lease_expires_at)
+    if error is not None:
+        chunk["error"] = error
+    if stats is not None:
+        chunk["stats"] = bson.decode(stats)
+    if completed_at is not None:
+        chunk["completed_at"] = from_milliseconds(completed_at)
+    if requests is not None:
+        chunk["requests"] = bson.decode(requests)["requests"]
+    return chunk
+
+
+def _now_ms() -> int:
+    return to_milliseconds(datetime.now(timezone.utc))
+
+
+class SQLiteDatabase:
+    # Embedded implementation of storage.Storage. Writes run one at a time on
+    # a dedicated thread inside BEGIN IMMEDIATE transactions; reads run on a
+    # small pool of reader threads. Several API workers can share one file.
+    def __init__(self, path: str = SQLITE_PATH, read_connections: int = SQLITE_READ_CONNECTIONS):
+        self.path = path
+        self.read_connections = read_connections
+        self.timeseries_collection_name = TIMESERIES_COLLECTION
+        self.state = "starting"
+        self.last_error = None
+        self.index_state = "pending"
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._readers: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def open(self):
+        if self._writer is not None:
+            return
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="sqlite-writer")
+        # An in-memory database exists only on its one connection
+        if self.path == ":memory:":
+            self._readers = self._writer
+        else:
+            self._readers = ThreadPoolExecutor(self.read_connections, thread_name_prefix="sqlite-reader")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # isolation_level=None: transactions are begun explicitly below
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            connection.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+            if self.path != ":memory:":
+                connection.execute("PRAGMA journal_mode = WAL")
+                connection.execute("PRAGMA synchronous = NORMAL")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _transaction(self, fn: Callable, args: Tuple, write: bool):
+        connection = self._connection()
+        # Reads also get a transaction so multi-statement reads see one snapshot
+        connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            result = fn(connection, *args)
+            connection.execute("COMMIT")
+            return result
+        except sqlite3.IntegrityError as e:
+            connection.execute("ROLLBACK")
+            if "UNIQUE" in str(e):
+                raise DuplicateKeyError(f"E11000 duplicate key error: {e}", 11000) from e
+            raise
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    async def _write(self, fn: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, self._transaction, fn, args, True)
+
+    async def _read(self, fn: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._transaction, fn, args, False)
+
+    async def prepare(self):
+        await self.ping()
+        self.state = "ready"
+        self.last_error = None
+        if self.index_state != "ready":
+            self.index_state = "building"
+            try:
+                await self.create_indexes()
+                self.index_state = "ready"
+            except Exception:
+                self.index_state = "failed"
+                raise
+
+    async def warm_up(self, retry_delay: float = 5):
+        self.open()
+        while True:
+            try:
+                await self.prepare()
+                return
+            except Exception as e:
+                self.state = "unavailable"
+                self.last_error = str(e)
+                await asyncio.sleep(retry_delay)
+
+    async def connect(self):
+        self.open()
+        await self.prepare()
+
+    def disconnect(self):
+        if self._writer is None:
+            return
+        self._writer.shutdown(wait=True)
+        if self._readers is not self._writer:
+            self._readers.shutdown(wait=True)
+        for connection in self._connections:
+            connection.close()
+        self._connections = []
+        self._local = threading.local()
+        self._writer = self._readers = None
+
+    @timed_operation
+    async def ping(self):
+        await self._read(lambda connection: connection.execute("SELECT 1").fetchone())
+
+    async def create_indexes(self):
+        def create(connection):
+            for statement in SCHEMA:
+                connection.execute(statement)
+        await self._write(create)
+
+    def _insert(self, connection, documents: List[Dict[str, Any]]) -> List[Tuple[Optional[str], Optional[str]]]:
+        rows = []
+        for document in documents:
+            if "_id" not in document:
+                document["_id"] = ObjectId()
+            rows.append(_calculation_row(document, bson.encode(document)))
+        insert = f"INSERT INTO efficiency_calculations ({CALCULATION_COLUMNS}) VALUES ({', '.join('?' * 13)})"
+        results: List[Tuple[Optional[str], Optional[str]]] = [(row[0], None) for row in rows]
+        # One executemany when nothing collides; row by row to find the duplicates otherwise
+        connection.execute("SAVEPOINT insert_calculations")
+        try:
+            connection.executemany(insert, rows)
+        except sqlite3.IntegrityError:
+            connection.execute("ROLLBACK TO insert_calculations")
+            for index, row in enumerate(rows):
+                try:
+                    connection.execute(insert, row)
+                except sqlite3.IntegrityError as e:
+                    results[index] = (None, f"E11000 duplicate key error: {e}")
+        connection.execute("RELEASE insert_calculations")
+
+        # Summaries compare dates with stored ones, which read back as naive
+        # UTC milliseconds, as with MongoDB
+        inserted = [
+            {**document, "created_at": from_milliseconds(row[2])}
+            for document, row, (inserted_id, _) in zip(documents, rows, results)
+            if inserted_id is not None
+        ]
+        connection.executemany(
+            f"INSERT INTO period_metrics ({PERIOD_COLUMNS}) VALUES ({', '.join('?' * 10)})",
+            [row for document in inserted for row in _period_rows(document)]
+        )
+        self._update_building_summaries(connection, inserted)
+        return results
+
+    def _update_building_summaries(self, connection, documents: List[Dict[str, Any]]):
+        building_ids = list({document["building_id"] for document in documents})
+        if not building_ids:
+            return
+        summaries = {
+            building_id: bson.decode(encoded)
+            for building_id, encoded in connection.execute(
+                "SELECT building_id, document FROM building_summaries WHERE building_id IN (SELECT value FROM json_each(?))",
+                (_in_list(building_ids),)
+            )
+        }
+        for document in documents:
+            building_id = document["building_id"]
+            summaries[building_id] = apply_building_summary_update(
+                summaries.get(building_id), str(document["_id"]), document
+            )
+        connection.executemany(
+            "INSERT OR REPLACE INTO building_summaries (building_id, document) VALUES (?, ?)",
+            [(building_id, bson.encode(summaries[building_id])) for building_id in building_ids]
+        )
+
+    @timed_operation
+    async def insert_calculation(self, calculation_data: Dict[str, Any]) -> str:
+        def insert(connection):
+            inserted_id, error = self._insert(connection, [calculation_data])[0]
+            if error:
+                raise DuplicateKeyError(error, 11000)
+            return inserted_id
+        return await self._write(insert)
+
+    @timed_operation
+    async def find_existing_calculation(
+        self,
+        request_hash: str,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        def find(connection):
+            # A reused key wins over the hash so the caller can detect a mismatch
+            if idempotency_key:
+                row = connection.execute(
+                    "SELECT document FROM efficiency_calculations WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+                if row:
+                    return bson.decode(row[0])
+            row = connection.execute(
+                "SELECT document FROM efficiency_calculations WHERE request_hash = ?", (request_hash,)
+            ).fetchone()
+            return bson.decode(row[0]) if row else None
+        return await self._read(find)
+
+    @timed_operation
+    async def bind_idempotency_key(self, idempotency_key: str, request_hash: str) -> str:
+        def bind(connection):
+            connection.execute(
+                "INSERT OR IGNORE INTO idempotency_keys (key, request_hash, created_at) VALUES (?, ?, ?)",
+                (idempotency_key, request_hash, _now_ms())
+            )
+            return connection.execute(
+                "SELECT request_hash FROM idempotency_keys WHERE key = ?", (idempotency_key,)
+            ).fetchone()[0]
+        return await self._write(bind)
+
+    @timed_operation
+    async def insert_calculations(self, calculations_data: List[Dict[str, Any]]) -> List[str]:
+        # All or nothing: a duplicate rolls back the whole batch
+        def insert(connection):
+            results = self._insert(connection, calculations_data)
+            errors = [error for _, error in results if error]
+            if errors:
+                raise DuplicateKeyError(errors[0], 11000)
+            return [inserted_id for inserted_id, _ in results]
+        return await self._write(insert)
+
+    @timed_operation
+    async def insert_calculations_unordered(
+        self,
+        calculations_data: List[Dict[str, Any]]
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        # Calculations, period rows and summaries commit together, so a
+        # duplicate left by an earlier job attempt already has all three
+        return await self._write(self._insert, calculations_data)
+
+    @timed_operation
+    async def find_period_metrics(
+        self,
+        building_id: str,
+        periods: Optional[List[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = DEFAULT_POINT_LIMIT
+    ) -> List[Dict[str, Any]]:
+        query = "SELECT created_at, calculation_id, period, metrics FROM period_metrics WHERE building_id = ?"
+        params: List[Any] = [building_id]
+        if periods:
+            query += " AND period IN (SELECT value FROM json_each(?))"
+            params.append(_in_list(periods))
+        if start:
+            query += " AND created_at >= ?"
+            params.append(to_milliseconds(start))
+        if end:
+            query += " AND created_at < ?"
+            params.append(to_milliseconds(end))
+        query += " ORDER BY created_at, calculation_id, position LIMIT ?"
+        params.append(limit)
+
+        def find(connection):
+            return [
+                {
+                    "timestamp": from_milliseconds(created_at),
+                    "building_id": building_id,
+                    "calculation_id": calculation_id,
+                    "period": period,
+                    **bson.decode(metrics),
+                }
+                for created_at, calculation_id, period, metrics in connection.execute(query, params)
+            ]
+        return await self._read(find)
+
+    async def migrate_to_timeseries(self, batch_size: int = 5000) -> int:
+        # period_metrics is always maintained here; this rebuilds it from history
+        def migrate(connection):
+            connection.execute("DELETE FROM period_metrics")
+            migrated = 0
+            cursor = connection.execute("SELECT document FROM efficiency_calculations ORDER BY created_at")
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    return migrated
+                rows = [row for (encoded,) in batch for row in _period_rows(bson.decode(encoded))]
+                connection.executemany(
+                    f"INSERT INTO period_metrics ({PERIOD_COLUMNS}) VALUES ({', '.join('?' * 10)})", rows
+                )
+                migrated += len(rows)
+        return await self._write(migrate)
+
+    @asynccontextmanager
+    async def read_session(self):
+        # Every read already starts from the latest committed WAL snapshot
+        yield
+
+    def _documents(self, connection, query: str, params=()) -> List[Dict[str, Any]]:
+        documents = []
+        for (encoded,) in connection.execute(query, params):
+            document = bson.decode(encoded)
+            document["_id"] = str(document["_id"])
+            documents.append(document)
+        return documents
+
+    @timed_operation
+    async def find_by_building_id(self, building_id: str) -> List[Dict[str, Any]]:
+        return await self._read(
+            self._documents,
+            "SELECT document FROM efficiency_calculations WHERE building_id = ? ORDER BY created_at DESC, id DESC",
+            (building_id,)
+        )
+
+    @timed_operation
+    async def find_page_by_building_id(
+        self,
+        building_id: str,
+        limit: int,
+        after: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        query = "SELECT document FROM efficiency_calculations WHERE building_id = ?"
+        params: List[Any] = [building_id]
+        if after:
+            created_at, document_id = decode_cursor(after)
+            created_ms = to_milliseconds(created_at)
+            query += " AND (created_at < ? OR (created_at = ? AND id < ?))"
+            params += [created_ms, created_ms, str(document_id)]
+        query += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        results = await self._read(self._documents, query, params)
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            last = results[-1]
+            next_cursor = encode_cursor(last["created_at"], last["_id"])
+        projection = build_projection(fields)
+        return [_project(document, projection) for document in results], next_cursor
+
+    @timed_operation
+    async def stream_calculations(
+        self,
+        building_ids: Optional[List[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 1000,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        # Keyset batches, so no cursor stays open between reads
+        conditions: List[str] = []
+        params: List[Any] = []
+        if building_ids:
+            conditions.append("building_id IN (SELECT value FROM json_each(?))")
+            params.append(_in_list(building_ids))
+        if start:
+            conditions.append("created_at >= ?")
+            params.append(to_milliseconds(start))
+        if end:
+            conditions.append("created_at < ?")
+            params.append(to_milliseconds(end))
+
+        last: Optional[Tuple[str, int, str]] = None
+        while True:
+            batch_conditions, batch_params = list(conditions), list(params)
+            if last is not None:
+                batch_conditions.append(
+                    "(building_id > ? OR (building_id = ? AND (created_at < ? OR (created_at = ? AND id < ?))))"
+                )
+                batch_params += [last[0], last[0], last[1], last[1], last[2]]
+            where = f"WHERE {' AND '.join(batch_conditions)}" if batch_conditions else ""
+            rows = await self._read(
+                lambda connection: connection.execute(
+                    f"SELECT building_id, created_at, id, document FROM efficiency_calculations {where} "
+                    "ORDER BY building_id, created_at DESC, id DESC LIMIT ?",
+                    batch_params + [batch_size]
+                ).fetchall()
+            )
+            for building_id, created_at, document_id, encoded in rows:
+                document = bson.decode(encoded)
+                document["_id"] = document_id
+                yield _project(document, projection)
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][:3]
+
+    async def watch_calculations(self, poll_interval: float = EVENTS_POLL_SECONDS) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        # rowids grow in commit order, since every writer holds the file's
+        # write lock while it inserts; one cheap range read per poll
+        last = await self._read(
+            lambda connection: connection.execute("SELECT COALESCE(MAX(rowid), 0) FROM efficiency_calculations").fetchone()[0]
+        )
+        yield None
+        while True:
+            rows = await self._read(
+                lambda connection: connection.execute(
+                    "SELECT rowid, id, document FROM efficiency_calculations WHERE rowid > ? ORDER BY rowid LIMIT 1000",
+                    (last,)
+                ).fetchall()
+            )
+            for rowid, document_id, encoded in rows:
+                document = bson.decode(encoded)
+                document["_id"] = document_id
+                yield document
+            if rows:
+                last = rows[-1][0]
+            if len(rows) < 1000:
+                await asyncio.sleep(poll_interval)
+
+    async def find_by_building_and_period(
+        self,
+        building_id: str,
+        period: str
+    ) -> List[Dict[str, Any]]:
+        return await self.find_by_building_and_periods(building_id, [period])
+
+    @timed_operation
+    async def find_by_building_and_periods(
+        self,
+        building_id: str,
+        periods: List[str]
+    ) -> List[Dict[str, Any]]:
+        documents = await self._read(
+            self._documents,
+            "SELECT document FROM efficiency_calculations WHERE building_id = ? AND id IN ("
+            "SELECT calculation_id FROM period_metrics WHERE building_id = ? "
+            "AND period IN (SELECT value FROM json_each(?))"
+            ") ORDER BY created_at DESC, id DESC",
+            (building_id, building_id, _in_list(periods))
+        )
+        return [
+            {
+                "_id": document["_id"],
+                "building_id": document["building_id"],
+                "measure_name": document["measure_name"],
+                "calculation_timestamp": document["calculation_timestamp"],
+                "summary": document["summary"],
+                "created_at": document["created_at"],
+                "periods": [period for period in document["periods"] if period["period"] in periods],
+            }
+            for document in documents
+        ]
+
+    @timed_operation
+    async def find_building_summaries(
+        self,
+        building_ids: Optional[List[str]] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        query = "SELECT document FROM building_summaries"
+        params: List[Any] = []
+        if building_ids:
+            query += " WHERE building_id IN (SELECT value FROM json_each(?))"
+            params.append(_in_list(building_ids))
+        query += " ORDER BY building_id LIMIT ?"
+        params.append(limit)
+
+        def find(connection):
+            return [bson.decode(encoded) for (encoded,) in connection.execute(query, params)]
+        return await self._read(find)
+
+    @timed_operation
+    async def rebuild_building_summaries(self, batch_size: int = 500) -> int:
+        # Calculations arrive grouped by building, so only one building's
+        # summary is held in memory at a time; one transaction, so readers
+        # never see the table half rebuilt. Oldest first within a building,
+        # as on insert, so ties on created_at pick the same latest. The order
+        # is the calculations_building_created index read backwards.
+        def rebuild(connection):
+            connection.execute("DELETE FROM building_summaries")
+            pending: List[Tuple[str, bytes]] = []
+            rebuilt = 0
+            current: Optional[Dict[str, Any]] = None
+
+            def finish(summary: Dict[str, Any]):
+                nonlocal pending, rebuilt
+                pending.append((summary["building_id"], bson.encode(summary)))
+                rebuilt += 1
+                if len(pending) >= batch_size:
+                    connection.executemany(
+                        "INSERT INTO building_summaries (building_id, document) VALUES (?, ?)", pending
+                    )
+                    pending = []
+
+            cursor = connection.execute(
+                "SELECT document FROM efficiency_calculations ORDER BY building_id DESC, created_at, id"
+            )
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                for (encoded,) in batch:
+                    document = bson.decode(encoded)
+                    if current is not None and current["building_id"] != document["building_id"]:
+                        finish(current)
+                        current = None
+                    current = apply_building_summary_update(current, str(document["_id"]), document)
+            if current is not None:
+                finish(current)
+            connection.executemany("INSERT INTO building_summaries (building_id, document) VALUES (?, ?)", pending)
+            return rebuilt
+        return await self._write(rebuild)
+
+    @timed_operation
+    async def get_portfolio(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        top_n: int = 10,
+        bucket: Optional[str] = None
+    ) -> Dict[str, Any]:
+        conditions, params = [], []
+        if start:
+            conditions.append("created_at >= ?")
+            params.append(to_milliseconds(start))
+        if end:
+            conditions.append("created_at < ?")
+            params.append(to_milliseconds(end))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        def totals(row) -> Dict[str, Any]:
+            count, electric, gas, cost, improvement = row
+            return {
+                "calculation_count": count,
+                "total_electric_savings_kwh": electric,
+                "total_gas_savings_therms": gas,
+                "total_cost_savings": cost,
+                "average_efficiency_improvement_percent": improvement,
+            }
+
+        def grouped(connection, key: str, order: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+            query = (
+                f"SELECT {key} AS group_key, {TOTALS_SELECT} FROM efficiency_calculations {where} "
+                f"GROUP BY group_key ORDER BY {order}"
+            )
+            group_params = list(params)
+            if limit is not None:
+                query += " LIMIT ?"
+                group_params.append(limit)
+            return [{"_id": row[0], **totals(row[1:])} for row in connection.execute(query, group_params)]
+
+        # Same facets as portfolio_pipeline, then the shared formatter
+        def aggregate(connection):
+            overall = connection.execute(f"SELECT {TOTALS_SELECT} FROM efficiency_calculations {where}", params).fetchone()
+            result: Dict[str, Any] = {
+                "totals": [totals(overall)] if overall[0] else [],
+                "grade_distribution": [
+                    {"_id": grade, "count": count}
+                    for grade, count in connection.execute(
+                        f"SELECT overall_performance_grade, COUNT(*) FROM efficiency_calculations {where} "
+                        "GROUP BY overall_performance_grade ORDER BY overall_performance_grade",
+                        params
+                    )
+                ],
+                "building_count": [],
+                "top_buildings": grouped(connection, "building_id", "SUM(total_cost_savings) DESC, group_key", top_n),
+                "bottom_buildings": grouped(connection, "building_id", "SUM(total_cost_savings), group_key", top_n),
+            }
+            building_count = connection.execute(
+                f"SELECT COUNT(DISTINCT building_id) FROM efficiency_calculations {where}", params
+            ).fetchone()[0]
+            if building_count:
+                result["building_count"] = [{"count": building_count}]
+            if bucket:
+                result["buckets"] = [
+                    {**group, "_id": datetime.strptime(group["_id"], "%Y-%m-%d")}
+                    for group in grouped(connection, BUCKET_EXPRESSIONS[bucket], "group_key")
+                ]
+            return result
+        return format_portfolio(await self._read(aggregate))
+
+    @timed_operation
+    async def get_collection_version(self) -> Optional[str]:
+        def latest(connection):
+            return connection.execute(
+                "SELECT id, created_at FROM efficiency_calculations ORDER BY created_at DESC, id DESC LIMIT 1"
+            ).fetchone()
+        row = await self._read(latest)
+        if row is None:
+            return None
+        return f"{row[0]}:{from_milliseconds(row[1]).isoformat()}"
+
+    @timed_operation
+    async def get_building_version(self, building_id: str) -> Optional[str]:
+        def latest(connection):
+            return connection.execute(
+                "SELECT id, created_at FROM efficiency_calculations WHERE building_id = ? "
+                "ORDER BY created_at DESC, id DESC LIMIT 1",
+                (building_id,)
+            ).fetchone()
+        row = await self._read(latest)
+        if row is None:
+            return None
+        return f"{row[0]}:{from_milliseconds(row[1]).isoformat()}"
+
+    @timed_operation
+    async def find_calculation_time_bounds(self, building_id: str) -> Optional[Tuple[datetime, datetime]]:
+        def bounds(connection):
+            return connection.execute(
+                "SELECT MIN(created_at), MAX(created_at) FROM efficiency_calculations WHERE building_id = ?",
+                (building_id,)
+            ).fetchone()
+        first, last = await self._read(bounds)
+        if first is None:
+            return None
+        return from_milliseconds(first), from_milliseconds(last)
+
+    @timed_operation
+    async def get_trend(
+        self,
+        building_id: str,
+        start: datetime,
+        end: datetime,
+        points: int,
+        period: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        bucket_ms = trend_bucket_ms(start, end, points)
+        start_ms = to_milliseconds(start)
+        if period is None:
+            source = "efficiency_calculations"
+            columns = (
+                "total_cost_savings, total_electric_savings_kwh, total_gas_savings_therms, "
+                "average_efficiency_improvement_percent"
+            )
+            match = "building_id = ?"
+            params: List[Any] = [start_ms, bucket_ms, building_id]
+        else:
+            source = "period_metrics"
+            columns = "total_cost_savings, electric_savings_kwh, gas_savings_therms, overall_efficiency_improvement_percent"
+            match = "building_id = ? AND period = ?"
+            params = [start_ms, bucket_ms, building_id, period]
+        averages = ", ".join(f"AVG({column})" for column in columns.split(", "))
+        query = (
+            f"SELECT (created_at - ?) / ? AS bucket, COUNT(*), {averages} FROM {source} "
+            f"WHERE {match} AND created_at >= ? AND created_at < ? GROUP BY bucket ORDER BY bucket"
+        )
+        params += [start_ms, to_milliseconds(end)]
+
+        def aggregate(connection):
+            return [
+                {
+                    "_id": row[0],
+                    "calculation_count": row[1],
+                    "cost_savings": row[2],
+                    "electric_savings_kwh": row[3],
+                    "gas_savings_therms": row[4],
+                    "efficiency_improvement_percent": row[5],
+                }
+                for row in connection.execute(query, params)
+            ]
+        return format_trend_points(await self._read(aggregate), start, bucket_ms), bucket_ms
+
+    @timed_operation
+    async def get_building_summary(self, building_id: str) -> Optional[Dict[str, Any]]:
+        documents = await self._read(
+            self._documents,
+            "SELECT document FROM efficiency_calculations WHERE building_id = ? "
+            "ORDER BY created_at DESC, id DESC LIMIT 1",
+            (building_id,)
+        )
+        return documents[0] if documents else None
+
+    def _get_job(self, connection, job_id: str) -> Optional[Dict[str, Any]]:
+        row = connection.execute("SELECT document FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bson.decode(row[0]) if row else None
+
+    def _update_job(self, connection, job_id: str, fields: Dict[str, Any], status: Optional[str] = None):
+        # Only applies while the job is still in `status`, like a filtered update_one
+        job = self._get_job(connection, job_id)
+        if job is None or (status is not None and job["status"] != status):
+            return
+        job.update(fields)
+        connection.execute("UPDATE jobs SET document = ? WHERE id = ?", (bson.encode(job), job_id))
+
+    @timed_operation
+    async def create_job(self) -> str:
+        job_id = ObjectId()
+        job = {"_id": job_id, "status": JOB_RECEIVING, "created_at": datetime.now(timezone.utc)}
+        await self._write(
+            lambda connection: connection.execute(
+                "INSERT INTO jobs (id, document) VALUES (?, ?)", (str(job_id), bson.encode(job))
+            )
+        )
+        return str(job_id)
+
+    @timed_operation
+    async def insert_job_chunk(self, chunk: Dict[str, Any]) -> None:
+        if "_id" not in chunk:
+            chunk["_id"] = ObjectId()
+        await self._write(
+            lambda connection: connection.execute(
+                "INSERT INTO job_chunks (id, job_id, chunk_index, first_index, size, status, attempts, requests) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(chunk["_id"]), chunk["job_id"], chunk["index"], chunk["first_index"], chunk["size"],
+                    chunk["status"], chunk["attempts"], bson.encode({"requests": chunk["requests"]}),
+                )
+            )
+        )
+
+    @timed_operation
+    async def queue_job(self, job_id: str, fields: Dict[str, Any]) -> None:
+        # Staged chunks become claimable only once the whole upload is stored
+        def queue(connection):
+            self._update_job(
+                connection, job_id, {**fields, "status": JOB_QUEUED, "queued_at": datetime.now(timezone.utc)}
+            )
+            connection.execute(
+                "UPDATE job_chunks SET status = ? WHERE job_id = ? AND status = ?",
+                (CHUNK_PENDING, job_id, CHUNK_STAGED)
+            )
+            self._finish_job_if_done(connection, job_id)
+        await self._write(queue)
+
+    @timed_operation
+    async def abort_job(self, job_id: str, error: str) -> None:
+        def abort(connection):
+            self._update_job(
+                connection, job_id,
+                {"status": JOB_FAILED, "error": error, "completed_at": datetime.now(timezone.utc)}
+            )
+            connection.execute("DELETE FROM job_chunks WHERE job_id = ? AND status = ?", (job_id, CHUNK_STAGED))
+        await self._write(abort)
+
+    @timed_operation
+    async def claim_job_chunk(self, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        # Pending chunks first, then running chunks whose owner stopped renewing
+        def claim(connection):
+            now = _now_ms()
+            row = connection.execute(
+                "SELECT id FROM job_chunks WHERE status = ? OR (status = ? AND lease_expires_at < ?) "
+                "ORDER BY id LIMIT 1",
+                (CHUNK_PENDING, CHUNK_RUNNING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE job_chunks SET status = ?, owner = ?, lease_expires_at = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (CHUNK_RUNNING, owner, now + int(lease_seconds * 1000), row[0])
+            )
+            chunk = connection.execute(
+                f"SELECT {CHUNK_COLUMNS}, requests FROM job_chunks WHERE id = ?", (row[0],)
+            ).fetchone()
+            return _chunk_from_row(chunk[:-1], chunk[-1])
+        return await self._write(claim)
+
+    @timed_operation
+    async def complete_job_chunk(self, chunk_id: ObjectId, owner: str, stats: Dict[str, Any]) -> bool:
+        # False when the lease was lost to another worker, which then owns the chunk
+        def complete(connection):
+            cursor = connection.execute(
+                "UPDATE job_chunks SET status = ?, stats = ?, completed_at = ?, requests = NULL, "
+                "lease_expires_at = NULL WHERE id = ? AND owner = ? AND status = ?",
+                (CHUNK_COMPLETED, bson.encode(stats), _now_ms(), str(chunk_id), owner, CHUNK_RUNNING)
+            )
+            return cursor.rowcount == 1
+        return await self._write(complete)
+
+    @timed_operation
+    async def renew_job_chunk(self, chunk_id: ObjectId, owner: str, lease_seconds: float) -> bool:
+        # False when the lease was already lost to another worker
+        def renew(connection):
+            cursor = connection.execute(
+                "UPDATE job_chunks SET lease_expires_at = ? WHERE id = ? AND owner = ? AND status = ?",
+                (_now_ms() + int(lease_seconds * 1000), str(chunk_id), owner, CHUNK_RUNNING)
+            )
+            return cursor.rowcount == 1
+        return await self._write(renew)
+
+    @timed_operation
+    async def release_job_chunk(self, chunk_id: ObjectId, owner: str, error: str, failed: bool) -> None:
+        await self._write(
+            lambda connection: connection.execute(
+                "UPDATE job_chunks SET status = ?, error = ?, lease_expires_at = NULL "
+                "WHERE id = ? AND owner = ? AND status = ?",
+                (CHUNK_FAILED if failed else CHUNK_PENDING, error, str(chunk_id), owner, CHUNK_RUNNING)
+            )
+        )
+
+    def _finish_job_if_done(self, connection, job_id: str):
+        open_states = _in_list(OPEN_CHUNK_STATES)
+        if connection.execute(
+            "SELECT 1 FROM job_chunks WHERE job_id = ? AND status IN (SELECT value FROM json_each(?)) LIMIT 1",
+            (job_id, open_states)
+        ).fetchone():
+            return
+        failed = connection.execute(
+            "SELECT 1 FROM job_chunks WHERE job_id = ? AND status = ? LIMIT 1", (job_id, CHUNK_FAILED)
+        ).fetchone()
+        self._update_job(
+            connection, job_id,
+            {"status": JOB_FAILED if failed else JOB_COMPLETED, "completed_at": datetime.now(timezone.utc)},
+            status=JOB_QUEUED
+        )
+
+    @timed_operation
+    async def finish_job_if_done(self, job_id: str) -> None:
+        await self._write(self._finish_job_if_done, job_id)
+
+    @timed_operation
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        def find(connection):
+            job = self._get_job(connection, job_id)
+            if job is None:
+                return None
+            chunks = [
+                _chunk_from_row(row)
+                for row in connection.execute(
+                    f"SELECT {CHUNK_COLUMNS} FROM job_chunks WHERE job_id = ? ORDER BY chunk_index", (job_id,)
+                )
+            ]
+            return format_job(job, chunks)
+        return await self._read(find)
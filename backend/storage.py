@@ -0,0 +1,99 @@
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, List, Optional, Protocol, Tuple, runtime_checkable
+from datetime import datetime
+from bson import ObjectId
+
+from timeseries import DEFAULT_POINT_LIMIT
+
+
+@runtime_checkable
+class Storage(Protocol):
+    # Everything the API, job runner and manage.py use from `database.db`.
+    # database.Database (MongoDB) and sqlite_database.SQLiteDatabase implement
+    # it; STORAGE_BACKEND picks one. Reads return documents shaped as MongoDB
+    # returns them: naive UTC datetimes with millisecond precision.
+    state: str
+    last_error: Optional[str]
+    index_state: str
+    timeseries_collection_name: str
+
+    # Lifecycle
+    def open(self) -> None: ...
+    async def prepare(self) -> None: ...
+    async def warm_up(self, retry_delay: float = ...) -> None: ...
+    async def connect(self) -> None: ...
+    def disconnect(self) -> None: ...
+    async def ping(self) -> None: ...
+    async def create_indexes(self) -> None: ...
+    async def migrate_to_timeseries(self, batch_size: int = ...) -> int: ...
+    async def rebuild_building_summaries(self, batch_size: int = ...) -> int: ...
+
+    # Writes; documents get an ObjectId "_id" assigned in place, as with insert_one
+    async def insert_calculation(self, calculation_data: Dict[str, Any]) -> str: ...
+    async def insert_calculations(self, calculations_data: List[Dict[str, Any]]) -> List[str]: ...
+    async def insert_calculations_unordered(
+        self, calculations_data: List[Dict[str, Any]]
+    ) -> List[Tuple[Optional[str], Optional[str]]]: ...
+    # Binds an Idempotency-Key to the first request hash it is used with and
+    # returns the hash it is bound to
+    async def bind_idempotency_key(self, idempotency_key: str, request_hash: str) -> str: ...
+
+    # Reads; those inside one read_session() never see older data than an
+    # earlier read of the same session
+    def read_session(self) -> AsyncContextManager[None]: ...
+    async def find_existing_calculation(
+        self, request_hash: str, idempotency_key: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]: ...
+    async def find_by_building_id(self, building_id: str) -> List[Dict[str, Any]]: ...
+    async def find_page_by_building_id(
+        self, building_id: str, limit: int, after: Optional[str] = None, fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]: ...
+    def stream_calculations(
+        self,
+        building_ids: Optional[List[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 1000,
+        projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]: ...
+    # Change feed: yields None once positioned, then every calculation any
+    # process commits after that point
+    def watch_calculations(self, poll_interval: float = ...) -> AsyncIterator[Optional[Dict[str, Any]]]: ...
+    async def find_by_building_and_period(self, building_id: str, period: str) -> List[Dict[str, Any]]: ...
+    async def find_by_building_and_periods(self, building_id: str, periods: List[str]) -> List[Dict[str, Any]]: ...
+    async def find_period_metrics(
+        self,
+        building_id: str,
+        periods: Optional[List[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = DEFAULT_POINT_LIMIT
+    ) -> List[Dict[str, Any]]: ...
+    async def find_building_summaries(
+        self, building_ids: Optional[List[str]] = None, limit: int = 100
+    ) -> List[Dict[str, Any]]: ...
+    async def get_building_summary(self, building_id: str) -> Optional[Dict[str, Any]]: ...
+    async def get_portfolio(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        top_n: int = 10,
+        bucket: Optional[str] = None
+    ) -> Dict[str, Any]: ...
+    async def get_trend(
+        self, building_id: str, start: datetime, end: datetime, points: int, period: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int]: ...
+    async def get_collection_version(self) -> Optional[str]: ...
+    async def get_building_version(self, building_id: str) -> Optional[str]: ...
+    async def find_calculation_time_bounds(self, building_id: str) -> Optional[Tuple[datetime, datetime]]: ...
+
+    # Calculation jobs
+    async def create_job(self) -> str: ...
+    async def insert_job_chunk(self, chunk: Dict[str, Any]) -> None: ...
+    async def queue_job(self, job_id: str, fields: Dict[str, Any]) -> None: ...
+    async def abort_job(self, job_id: str, error: str) -> None: ...
+    async def claim_job_chunk(self, owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]: ...
+    async def complete_job_chunk(self, chunk_id: ObjectId, owner: str, stats: Dict[str, Any]) -> bool: ...
+    async def renew_job_chunk(self, chunk_id: ObjectId, owner: str, lease_seconds: float) -> bool: ...
+    async def release_job_chunk(self, chunk_id: ObjectId, owner: str, error: str, failed: bool) -> None: ...
+    async def finish_job_if_done(self, job_id: str) -> None: ...
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]: ...
@@ -0,0 +1,120 @@
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
+
+SUMMARY_TOTAL_FIELDS = [
+    "total_electric_savings_kwh",
+    "total_gas_savings_therms",
+    "total_cost_savings",
+]
+
+
+def _missing(field: str) -> Dict[str, Any]:
+    return {"$eq": [{"$type": f"${field}"}, "missing"]}
+
+
+def _period_highlight(calculation_id: str, calculation: Dict[str, Any], period: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "calculation_id": calculation_id,
+        "period": period["period"],
+        "overall_efficiency_improvement_percent": period["overall_efficiency_improvement_percent"],
+        "created_at": calculation["created_at"],
+    }
+
+
+def _best_and_worst_periods(calculation: Dict[str, Any]):
+    periods = calculation.get("periods") or []
+    if not periods:
+        return None, None
+    best = max(periods, key=lambda p: p["overall_efficiency_improvement_percent"])
+    worst = min(periods, key=lambda p: p["overall_efficiency_improvement_percent"])
+    return best, worst
+
+
+def building_summary_update(calculation_id: str, calculation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Update pipeline applied with upsert=True on building_summaries. Values
+    # coming from the calculation are wrapped in $literal so that user text
+    # (e.g. a measure name starting with "$") is never read as a field path.
+    summary = calculation["summary"]
+    created_at = calculation["created_at"]
+    latest = {
+        "calculation_id": calculation_id,
+        "measure_name": calculation["measure_name"],
+        "created_at": created_at,
+        "summary": summary,
+    }
+    best, worst = _best_and_worst_periods(calculation)
+
+    new_fields: Dict[str, Any] = {
+        "building_id": {"$literal": calculation["building_id"]},
+        "calculation_count": {"$add": [{"$ifNull": ["$calculation_count", 0]}, 1]},
+        "latest": {
+            "$cond": [
+                {"$or": [_missing("latest"), {"$gte": [{"$literal": created_at}, "$latest.created_at"]}]},
+                {"$literal": latest},
+                "$latest"
+            ]
+        },
+        "updated_at": "$$NOW",
+    }
+    for field in SUMMARY_TOTAL_FIELDS:
+        new_fields[field] = {"$add": [{"$ifNull": [f"${field}", 0]}, {"$literal": summary[field]}]}
+
+    if best is not None:
+        best_value = best["overall_efficiency_improvement_percent"]
+        worst_value = worst["overall_efficiency_improvement_percent"]
+        new_fields["best_period"] = {
+            "$cond": [
+                {"$or": [
+                    _missing("best_period"),
+                    {"$gt": [{"$literal": best_value}, "$best_period.overall_efficiency_improvement_percent"]}
+                ]},
+                {"$literal": _period_highlight(calculation_id, calculation, best)},
+                "$best_period"
+            ]
+        }
+        new_fields["worst_period"] = {
+            "$cond": [
+                {"$or": [
+                    _missing("worst_period"),
+                    {"$lt": [{"$literal": worst_value}, "$worst_period.overall_efficiency_improvement_percent"]}
+                ]},
+                {"$literal": _period_highlight(calculation_id, calculation, worst)},
+                "$worst_period"
+            ]
+        }
+
+    return [{"$set": new_fields}]
+
+
+def apply_building_summary_update(
+    existing: Optional[Dict[str, Any]],
+    calculation_id: str,
+    calculation: Dict[str, Any]
+) -> Dict[str, Any]:
+    # Pure-Python equivalent of building_summary_update, used for rebuilds
+    # that accumulate in memory before writing.
+    summary = calculation["summary"]
+    result = dict(existing) if existing else {"building_id": calculation["building_id"], "calculation_count": 0}
+    result["calculation_count"] += 1
+    for field in SUMMARY_TOTAL_FIELDS:
+        result[field] = result.get(field, 0) + summary[field]
+
+    latest = result.get("latest")
+    if latest is None or calculation["created_at"] >= latest["created_at"]:
+        result["latest"] = {
+            "calculation_id": calculation_id,
+            "measure_name": calculation["measure_name"],
+            "created_at": calculation["created_at"],
+            "summary": summary,
+        }
+
+    best, worst = _best_and_worst_periods(calculation)
+    if best is not None:
+        current_best = result.get("best_period")
+        if current_best is None or best["overall_efficiency_improvement_percent"] > current_best["overall_efficiency_improvement_percent"]:
+            result["best_period"] = _period_highlight(calculation_id, calculation, best)
+        current_worst = result.get("worst_period")
+        if current_worst is None or worst["overall_efficiency_improvement_percent"] < current_worst["overall_efficiency_improvement_percent"]:
+            result["worst_period"] = _period_highlight(calculation_id, calculation, worst)
+    result["updated_at"] = datetime.now(timezone.utc)
+    return result
@@ -0,0 +1,63 @@
+import copy
+from bson import ObjectId
+from calculations import process_efficiency_calculation_batch
+
+SAMPLE_BUILDING_ID = "60f7b3b3e4b0f3d4c8b4567a"
+
+SAMPLE_REQUEST = {
+    "building_id": SAMPLE_BUILDING_ID,
+    "measure_name": "Load Test Measure",
+    "periods": [
+        {
+            "period": "business_hours",
+            "time_range": "08:00-18:00",
+            "days": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+            "current_electric_kwh": 45000,
+            "current_gas_therms": 3200,
+            "baseline_electric_kwh": 52000,
+            "baseline_gas_therms": 4100,
+            "electric_rate": 0.12,
+            "gas_rate": 0.95
+        },
+        {
+            "period": "after_hours",
+            "time_range": "18:00-08:00",
+            "days": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+            "current_electric_kwh": 28000,
+            "current_gas_therms": 2200,
+            "baseline_electric_kwh": 35000,
+            "baseline_gas_therms": 2800,
+            "electric_rate": 0.12,
+            "gas_rate": 0.95
+        }
+    ]
+}
+
+WEEKEND_PERIOD = {
+    "period": "weekend",
+    "time_range": "00:00-24:00",
+    "days": ["Saturday", "Sunday"],
+    "current_electric_kwh": 12000,
+    "current_gas_therms": 900,
+    "baseline_electric_kwh": 15000,
+    "baseline_gas_therms": 1100,
+    "electric_rate": 0.12,
+    "gas_rate": 0.95
+}
+
+
+def build_page(size: int):
+    # A history page: calculations with all three periods and string ids
+    requests_data = []
+    for index in range(size):
+        request_data = copy.deepcopy(SAMPLE_REQUEST)
+        request_data["building_id"] = f"{index:024x}"
+        request_data["periods"].append(dict(WEEKEND_PERIOD))
+        for period in request_data["periods"]:
+            period["current_electric_kwh"] += index * 37.5
+            period["current_gas_therms"] += index * 3.25
+        requests_data.append(request_data)
+    calculations = process_efficiency_calculation_batch(requests_data)
+    for calculation in calculations:
+        calculation["_id"] = str(ObjectId())
+    return calculations
@@ -0,0 +1,242 @@
+import asyncio
+import sqlite3
+import httpx
+import pytest
+from starlette.responses import PlainTextResponse
+from admission import (
+    AdmissionMiddleware, ConcurrencyLimiter, MemoryTokenBuckets, SQLiteTokenBuckets, READ_LANE, WRITE_LANE,
+    request_lane
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_app(release: asyncio.Event = None):
+    async def app(scope, receive, send):
+        if release is not None:
+            await release.wait()
+        await PlainTextResponse("ok")(scope, receive, send)
+    return app
+
+
+def client_for(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+class TestTokenBuckets:
+    def test_burst_then_retry_after_refill(self):
+        clock = FakeClock()
+        buckets = MemoryTokenBuckets(rate=2, burst=3, clock=clock)
+        
+        admitted = [buckets.take("a") for _ in range(3)]
+        
+        assert admitted == [0.0, 0.0, 0.0]
+        assert buckets.take("a") == pytest.approx(0.5)
+        clock.now += 0.5
+        assert buckets.take("a") == 0.0
+
+    def test_clients_have_separate_buckets(self):
+        buckets = MemoryTokenBuckets(rate=1, burst=1, clock=FakeClock())
+        
+        assert buckets.take("a") == 0.0
+        
+        assert buckets.take("a") > 0
+        assert buckets.take("b") == 0.0
+
+    def test_client_table_is_bounded(self):
+        buckets = MemoryTokenBuckets(rate=1, burst=1, max_clients=10, clock=FakeClock())
+        
+        for i in range(100):
+            buckets.take(f"client-{i}")
+        
+        assert len(buckets._buckets) == 10
+
+    def test_sqlite_store_is_shared_between_workers(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / "buckets.db")
+        first = SQLiteTokenBuckets(path, rate=1, burst=2, clock=clock)
+        second = SQLiteTokenBuckets(path, rate=1, burst=2, clock=clock)
+        
+        assert first.take("a") == 0.0
+        assert second.take("a") == 0.0
+        
+        assert first.take("a") == pytest.approx(1.0)
+        clock.now += 1
+        assert second.take("a") == 0.0
+        first.close()
+        second.close()
+
+    def test_sqlite_store_deletes_refilled_buckets(self, tmp_path):
+        clock = FakeClock()
+        buckets = SQLiteTokenBuckets(str(tmp_path / "buckets.db"), rate=1, burst=2, clock=clock)
+        for i in range(50):
+            buckets.take(f"client-{i}")
+        
+        clock.now += 3
+        buckets.take("a")
+        buckets.take("a")
+        
+        keys = [row[0] for row in buckets.connection.execute("SELECT key FROM token_buckets")]
+        assert keys == ["a"]
+        assert buckets.take("a") == pytest.approx(1.0)
+        buckets.close()
+
+    def test_sqlite_store_waits_for_locks_off_the_event_loop(self, tmp_path):
+        path = str(tmp_path / "buckets.db")
+        buckets = SQLiteTokenBuckets(path, rate=1, burst=2)
+        # Another worker holds the write lock for longer than the busy timeout
+        holder = sqlite3.connect(path, isolation_level=None)
+        holder.execute("BEGIN IMMEDIATE")
+        
+        async def run():
+            ticks = 0
+            take = asyncio.create_task(buckets.take_async("a"))
+            while not take.done():
+                ticks += 1
+                await asyncio.sleep(0.01)
+            return ticks, take.exception()
+        
+        ticks, error = asyncio.run(run())
+        holder.execute("ROLLBACK")
+        holder.close()
+        buckets.close()
+        
+        assert isinstance(error, sqlite3.OperationalError)
+        assert ticks > 10
+
+
+class TestConcurrencyLimiter:
+    def test_scenario_queries_use_the_read_lane(self):
+        assert request_lane("POST", "/api/efficiency/scenarios") == READ_LANE
+        assert request_lane("POST", "/api/efficiency/scenarios/stream") == READ_LANE
+        assert request_lane("POST", "/api/efficiency/calculate") == WRITE_LANE
+        assert request_lane("GET", "/api/efficiency/portfolio") == READ_LANE
+
+    def test_writes_leave_headroom_for_reads(self):
+        async def run():
+            limiter = ConcurrencyLimiter(max_concurrency=4, write_share=0.5, queue_timeout=0.01)
+            writes = [await limiter.acquire(WRITE_LANE) for _ in range(3)]
+            reads = [await limiter.acquire(READ_LANE) for _ in range(2)]
+            return writes, reads
+        
+        writes, reads = asyncio.run(run())
+        
+        assert writes == [None, None, "queue_timeout"]
+        assert reads == [None, None]
+
+    def test_freed_slot_goes_to_queued_read_first(self):
+        async def run():
+            limiter = ConcurrencyLimiter(max_concurrency=1, queue_timeout=5)
+            await limiter.acquire(READ_LANE)
+            order = []
+            
+            async def waiter(lane):
+                await limiter.acquire(lane)
+                order.append(lane)
+                limiter.release(lane)
+            
+            write = asyncio.create_task(waiter(WRITE_LANE))
+            await asyncio.sleep(0)
+            read = asyncio.create_task(waiter(READ_LANE))
+            await asyncio.sleep(0)
+            limiter.release(READ_LANE)
+            await asyncio.gather(write, read)
+            return order, limiter.in_flight
+        
+        order, in_flight = asyncio.run(run())
+        
+        assert order == [READ_LANE, WRITE_LANE]
+        assert in_flight == 0
+
+    def test_full_queue_rejects_immediately(self):
+        async def run():
+            limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1, queue_timeout=5)
+            await limiter.acquire(READ_LANE)
+            queued = asyncio.create_task(limiter.acquire(READ_LANE))
+            await asyncio.sleep(0)
+            rejected = await limiter.acquire(READ_LANE)
+            limiter.release(READ_LANE)
+            return rejected, await queued
+        
+        assert asyncio.run(run()) == ("queue_full", None)
+
+    def test_cancelled_waiter_leaves_no_slot_behind(self):
+        async def run():
+            limiter = ConcurrencyLimiter(max_concurrency=1, queue_timeout=5)
+            await limiter.acquire(READ_LANE)
+            queued = asyncio.create_task(limiter.acquire(WRITE_LANE))
+            await asyncio.sleep(0)
+            queued.cancel()
+            await asyncio.gather(queued, return_exceptions=True)
+            limiter.release(READ_LANE)
+            return limiter.in_flight, limiter.queued()
+        
+        assert asyncio.run(run()) == (0, 0)
+
+
+class TestAdmissionMiddleware:
+    def test_rate_limited_client_gets_429_with_retry_after(self):
+        app = AdmissionMiddleware(make_app(), buckets=MemoryTokenBuckets(rate=0.5, burst=2), enabled=True)
+        
+        async def run():
+            async with client_for(app) as client:
+                statuses = [(await client.get("/api/efficiency/portfolio")).status_code for _ in range(2)]
+                limited = await client.get("/api/efficiency/portfolio")
+                forged_key = await client.get("/api/efficiency/portfolio", headers={"X-API-Key": "batch-client"})
+                health = await client.get("/health")
+                return statuses, limited, forged_key, health
+        
+        statuses, limited, forged_key, health = asyncio.run(run())
+        
+        assert statuses == [200, 200]
+        assert limited.status_code == 429
+        assert limited.headers["retry-after"] == "2"
+        assert limited.json()["error"] == "Too Many Requests"
+        assert forged_key.status_code == 429
+        assert health.status_code == 200
+
+    def test_saturated_worker_answers_503_fast(self):
+        async def run():
+            release = asyncio.Event()
+            limiter = ConcurrencyLimiter(max_concurrency=2, write_share=0.5, queue_timeout=0.05)
+            app = AdmissionMiddleware(make_app(release), limiter=limiter, buckets=None, enabled=True)
+            async with client_for(app) as client:
+                held = asyncio.create_task(client.post("/api/efficiency/calculate"))
+                await asyncio.sleep(0.01)
+                rejected_write = await client.post("/api/efficiency/calculate")
+                read = asyncio.create_task(client.get("/api/efficiency/portfolio"))
+                await asyncio.sleep(0.01)
+                release.set()
+                return rejected_write, await held, await read, limiter.in_flight
+        
+        rejected_write, held, read, in_flight = asyncio.run(run())
+        
+        assert rejected_write.status_code == 503
+        assert rejected_write.headers["retry-after"] == "1"
+        assert held.status_code == 200
+        assert read.status_code == 200
+        assert in_flight == 0
+
+    @pytest.mark.parametrize("path", ["/api/efficiency/events", "/api/efficiency/export"])
+    def test_long_lived_streams_hold_no_slot(self, path):
+        async def run():
+            release = asyncio.Event()
+            limiter = ConcurrencyLimiter(max_concurrency=1, queue_timeout=0.05)
+            app = AdmissionMiddleware(make_app(release), limiter=limiter, buckets=None, enabled=True)
+            async with client_for(app) as client:
+                streams = [asyncio.create_task(client.get(path)) for _ in range(3)]
+                await asyncio.sleep(0.01)
+                in_flight = limiter.in_flight
+                release.set()
+                return in_flight, [(await stream).status_code for stream in streams]
+        
+        in_flight, statuses = asyncio.run(run())
+        
+        assert in_flight == 0
+        assert statuses == [200, 200, 200]
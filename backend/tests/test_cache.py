@@ -0,0 +1,87 @@
+from cache import LRUTTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUTTLCache:
+    def test_hit_and_miss_counters(self):
+        cache = LRUTTLCache(max_entries=10, max_bytes=1000, ttl_seconds=60)
+        
+        assert cache.get("a") is None
+        cache.set("a", "value", size=5)
+        
+        assert cache.get("a") == "value"
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = LRUTTLCache(max_entries=10, max_bytes=1000, ttl_seconds=30, clock=clock)
+        cache.set("a", "value", size=5)
+        
+        clock.now = 29.9
+        assert cache.get("a") == "value"
+        clock.now = 30.0
+        assert cache.get("a") is None
+        assert cache.stats.expirations == 1
+        assert cache.current_bytes == 0
+
+    def test_least_recently_used_evicted_on_entry_limit(self):
+        cache = LRUTTLCache(max_entries=2, max_bytes=1000, ttl_seconds=60)
+        cache.set("a", 1, size=1)
+        cache.set("b", 2, size=1)
+        cache.get("a")
+        cache.set("c", 3, size=1)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats.evictions == 1
+
+    def test_byte_ceiling_evicts(self):
+        cache = LRUTTLCache(max_entries=100, max_bytes=10, ttl_seconds=60)
+        cache.set("a", 1, size=6)
+        cache.set("b", 2, size=6)
+        
+        assert len(cache) == 1
+        assert cache.current_bytes == 6
+        assert cache.get("b") == 2
+
+    def test_oversized_values_are_not_cached(self):
+        cache = LRUTTLCache(max_entries=100, max_bytes=10, ttl_seconds=60)
+        cache.set("a", 1, size=11)
+        
+        assert len(cache) == 0
+
+    def test_invalidate_tag_drops_only_that_building(self):
+        cache = LRUTTLCache(max_entries=100, max_bytes=1000, ttl_seconds=60)
+        cache.set(("summary", "b1"), 1, size=1, tag="b1")
+        cache.set(("history", "b1"), 2, size=1, tag="b1")
+        cache.set(("summary", "b2"), 3, size=1, tag="b2")
+        
+        assert cache.invalidate_tag("b1") == 2
+        assert cache.get(("summary", "b1")) is None
+        assert cache.get(("summary", "b2")) == 3
+        assert cache.stats.invalidations == 2
+        assert cache.current_bytes == 1
+
+    def test_replacing_key_keeps_byte_count(self):
+        cache = LRUTTLCache(max_entries=100, max_bytes=1000, ttl_seconds=60)
+        cache.set("a", 1, size=10, tag="b1")
+        cache.set("a", 2, size=4, tag="b1")
+        
+        assert cache.current_bytes == 4
+        assert cache.invalidate_tag("b1") == 1
+
+    def test_disabled_cache_never_stores(self):
+        cache = LRUTTLCache(enabled=False)
+        cache.set("a", 1, size=1)
+        
+        assert cache.get("a") is None
+        assert len(cache) == 0
@@ -1,11 +1,18 @@
 import pytest
 from datetime import datetime
 from models import PeriodInput
+import random
+import numpy as np
 from calculations import (
     calculate_period_metrics,
     calculate_summary,
     calculate_performance_grade,
-    process_efficiency_calculation
+    process_efficiency_calculation,
+    round_array,
+    calculate_performance_grades,
+    calculate_period_metrics_batch,
+    process_efficiency_calculation_batch,
+    PERIOD_INPUT_COLUMNS
 )
 
 
@@ -215,3 +222,69 @@ class TestProcessEfficiencyCalculation:
         assert "summary" in result
         assert result["summary"]["total_cost_savings"] > 0
 
+
+
+class TestBatchCalculations:
+    def _random_request(self, rng, building_id="60f7b3b3e4b0f3d4c8b4567a"):
+        periods = []
+        for _ in range(rng.randint(1, 10)):
+            period = {
+                "period": rng.choice(["business_hours", "after_hours", "weekend"]),
+                "time_range": "08:00-18:00",
+                "days": ["Monday"],
+            }
+            for column in PERIOD_INPUT_COLUMNS:
+                period[column] = round(rng.uniform(0.01, 60000), rng.choice([0, 1, 2, 3])) or 1.0
+            periods.append(period)
+        return {"building_id": building_id, "measure_name": "Batch Measure", "periods": periods}
+
+    def test_round_array_matches_builtin_round(self):
+        values = np.round(np.random.default_rng(0).uniform(-1000, 1000, 200000), 3)
+        expected = [round(v, 2) for v in values.tolist()]
+        assert round_array(values).tolist() == expected
+
+    def test_performance_grades_match_scalar(self):
+        values = np.array([25.0, 20.0, 19.99, 15.0, 14.99, 10.0, 9.99, 5.0, 4.99, 0.0, -1.0])
+        expected = [calculate_performance_grade(v) for v in values.tolist()]
+        assert calculate_performance_grades(values).tolist() == expected
+
+    def test_period_metrics_batch_matches_scalar(self):
+        period = PeriodInput(
+            period="business_hours",
+            time_range="08:00-18:00",
+            days=["Monday"],
+            current_electric_kwh=45000,
+            current_gas_therms=3200,
+            baseline_electric_kwh=52000,
+            baseline_gas_therms=4100,
+            electric_rate=0.12,
+            gas_rate=0.95
+        )
+        scalar = calculate_period_metrics(period).model_dump()
+        batch = calculate_period_metrics_batch(
+            **{column: np.array([getattr(period, column)]) for column in PERIOD_INPUT_COLUMNS}
+        )
+
+        for name, values in batch.items():
+            assert values.tolist()[0] == scalar[name]
+
+    def test_process_batch_matches_scalar_path(self):
+        rng = random.Random(42)
+        requests_data = [self._random_request(rng) for _ in range(500)]
+
+        batch_results = process_efficiency_calculation_batch(requests_data)
+
+        assert len(batch_results) == len(requests_data)
+        for request_data, batch_result in zip(requests_data, batch_results):
+            scalar_result = process_efficiency_calculation(request_data)
+            assert batch_result["building_id"] == scalar_result["building_id"]
+            assert batch_result["measure_name"] == scalar_result["measure_name"]
+            assert batch_result["periods"] == scalar_result["periods"]
+            assert batch_result["summary"] == scalar_result["summary"]
+
+    def test_process_batch_shares_timestamp(self):
+        rng = random.Random(7)
+        results = process_efficiency_calculation_batch([self._random_request(rng) for _ in range(3)])
+
+        assert isinstance(results[0]["calculation_timestamp"], datetime)
+        assert len({r["created_at"] for r in results}) == 1
@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from pymongo import WriteConcern
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from database import (
+    Database, period_filter_pipeline, make_read_preference, make_write_concern,
+    _read_session, BULK_WRITES, INTERACTIVE_WRITES
+)
+
+
+class TestPeriodFilterPipeline:
+    def test_match_uses_period_index(self):
+        pipeline = period_filter_pipeline("60f7b3b3e4b0f3d4c8b4567a", ["weekend"])
+        
+        assert pipeline[0] == {
+            "$match": {
+                "building_id": "60f7b3b3e4b0f3d4c8b4567a",
+                "periods.period": {"$in": ["weekend"]}
+            }
+        }
+
+    def test_sorted_newest_first(self):
+        pipeline = period_filter_pipeline("60f7b3b3e4b0f3d4c8b4567a", ["weekend"])
+        
+        assert pipeline[1] == {"$sort": {"created_at": -1}}
+
+    def test_project_filters_periods_server_side(self):
+        periods = ["business_hours", "after_hours"]
+        pipeline = period_filter_pipeline("60f7b3b3e4b0f3d4c8b4567a", periods)
+        
+        projection = pipeline[-1]["$project"]
+        assert projection["periods"]["$filter"]["input"] == "$periods"
+        assert projection["periods"]["$filter"]["cond"] == {"$in": ["$$period.period", periods]}
+        assert projection["summary"] == 1
+
+
+class TestReadRouting:
+    def test_read_preference_with_staleness_bound(self):
+        preference = make_read_preference("secondaryPreferred", 120)
+        
+        assert preference == SecondaryPreferred(max_staleness=120)
+        assert make_read_preference("primary") == Primary()
+
+    def test_invalid_read_settings_are_rejected(self):
+        with pytest.raises(ValueError):
+            make_read_preference("secondaries")
+        with pytest.raises(ValueError):
+            make_read_preference("primary", 120)
+        # The server refuses bounds below 90 seconds
+        with pytest.raises(ValueError):
+            make_read_preference("secondary", 30)
+
+    def test_only_dashboard_reads_are_routed(self):
+        database = Database()
+        database.read_preference = make_read_preference("secondary", 90)
+        database.open()
+        try:
+            assert database._read_collection(database.collection_name).read_preference == database.read_preference
+            assert database.db[database.collection_name].read_preference == Primary()
+        finally:
+            database.disconnect()
+
+    def test_read_session_is_shared_within_a_request(self):
+        database = Database()
+        database.read_preference = make_read_preference("nearest")
+        database.open()
+        
+        async def run():
+            async with database.read_session():
+                outer = _read_session.get()
+                async with database.read_session():
+                    inner = _read_session.get()
+            return outer, inner, _read_session.get()
+        
+        try:
+            outer, inner, after = asyncio.run(run())
+        finally:
+            database.disconnect()
+        
+        assert outer is inner
+        assert outer.options.causal_consistency
+        assert after is None
+
+    def test_primary_reads_need_no_session(self):
+        database = Database()
+        database.read_preference = Primary()
+        
+        async def run():
+            async with database.read_session():
+                return _read_session.get()
+        
+        assert asyncio.run(run()) is None
+
+
+class TestWriteConcernProfiles:
+    def test_profiles(self):
+        assert make_write_concern("majority", 5000) == WriteConcern(w="majority", wtimeout=5000)
+        assert make_write_concern("1", 0) == WriteConcern(w=1)
+        with pytest.raises(ValueError):
+            make_write_concern("0")
+
+    def test_bulk_and_interactive_writes_use_their_profile(self):
+        database = Database()
+        database.write_concerns = {INTERACTIVE_WRITES: WriteConcern(w="majority"), BULK_WRITES: WriteConcern(w=1)}
+        database.open()
+        try:
+            interactive = database._write_collection(database.collection_name, INTERACTIVE_WRITES)
+            bulk = database._write_collection(database.collection_name, BULK_WRITES)
+        finally:
+            database.disconnect()
+        
+        assert interactive.write_concern == WriteConcern(w="majority")
+        assert bulk.write_concern == WriteConcern(w=1)
@@ -0,0 +1,143 @@
+import asyncio
+import httpx
+import pytest
+from pymongo.errors import OperationFailure
+import main
+from cache import response_cache
+from calculations import process_efficiency_calculation
+from etags import make_etag, etag_matches
+from tests.helpers import SAMPLE_REQUEST
+
+BUILDING_ID = SAMPLE_REQUEST["building_id"]
+
+
+class FakeVersionedDatabase:
+    def __init__(self):
+        self.version = "65a1b2c3d4e5f67890123456:2024-01-10T12:00:00"
+        self.summary_fetches = 0
+
+    async def get_building_version(self, building_id):
+        return self.version if building_id == BUILDING_ID else None
+
+    async def get_building_summary(self, building_id):
+        self.summary_fetches += 1
+        calculation = process_efficiency_calculation(SAMPLE_REQUEST)
+        calculation["_id"] = self.version.split(":")[0]
+        return calculation
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    database = FakeVersionedDatabase()
+    monkeypatch.setattr(main.db, "get_building_version", database.get_building_version)
+    monkeypatch.setattr(main.db, "get_building_summary", database.get_building_summary)
+    response_cache.clear()
+    yield database
+    response_cache.clear()
+
+
+def get(path, **headers):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers={"Accept-Encoding": "identity", **headers})
+    return asyncio.run(run())
+
+
+SUMMARY_PATH = f"/api/efficiency/building/{BUILDING_ID}/summary"
+
+
+class TestEtagMatching:
+    def test_distinct_per_version_and_variant(self):
+        assert make_etag("v1", "summary") == make_etag("v1", "summary")
+        assert make_etag("v1", "summary") != make_etag("v2", "summary")
+        assert make_etag("v1", "summary") != make_etag("v1", "history")
+
+    def test_strong_format(self):
+        etag = make_etag("v1")
+        
+        assert etag.startswith('"') and etag.endswith('"')
+
+    def test_matches_lists_weak_and_encoded_tags(self):
+        etag = '"abc"'
+        
+        assert etag_matches('"abc"', etag)
+        assert etag_matches('"x", "abc"', etag)
+        assert etag_matches('W/"abc"', etag)
+        assert etag_matches('"abc-gzip"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"abcd"', etag)
+        assert not etag_matches(None, etag)
+
+
+class TestConditionalGet:
+    def test_response_carries_etag(self, fake_db):
+        response = get(SUMMARY_PATH)
+        
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('"')
+        assert response.headers["cache-control"] == "no-cache"
+
+    def test_matching_etag_returns_304_without_fetch(self, fake_db):
+        etag = get(SUMMARY_PATH).headers["etag"]
+        fake_db.summary_fetches = 0
+        
+        response = get(SUMMARY_PATH, **{"If-None-Match": etag})
+        
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert fake_db.summary_fetches == 0
+
+    def test_new_calculation_changes_etag_and_bypasses_stale_cache(self, fake_db):
+        etag = get(SUMMARY_PATH).headers["etag"]
+        # Written through another worker: this worker's cache was not invalidated
+        fake_db.version = "65a1b2c3d4e5f67890999999:2024-01-11T12:00:00"
+        
+        response = get(SUMMARY_PATH, **{"If-None-Match": etag})
+        
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["_id"] == "65a1b2c3d4e5f67890999999"
+        assert fake_db.summary_fetches == 2
+
+    def test_compressed_response_etag_still_matches(self, fake_db):
+        compressed = get(SUMMARY_PATH, **{"Accept-Encoding": "gzip"})
+        if compressed.headers.get("content-encoding") != "gzip":
+            pytest.skip("summary body below the compression threshold")
+        
+        assert compressed.headers["etag"].endswith('-gzip"')
+        assert get(SUMMARY_PATH, **{"If-None-Match": compressed.headers["etag"]}).status_code == 304
+
+    def test_not_modified_keeps_the_encoding_suffix(self, fake_db):
+        identity = get(SUMMARY_PATH).headers["etag"]
+        gzipped = identity[:-1] + '-gzip"'
+        
+        revalidated = get(SUMMARY_PATH, **{"Accept-Encoding": "gzip", "If-None-Match": gzipped})
+        plain = get(SUMMARY_PATH, **{"Accept-Encoding": "gzip", "If-None-Match": identity})
+        
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == gzipped
+        assert "Accept-Encoding" in revalidated.headers["vary"]
+        assert plain.status_code == 304
+        assert plain.headers["etag"] == identity
+
+    def test_unknown_building_has_no_etag(self, fake_db, monkeypatch):
+        async def no_summary(building_id):
+            return None
+        monkeypatch.setattr(main.db, "get_building_summary", no_summary)
+        
+        response = get("/api/efficiency/building/unknown/summary")
+        
+        assert response.status_code == 404
+        assert "etag" not in response.headers
+
+    def test_failed_version_lookup_is_handled_by_the_route(self, fake_db, monkeypatch):
+        async def failing_version(building_id):
+            raise OperationFailure("error processing query: planner returned error")
+        monkeypatch.setattr(main.db, "get_building_version", failing_version)
+        
+        response = get(SUMMARY_PATH)
+        
+        assert response.status_code == 500
+        assert response.json()["detail"].startswith("Failed to retrieve summary: ")
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import httpx
+import pytest
+import events
+import main
+from calculations import process_efficiency_calculation_batch
+from events import CalculationBroker, Subscription
+from sqlite_database import SQLiteDatabase
+
+BUILDINGS = [f"{index:024x}" for index in range(1, 4)]
+
+
+def _request(building_id: str, index: int = 0):
+    return {
+        "building_id": building_id,
+        "measure_name": f"Measure {index}",
+        "periods": [
+            {
+                "period": "business_hours",
+                "time_range": "08:00-18:00",
+                "days": ["Monday"],
+                "current_electric_kwh": 40000 + index,
+                "current_gas_therms": 3000,
+                "baseline_electric_kwh": 52000,
+                "baseline_gas_therms": 4100,
+                "electric_rate": 0.12,
+                "gas_rate": 0.95
+            }
+        ]
+    }
+
+
+class FakeFeed:
+    def __init__(self, fail_first: bool = False):
+        self.calls = 0
+        self.fail_first = fail_first
+        self.queue = asyncio.Queue()
+
+    async def __call__(self):
+        self.calls += 1
+        if self.fail_first and self.calls == 1:
+            raise ConnectionError("feed unavailable")
+        yield None
+        while True:
+            yield await self.queue.get()
+
+
+async def _drain(queue: asyncio.Queue):
+    received = []
+    while not queue.empty():
+        received.append(queue.get_nowait())
+    return received
+
+
+@pytest.fixture
+def database():
+    database = SQLiteDatabase(":memory:")
+    asyncio.run(database.connect())
+    yield database
+    database.disconnect()
+
+
+class TestCalculationBroker:
+    def test_thousand_subscribers_share_one_watcher(self, database, monkeypatch):
+        watches = []
+        encoded = []
+        format_event = events.format_event
+        monkeypatch.setattr(events, "format_event", lambda document: encoded.append(document) or format_event(document))
+        
+        def source():
+            watches.append(1)
+            return database.watch_calculations(poll_interval=0.01)
+        
+        async def run():
+            broker = CalculationBroker(source)
+            subscriptions = [broker.subscribe([BUILDINGS[index % 2]]) for index in range(1000)]
+            await broker.wait_ready()
+            calculations = process_efficiency_calculation_batch([_request(building_id) for building_id in BUILDINGS])
+            await database.insert_calculations(calculations)
+            while any(subscription.queue.empty() for subscription in subscriptions):
+                await asyncio.sleep(0.01)
+            received = [await _drain(subscription.queue) for subscription in subscriptions]
+            for subscription in subscriptions:
+                broker.unsubscribe(subscription)
+            return broker, received
+        
+        broker, received = asyncio.run(run())
+        
+        assert len(watches) == 1
+        assert broker.watchers_started == 1
+        # Encoded once per calculation with subscribers, not once per subscriber
+        assert len(encoded) == 2
+        assert all(len(events_received) == 1 for events_received in received)
+        first = json.loads(received[0][0].split(b"data: ")[1])
+        assert first["building_id"] == BUILDINGS[0]
+        assert received[0][0].startswith(b"id: " + first["_id"].encode() + b"\nevent: calculation\n")
+        assert broker.subscriber_count == 0
+
+    def test_watcher_stops_with_last_subscriber(self):
+        async def run():
+            feed = FakeFeed()
+            broker = CalculationBroker(feed)
+            first = broker.subscribe([BUILDINGS[0]])
+            second = broker.subscribe([BUILDINGS[0], BUILDINGS[1]])
+            await broker.wait_ready()
+            broker.unsubscribe(first)
+            still_watching = broker._watcher is not None
+            broker.unsubscribe(second)
+            await asyncio.sleep(0)
+            stopped = broker._watcher is None
+            broker.subscribe([BUILDINGS[0]])
+            await broker.wait_ready()
+            broker.close()
+            return feed.calls, still_watching, stopped, broker.watchers_started
+        
+        calls, still_watching, stopped, watchers_started = asyncio.run(run())
+        
+        assert still_watching and stopped
+        assert calls == 2
+        assert watchers_started == 2
+
+    def test_slow_subscriber_keeps_latest_events(self):
+        subscription = Subscription([BUILDINGS[0]], queue_size=2)
+        for index in range(5):
+            subscription.deliver(b"event %d" % index)
+        
+        assert subscription.dropped == 3
+        assert [subscription.queue.get_nowait() for _ in range(2)] == [b"event 3", b"event 4"]
+
+    def test_failed_feed_is_retried(self):
+        async def run():
+            feed = FakeFeed(fail_first=True)
+            broker = CalculationBroker(feed, retry_delay=0)
+            subscription = broker.subscribe([BUILDINGS[0]])
+            await broker.wait_ready()
+            calculation = process_efficiency_calculation_batch([_request(BUILDINGS[0])])[0]
+            calculation["_id"] = "0" * 24
+            await feed.queue.put(calculation)
+            event = await asyncio.wait_for(subscription.queue.get(), 1)
+            broker.close()
+            return feed.calls, broker.last_error, event
+        
+        calls, last_error, event = asyncio.run(run())
+        
+        assert calls == 2
+        assert last_error == "feed unavailable"
+        assert event.startswith(b"id: " + b"0" * 24)
+
+
+class TestEventsEndpoint:
+    def test_new_calculation_is_pushed_to_subscriber(self, database, monkeypatch):
+        monkeypatch.setattr(main, "db", database)
+        broker = CalculationBroker(lambda: database.watch_calculations(poll_interval=0.01))
+        monkeypatch.setattr(main, "calculation_events", broker)
+        main.response_cache.clear()
+        
+        async def run():
+            # httpx's ASGI transport buffers whole bodies, so the stream is
+            # driven through the raw ASGI interface
+            disconnected = asyncio.Event()
+            requests = [{"type": "http.request", "body": b"", "more_body": False}]
+            messages = []
+            
+            async def receive():
+                if requests:
+                    return requests.pop()
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            
+            async def send(message):
+                messages.append(message)
+            
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+                "scheme": "http", "path": "/api/efficiency/events", "raw_path": b"/api/efficiency/events",
+                "query_string": f"building_id={BUILDINGS[0]}".encode(), "root_path": "",
+                "headers": [(b"host", b"test"), (b"accept-encoding", b"gzip")],
+                "client": ("127.0.0.1", 1234), "server": ("test", 80),
+            }
+            stream = asyncio.create_task(main.app(scope, receive, send))
+            
+            def body():
+                return b"".join(message.get("body", b"") for message in messages[1:])
+            
+            while b"subscribed" not in body():
+                await asyncio.sleep(0.01)
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await client.post("/api/efficiency/calculate", json=_request(BUILDINGS[1]))
+                created = await client.post("/api/efficiency/calculate", json=_request(BUILDINGS[0]))
+            while b"event: calculation" not in body():
+                await asyncio.sleep(0.01)
+            disconnected.set()
+            await asyncio.wait_for(stream, 5)
+            return messages[0], body(), created.json()
+        
+        start, body, created = asyncio.run(run())
+        headers = dict(start["headers"])
+        
+        assert start["status"] == 200
+        assert headers[b"content-type"].startswith(b"text/event-stream")
+        assert b"content-encoding" not in headers
+        events_received = [chunk for chunk in body.split(b"\n\n") if b"event: calculation" in chunk]
+        assert len(events_received) == 1
+        pushed = json.loads(events_received[0].split(b"data: ")[1])
+        assert pushed["_id"] == created["_id"]
+        assert pushed["summary"] == created["summary"]
+        assert broker.subscriber_count == 0
+
+    def test_subscription_needs_building_ids_within_limit(self):
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                missing = await client.get("/api/efficiency/events")
+                too_many = await client.get(
+                    "/api/efficiency/events",
+                    params={"building_id": [f"{index:024x}" for index in range(events.EVENTS_MAX_BUILDINGS + 1)]}
+                )
+                return missing, too_many
+        
+        missing, too_many = asyncio.run(run())
+        
+        assert missing.status_code == 422
+        assert too_many.status_code == 400
@@ -0,0 +1,107 @@
+import asyncio
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+from export import stream_csv, stream_ndjson, CSV_COLUMNS
+from calculations import process_efficiency_calculation
+
+
+def _sample_document(index: int = 0):
+    doc = process_efficiency_calculation({
+        "building_id": "60f7b3b3e4b0f3d4c8b4567a",
+        "measure_name": "High-Efficiency HVAC System",
+        "periods": [
+            {
+                "period": period,
+                "time_range": "08:00-18:00",
+                "days": ["Monday", "Tuesday"],
+                "current_electric_kwh": 45000,
+                "current_gas_therms": 3200,
+                "baseline_electric_kwh": 52000,
+                "baseline_gas_therms": 4100,
+                "electric_rate": 0.12,
+                "gas_rate": 0.95
+            }
+            for period in ["business_hours", "after_hours", "weekend"]
+        ]
+    })
+    doc["_id"] = f"{index:024x}"
+    return doc
+
+
+async def _documents(count: int):
+    template = _sample_document()
+    for i in range(count):
+        doc = dict(template)
+        doc["_id"] = f"{i:024x}"
+        yield doc
+
+
+def _collect(stream) -> bytes:
+    async def run():
+        return b"".join([chunk async for chunk in stream])
+    return asyncio.run(run())
+
+
+async def _minimal_documents(count: int):
+    for i in range(count):
+        yield {"_id": i, "building_id": "60f7b3b3e4b0f3d4c8b4567a", "periods": [{"period": "weekend"}]}
+
+
+def _consume_with_peak_blocks(stream):
+    # Live allocated blocks are sampled after every chunk; a stream that
+    # accumulated rows would grow this linearly with the export size.
+    async def run():
+        total = 0
+        peak = sys.getallocatedblocks()
+        async for chunk in stream:
+            total += len(chunk)
+            peak = max(peak, sys.getallocatedblocks())
+        return total, peak
+
+    baseline = sys.getallocatedblocks()
+    total_bytes, peak = asyncio.run(run())
+    return total_bytes, peak - baseline
+
+
+class TestNdjsonExport:
+    def test_one_document_per_line(self):
+        body = _collect(stream_ndjson(_documents(3)))
+        lines = body.decode().splitlines()
+        
+        assert len(lines) == 3
+        first = json.loads(lines[0])
+        assert first["_id"] == f"{0:024x}"
+        assert len(first["periods"]) == 3
+        assert datetime.fromisoformat(first["created_at"])
+
+    def test_empty_export(self):
+        assert _collect(stream_ndjson(_documents(0))) == b""
+
+
+class TestCsvExport:
+    def test_one_row_per_period(self):
+        body = _collect(stream_csv(_documents(2)))
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        
+        assert rows[0] == CSV_COLUMNS
+        assert len(rows) == 1 + 2 * 3
+        row = dict(zip(CSV_COLUMNS, rows[1]))
+        assert row["period"] == "business_hours"
+        assert row["days"] == "Monday, Tuesday"
+        assert float(row["total_cost_savings"]) == 1695.0
+        assert row["performance_grade"] == "A (Very Good)"
+
+    def test_empty_export_has_header(self):
+        body = _collect(stream_csv(_documents(0)))
+        
+        assert body.decode().strip() == ",".join(CSV_COLUMNS)
+
+    def test_memory_stays_bounded_on_million_row_export(self):
+        _, small_growth = _consume_with_peak_blocks(stream_csv(_minimal_documents(1000)))
+        large_bytes, large_growth = _consume_with_peak_blocks(stream_csv(_minimal_documents(1_000_000)))
+        
+        assert large_bytes > 1_000_000 * len("0,60f7b3b3e4b0f3d4c8b4567a,,,,weekend")
+        assert large_growth < small_growth + 5000
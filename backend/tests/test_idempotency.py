@@ -0,0 +1,156 @@
+import asyncio
+import copy
+import httpx
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+import main
+from idempotency import calculation_request_hash, validate_idempotency_key
+from models import CalculationRequest
+from tests.helpers import SAMPLE_REQUEST
+
+
+class UniqueIndexDatabase:
+    """In-memory stand-in enforcing the two unique indexes; yields between steps."""
+
+    def __init__(self):
+        self.documents = []
+        self.keys = {}
+        self.inserts = 0
+
+    async def bind_idempotency_key(self, idempotency_key, request_hash):
+        await asyncio.sleep(0)
+        return self.keys.setdefault(idempotency_key, request_hash)
+
+    async def find_existing_calculation(self, request_hash, idempotency_key=None):
+        await asyncio.sleep(0)
+        for doc in self.documents:
+            if idempotency_key and doc.get("idempotency_key") == idempotency_key:
+                return copy.deepcopy(doc)
+        for doc in self.documents:
+            if doc["request_hash"] == request_hash:
+                return copy.deepcopy(doc)
+        return None
+
+    async def insert_calculation(self, calculation):
+        await asyncio.sleep(0)
+        for doc in self.documents:
+            if doc["request_hash"] == calculation["request_hash"] or (
+                calculation.get("idempotency_key")
+                and doc.get("idempotency_key") == calculation["idempotency_key"]
+            ):
+                raise DuplicateKeyError("E11000 duplicate key error")
+        doc = dict(calculation, _id=ObjectId())
+        self.documents.append(doc)
+        self.inserts += 1
+        await asyncio.sleep(0)
+        return str(doc["_id"])
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    database = UniqueIndexDatabase()
+    monkeypatch.setattr(main.db, "find_existing_calculation", database.find_existing_calculation)
+    monkeypatch.setattr(main.db, "insert_calculation", database.insert_calculation)
+    monkeypatch.setattr(main.db, "bind_idempotency_key", database.bind_idempotency_key)
+    return database
+
+
+def post_all(requests):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.post("/api/efficiency/calculate", json=body, headers=headers)
+                for body, headers in requests
+            ])
+    return asyncio.run(run())
+
+
+class TestRequestHash:
+    def test_equal_requests_hash_equal(self):
+        coerced = copy.deepcopy(SAMPLE_REQUEST)
+        coerced["periods"][0]["current_electric_kwh"] = float(coerced["periods"][0]["current_electric_kwh"])
+        reordered = dict(reversed(list(coerced.items())))
+        
+        assert calculation_request_hash(CalculationRequest(**SAMPLE_REQUEST)) == \
+            calculation_request_hash(CalculationRequest(**reordered))
+
+    def test_changed_input_changes_hash(self):
+        changed = copy.deepcopy(SAMPLE_REQUEST)
+        changed["periods"][0]["gas_rate"] += 0.01
+        
+        assert calculation_request_hash(CalculationRequest(**SAMPLE_REQUEST)) != \
+            calculation_request_hash(CalculationRequest(**changed))
+
+    def test_idempotency_key_validation(self):
+        assert validate_idempotency_key(None) is None
+        assert validate_idempotency_key(" abc ") == "abc"
+        with pytest.raises(ValueError):
+            validate_idempotency_key("")
+        with pytest.raises(ValueError):
+            validate_idempotency_key("x" * 256)
+
+
+class TestIdempotentCalculate:
+    def test_repeat_returns_existing_without_recompute(self, fake_db, monkeypatch):
+        first, = post_all([(SAMPLE_REQUEST, {})])
+        computed = []
+        monkeypatch.setattr(main, "process_calculation_request", lambda request: computed.append(request))
+        
+        second, = post_all([(SAMPLE_REQUEST, {})])
+        
+        assert first.status_code == 201
+        assert second.status_code == 200
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert second.json() == first.json()
+        assert computed == []
+        assert fake_db.inserts == 1
+
+    def test_concurrent_duplicates_insert_once(self, fake_db):
+        responses = post_all([(SAMPLE_REQUEST, {})] * 50)
+        
+        statuses = sorted(response.status_code for response in responses)
+        assert statuses == [200] * 49 + [201]
+        assert len({response.json()["_id"] for response in responses}) == 1
+        assert fake_db.inserts == 1
+
+    def test_concurrent_duplicates_with_idempotency_key(self, fake_db):
+        responses = post_all([(SAMPLE_REQUEST, {"Idempotency-Key": "retry-1"})] * 20)
+        
+        assert len({response.json()["_id"] for response in responses}) == 1
+        assert fake_db.inserts == 1
+        assert fake_db.documents[0]["idempotency_key"] == "retry-1"
+
+    def test_reused_key_with_different_body_conflicts(self, fake_db):
+        changed = copy.deepcopy(SAMPLE_REQUEST)
+        changed["measure_name"] = "Another measure"
+        
+        first, = post_all([(SAMPLE_REQUEST, {"Idempotency-Key": "retry-2"})])
+        second, = post_all([(changed, {"Idempotency-Key": "retry-2"})])
+        
+        assert first.status_code == 201
+        assert second.status_code == 409
+        assert fake_db.inserts == 1
+
+    def test_key_reused_with_different_body_after_hash_replay_conflicts(self, fake_db):
+        changed = copy.deepcopy(SAMPLE_REQUEST)
+        changed["measure_name"] = "Another measure"
+        
+        first, = post_all([(SAMPLE_REQUEST, {})])
+        replayed, = post_all([(SAMPLE_REQUEST, {"Idempotency-Key": "retry-3"})])
+        reused, = post_all([(changed, {"Idempotency-Key": "retry-3"})])
+        
+        assert first.status_code == 201
+        assert replayed.status_code == 200
+        assert reused.status_code == 409
+        assert fake_db.inserts == 1
+
+    def test_different_requests_are_not_deduplicated(self, fake_db):
+        changed = copy.deepcopy(SAMPLE_REQUEST)
+        changed["measure_name"] = "Another measure"
+        
+        responses = post_all([(SAMPLE_REQUEST, {}), (changed, {})])
+        
+        assert [response.status_code for response in responses] == [201, 201]
+        assert fake_db.inserts == 2
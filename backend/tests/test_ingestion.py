@@ -0,0 +1,108 @@
+import asyncio
+import json
+import pytest
+from ingestion import BulkIngestion, iter_ndjson, iter_json_array
+
+VALID_REQUEST = {
+    "building_id": "60f7b3b3e4b0f3d4c8b4567a",
+    "measure_name": "High-Efficiency HVAC System",
+    "periods": [
+        {
+            "period": "business_hours",
+            "time_range": "08:00-18:00",
+            "days": ["Monday"],
+            "current_electric_kwh": 45000,
+            "current_gas_therms": 3200,
+            "baseline_electric_kwh": 52000,
+            "baseline_gas_therms": 4100,
+            "electric_rate": 0.12,
+            "gas_rate": 0.95
+        }
+    ]
+}
+
+
+class RecordingDatabase:
+    def __init__(self, failing_measures=()):
+        self.failing_measures = set(failing_measures)
+        self.batches = []
+
+    async def insert_calculations_unordered(self, calculations):
+        self.batches.append(len(calculations))
+        return [
+            (None, "E11000 duplicate key") if c["measure_name"] in self.failing_measures
+            else (f"id-{len(self.batches)}-{i}", None)
+            for i, c in enumerate(calculations)
+        ]
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestNdjsonParsing:
+    def test_lines_split_across_chunks(self):
+        line = json.dumps(VALID_REQUEST).encode()
+        
+        async def collect():
+            return [r async for r in iter_ndjson(_chunks(line[:10], line[10:] + b"\n\n", line))]
+        
+        records = _run(collect())
+        
+        assert len(records) == 2
+        assert all(error is None for _, error in records)
+
+    def test_invalid_json_line_is_reported(self):
+        async def collect():
+            return [r async for r in iter_ndjson(_chunks(b"{not json}\n"))]
+        
+        (record, error), = _run(collect())
+        
+        assert record is None
+        assert error.startswith("Invalid JSON")
+
+    def test_json_array_body_must_be_list(self):
+        async def collect():
+            return [r async for r in iter_json_array(b'{"a": 1}')]
+        
+        with pytest.raises(ValueError):
+            _run(collect())
+
+
+class TestBulkIngestion:
+    def test_invalid_items_do_not_abort_batch(self):
+        invalid = dict(VALID_REQUEST, building_id="not-an-object-id")
+        body = json.dumps([VALID_REQUEST, invalid, VALID_REQUEST]).encode()
+        database = RecordingDatabase()
+        
+        results = _run(BulkIngestion(database).run(iter_json_array(body)))
+        
+        assert [r["status"] for r in results] == ["inserted", "error", "inserted"]
+        assert "building_id" in results[1]["error"]
+        assert database.batches == [2]
+
+    def test_write_errors_reported_per_item(self):
+        failing = dict(VALID_REQUEST, measure_name="Duplicate")
+        body = json.dumps([VALID_REQUEST, failing]).encode()
+        ingestion = BulkIngestion(RecordingDatabase(failing_measures=["Duplicate"]))
+        
+        results = _run(ingestion.run(iter_json_array(body)))
+        
+        assert results[0]["status"] == "inserted"
+        assert results[1] == {"index": 1, "status": "error", "error": "E11000 duplicate key"}
+        assert ingestion.inserted == 1
+        assert ingestion.building_ids == {VALID_REQUEST["building_id"]}
+
+    def test_records_written_in_chunks(self):
+        lines = b"\n".join(json.dumps(VALID_REQUEST).encode() for _ in range(25))
+        database = RecordingDatabase()
+        
+        results = _run(BulkIngestion(database, chunk_size=10).run(iter_ndjson(_chunks(lines))))
+        
+        assert database.batches == [10, 10, 5]
+        assert [r["index"] for r in results] == list(range(25))
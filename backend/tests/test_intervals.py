@@ -0,0 +1,238 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+import httpx
+import numpy as np
+import pytest
+import main
+from intervals import (
+    IntervalAggregator, aggregate_csv, aggregate_ndjson, period_lookup, schedule_periods, time_of_week,
+    BUSINESS_HOURS, AFTER_HOURS, WEEKEND
+)
+
+BUILDING_ID = "507f1f77bcf86cd799439011"
+
+
+def _readings(days: int = 14, step_minutes: int = 15):
+    start = datetime(2024, 3, 4)  # a Monday
+    rows = []
+    for index in range(days * 24 * 60 // step_minutes):
+        timestamp = start + timedelta(minutes=index * step_minutes)
+        rows.append({
+            "timestamp": timestamp.strftime("%Y-%m-%dT%H:%M"),
+            "electric_kwh": round(1 + (index % 7) * 0.25, 2),
+            "gas_therms": round(0.1 + (index % 3) * 0.05, 2),
+            "series": "baseline" if timestamp.day < 11 else "current",
+        })
+    return rows
+
+
+def _expected_totals(rows, start_minute=8 * 60, end_minute=18 * 60, business_days=range(5)):
+    # Scalar reference classification with datetime.weekday()
+    totals = {}
+    for row in rows:
+        timestamp = datetime.fromisoformat(row["timestamp"])
+        minute = timestamp.hour * 60 + timestamp.minute
+        if timestamp.weekday() not in business_days:
+            period = "weekend"
+        elif start_minute <= minute < end_minute:
+            period = "business_hours"
+        else:
+            period = "after_hours"
+        key = (row["series"], period)
+        electric, gas = totals.get(key, (0.0, 0.0))
+        totals[key] = (electric + row["electric_kwh"], gas + row["gas_therms"])
+    return totals
+
+
+def _csv(rows) -> bytes:
+    lines = ["timestamp,electric_kwh,gas_therms,series"]
+    lines += [f"{r['timestamp']},{r['electric_kwh']},{r['gas_therms']},{r['series']}" for r in rows]
+    return ("\n".join(lines) + "\n").encode()
+
+
+async def _chunks(body: bytes, size: int = 997):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+class TestPeriodLookup:
+    def test_business_hours_on_business_days(self):
+        lookup = period_lookup("08:00-18:00", ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"])
+        
+        assert lookup[8 * 60] == BUSINESS_HOURS
+        assert lookup[18 * 60 - 1] == BUSINESS_HOURS
+        assert lookup[18 * 60] == AFTER_HOURS
+        assert lookup[7 * 60 + 59] == AFTER_HOURS
+        assert lookup[5 * 1440 + 12 * 60] == WEEKEND
+        assert lookup[6 * 1440 + 3 * 60] == WEEKEND
+
+    def test_overnight_range_wraps_midnight(self):
+        lookup = period_lookup("22:00-06:00", ["Monday"])
+        
+        assert lookup[23 * 60] == BUSINESS_HOURS
+        assert lookup[5 * 60] == BUSINESS_HOURS
+        assert lookup[12 * 60] == AFTER_HOURS
+        assert lookup[1440 + 23 * 60] == WEEKEND
+
+    def test_time_of_week_starts_on_monday(self):
+        timestamps = np.array(["2024-03-04T00:00", "2024-03-10T23:59", "1970-01-01T00:00"], dtype="datetime64[m]")
+        
+        assert time_of_week(timestamps).tolist() == [0, 7 * 1440 - 1, 3 * 1440]
+
+    def test_schedule_describes_each_period(self):
+        schedule = schedule_periods("07:30-19:00", ["Monday", "Tuesday"])
+        
+        assert schedule["after_hours"] == {"time_range": "19:00-07:30", "days": ["Monday", "Tuesday"]}
+        assert schedule["weekend"]["days"] == ["Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+    def test_invalid_time_range_is_rejected(self):
+        for time_range in ["0800-1800", "08:00-08:00", "25:00-26:00", "08:75-18:00"]:
+            with pytest.raises(ValueError):
+                period_lookup(time_range)
+
+
+class TestAggregation:
+    def test_csv_totals_match_scalar_classification(self):
+        rows = _readings()
+        aggregator = IntervalAggregator()
+        
+        asyncio.run(aggregate_csv(_chunks(_csv(rows)), aggregator, chunk_rows=500))
+        
+        expected = _expected_totals(rows)
+        assert aggregator.rows == len(rows)
+        for series_index, series in enumerate(["baseline", "current"]):
+            for period_index, period in enumerate(["business_hours", "after_hours", "weekend"]):
+                electric, gas = expected[(series, period)]
+                assert aggregator.electric[series_index, period_index] == pytest.approx(electric)
+                assert aggregator.gas[series_index, period_index] == pytest.approx(gas)
+        assert aggregator.start == np.datetime64("2024-03-04T00:00")
+        assert aggregator.end == np.datetime64("2024-03-17T23:45")
+
+    def test_ndjson_matches_csv(self):
+        rows = _readings(days=7, step_minutes=60)
+        body = ("\n".join(json.dumps(row) for row in rows) + "\n").encode()
+        from_csv, from_ndjson = IntervalAggregator("22:00-06:00"), IntervalAggregator("22:00-06:00")
+        
+        asyncio.run(aggregate_csv(_chunks(_csv(rows)), from_csv))
+        asyncio.run(aggregate_ndjson(_chunks(body), from_ndjson, chunk_rows=50))
+        
+        assert np.allclose(from_csv.electric, from_ndjson.electric)
+        assert np.allclose(from_csv.gas, from_ndjson.gas)
+        assert from_csv.summary()["readings"] == from_ndjson.summary()["readings"]
+
+    def test_bad_rows_are_skipped_with_line_numbers(self):
+        body = (
+            b"timestamp,electric_kwh,gas_therms\n"
+            b"2024-03-04T09:00,2.5,0.5\n"
+            b"\n"
+            b"yesterday,1,1\n"
+            b"2024-03-04T10:00,nan,1\n"
+            b"2024-03-04T11:00,1\n"
+            b"2024-03-09T11:00,4,1\n"
+        )
+        aggregator = IntervalAggregator()
+        
+        asyncio.run(aggregate_csv(_chunks(body, size=16), aggregator))
+        
+        summary = aggregator.summary()
+        assert summary["rows"] == 2
+        assert summary["skipped_rows"] == 3
+        assert [error["line"] for error in summary["errors"]] == [4, 5, 6]
+        assert summary["readings"]["current"] == {"business_hours": 1, "after_hours": 0, "weekend": 1}
+
+    @pytest.mark.parametrize("timestamp", ["2024-03-04T09:00Z", "2024-03-04T09:00:00-05:00", "2024-03-04 09:00+0100"])
+    def test_timestamps_with_utc_offsets_are_rejected(self, timestamp):
+        csv_body = f"timestamp,electric_kwh\n2024-03-04T10:00,1\n{timestamp},2\n".encode()
+        ndjson_body = (
+            json.dumps({"timestamp": "2024-03-04T10:00", "electric_kwh": 1}) + "\n"
+            + json.dumps({"timestamp": timestamp, "electric_kwh": 2}) + "\n"
+        ).encode()
+        
+        from_csv = asyncio.run(aggregate_csv(_chunks(csv_body), IntervalAggregator())).summary()
+        from_ndjson = asyncio.run(aggregate_ndjson(_chunks(ndjson_body), IntervalAggregator())).summary()
+        
+        for summary, line in ((from_csv, 3), (from_ndjson, 2)):
+            assert summary["rows"] == 1
+            assert summary["errors"] == [{"line": line, "error": "timestamp must be building-local time without a UTC offset"}]
+            assert summary["start"] == datetime(2024, 3, 4, 10)
+
+    def test_period_inputs_report_incomplete_periods(self):
+        aggregator = IntervalAggregator()
+        timestamps = np.array(["2024-03-04T09:00", "2024-03-04T09:00", "2024-03-04T20:00"], dtype="datetime64[m]")
+        aggregator.add(timestamps, np.array([10.0, 12.0, 3.0]), np.array([1.0, 1.5, 0.5]), np.array([1, 0, 1]))
+        
+        periods, incomplete = aggregator.period_inputs(0.12, 0.95)
+        
+        assert [period["period"] for period in periods] == ["business_hours"]
+        assert periods[0]["current_electric_kwh"] == 10.0
+        assert periods[0]["baseline_gas_therms"] == 1.5
+        assert incomplete == ["after_hours", "weekend"]
+
+
+class TestIntervalEndpoint:
+    @pytest.fixture(autouse=True)
+    def fake_db(self, monkeypatch):
+        self.inserted = []
+        
+        async def insert_calculation(calculation):
+            self.inserted.append(calculation)
+            return "65f000000000000000000001"
+        
+        monkeypatch.setattr(main.db, "insert_calculation", insert_calculation)
+
+    def _post(self, body: bytes, params, content_type="text/csv"):
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.post(
+                    "/api/efficiency/intervals", content=body, params=params, headers={"Content-Type": content_type}
+                )
+        return asyncio.run(run())
+
+    def test_returns_period_inputs(self):
+        rows = _readings(days=14, step_minutes=60)
+        
+        response = self._post(_csv(rows), {"electric_rate": 0.12, "gas_rate": 0.95})
+        
+        assert response.status_code == 200
+        result = response.json()
+        assert result["rows"] == len(rows)
+        assert [period["period"] for period in result["periods"]] == ["business_hours", "after_hours", "weekend"]
+        business = result["periods"][0]
+        electric, _ = _expected_totals(rows)[("current", "business_hours")]
+        assert business["current_electric_kwh"] == pytest.approx(electric)
+        assert business["electric_rate"] == 0.12
+        assert self.inserted == []
+
+    def test_calculate_stores_the_calculation(self):
+        rows = _readings(days=14, step_minutes=60)
+        body = ("\n".join(json.dumps(row) for row in rows) + "\n").encode()
+        params = {
+            "electric_rate": 0.12, "gas_rate": 0.95, "calculate": "true",
+            "building_id": BUILDING_ID, "measure_name": "LED Retrofit"
+        }
+        
+        response = self._post(body, params, content_type="application/x-ndjson")
+        
+        assert response.status_code == 201
+        calculation = response.json()["calculation"]
+        assert calculation["id"] == "65f000000000000000000001"
+        assert len(self.inserted) == 1
+        assert self.inserted[0]["building_id"] == BUILDING_ID
+        assert len(self.inserted[0]["periods"]) == 3
+        assert calculation["summary"]["total_cost_savings"] == self.inserted[0]["summary"]["total_cost_savings"]
+
+    def test_invalid_requests_are_400(self):
+        body = _csv(_readings(days=1, step_minutes=60))
+        
+        assert self._post(body, {"electric_rate": 0.12, "gas_rate": 0.95, "days": "Funday"}).status_code == 400
+        assert self._post(body, {"electric_rate": 0.12, "gas_rate": 0.95, "time_range": "9-5"}).status_code == 400
+        assert self._post(b"when,kwh\n", {"electric_rate": 0.12, "gas_rate": 0.95}).status_code == 400
+        # Only current readings: nothing to compare against
+        response = self._post(
+            body.replace(b"baseline", b"current"),
+            {"electric_rate": 0.12, "gas_rate": 0.95, "calculate": "true", "building_id": BUILDING_ID, "measure_name": "LED"}
+        )
+        assert response.status_code == 400
+        assert self.inserted == []
@@ -0,0 +1,346 @@
+import asyncio
+import copy
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+import httpx
+import pytest
+from bson import ObjectId
+import main
+from jobs import (
+    JobRunner, JobSubmission, compute_chunk, format_job, CHUNK_STAGED, CHUNK_PENDING, CHUNK_RUNNING,
+    CHUNK_COMPLETED, CHUNK_FAILED, OPEN_CHUNK_STATES, JOB_RECEIVING, JOB_QUEUED, JOB_COMPLETED, JOB_FAILED
+)
+
+
+def _request(index: int, measure_name: str = "LED Retrofit"):
+    return {
+        "building_id": f"{index % 5:024x}",
+        "measure_name": measure_name,
+        "periods": [
+            {
+                "period": "business_hours",
+                "time_range": "08:00-18:00",
+                "days": ["Monday"],
+                "current_electric_kwh": 40000 + index,
+                "current_gas_therms": 3000,
+                "baseline_electric_kwh": 52000,
+                "baseline_gas_therms": 4100,
+                "electric_rate": 0.12,
+                "gas_rate": 0.95
+            }
+        ]
+    }
+
+
+async def _records(items):
+    for item in items:
+        yield item, None
+
+
+def crash_on_marker(requests_data):
+    # Kills the pool process the first time it sees a chunk, like an OOM kill
+    marker = requests_data[0]["measure_name"]
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return compute_chunk(requests_data)
+
+
+def always_fail(requests_data):
+    raise RuntimeError("bad chunk")
+
+
+def slow_compute(requests_data):
+    time.sleep(1)
+    return compute_chunk(requests_data)
+
+
+class FakeJobDatabase:
+    # In-memory stand-in for the job methods of Database, including the
+    # unique (job_id, job_index) index on calculations
+    def __init__(self):
+        self.state = "ready"
+        self.jobs = {}
+        self.chunks = []
+        self.calculations = {}
+
+    async def create_job(self):
+        job_id = str(ObjectId())
+        self.jobs[job_id] = {"_id": job_id, "status": JOB_RECEIVING, "created_at": datetime.now(timezone.utc)}
+        return job_id
+
+    async def insert_job_chunk(self, chunk):
+        self.chunks.append({**copy.deepcopy(chunk), "_id": ObjectId()})
+
+    async def queue_job(self, job_id, fields):
+        self.jobs[job_id].update(fields, status=JOB_QUEUED)
+        for chunk in self.chunks:
+            if chunk["job_id"] == job_id and chunk["status"] == CHUNK_STAGED:
+                chunk["status"] = CHUNK_PENDING
+        await self.finish_job_if_done(job_id)
+
+    async def abort_job(self, job_id, error):
+        self.jobs[job_id].update(status=JOB_FAILED, error=error)
+        self.chunks = [c for c in self.chunks if not (c["job_id"] == job_id and c["status"] == CHUNK_STAGED)]
+
+    async def claim_job_chunk(self, owner, lease_seconds):
+        now = datetime.now(timezone.utc)
+        for chunk in self.chunks:
+            expired = chunk["status"] == CHUNK_RUNNING and chunk["lease_expires_at"] < now
+            if chunk["status"] == CHUNK_PENDING or expired:
+                chunk.update(status=CHUNK_RUNNING, owner=owner, lease_expires_at=now + timedelta(seconds=lease_seconds))
+                chunk["attempts"] += 1
+                return copy.deepcopy(chunk)
+        return None
+
+    def _owned(self, chunk_id, owner):
+        for chunk in self.chunks:
+            if chunk["_id"] == chunk_id and chunk.get("owner") == owner and chunk["status"] == CHUNK_RUNNING:
+                return chunk
+        return None
+
+    async def complete_job_chunk(self, chunk_id, owner, stats):
+        chunk = self._owned(chunk_id, owner)
+        if chunk is None:
+            return False
+        chunk.update(status=CHUNK_COMPLETED, stats=stats)
+        chunk.pop("requests")
+        return True
+
+    async def renew_job_chunk(self, chunk_id, owner, lease_seconds):
+        chunk = self._owned(chunk_id, owner)
+        if chunk is None:
+            return False
+        chunk["lease_expires_at"] = datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)
+        return True
+
+    async def release_job_chunk(self, chunk_id, owner, error, failed):
+        chunk = self._owned(chunk_id, owner)
+        if chunk is not None:
+            chunk.update(status=CHUNK_FAILED if failed else CHUNK_PENDING, error=error)
+
+    async def finish_job_if_done(self, job_id):
+        chunks = [c for c in self.chunks if c["job_id"] == job_id]
+        job = self.jobs[job_id]
+        if job["status"] == JOB_QUEUED and not any(c["status"] in OPEN_CHUNK_STATES for c in chunks):
+            failed = any(c["status"] == CHUNK_FAILED for c in chunks)
+            job.update(status=JOB_FAILED if failed else JOB_COMPLETED, completed_at=datetime.now(timezone.utc))
+
+    async def get_job(self, job_id):
+        if job_id not in self.jobs:
+            return None
+        chunks = [c for c in self.chunks if c["job_id"] == job_id]
+        return format_job(self.jobs[job_id], chunks)
+
+    async def insert_calculations_unordered(self, calculations):
+        results = []
+        for calculation in calculations:
+            key = (calculation["job_id"], calculation["job_index"])
+            if key in self.calculations:
+                results.append((None, "E11000 duplicate key error"))
+                continue
+            self.calculations[key] = calculation
+            results.append((str(ObjectId()), None))
+        return results
+
+
+def _submit(database, items, chunk_size=10):
+    return asyncio.run(JobSubmission(database, chunk_size=chunk_size).run(_records(items)))
+
+
+def _drain(runner):
+    async def run():
+        try:
+            await runner.run_until_idle()
+        finally:
+            runner.close()
+    asyncio.run(run())
+
+
+class TestJobSubmission:
+    def test_records_are_staged_in_chunks_then_queued(self):
+        database = FakeJobDatabase()
+        items = [_request(i) for i in range(25)] + [{"building_id": "nope"}]
+        
+        job_id = _submit(database, items)
+        
+        job = database.jobs[job_id]
+        assert job["status"] == JOB_QUEUED
+        assert job["total_calculations"] == 25
+        assert job["invalid_count"] == 1
+        assert job["errors"][0]["index"] == 25
+        assert [c["size"] for c in database.chunks] == [10, 10, 5]
+        assert [c["first_index"] for c in database.chunks] == [0, 10, 20]
+        assert {c["status"] for c in database.chunks} == {CHUNK_PENDING}
+
+    def test_failed_upload_never_becomes_runnable(self):
+        database = FakeJobDatabase()
+        
+        async def broken():
+            for i in range(15):
+                yield _request(i), None
+            raise ValueError("Invalid JSON")
+        
+        with pytest.raises(ValueError):
+            asyncio.run(JobSubmission(database, chunk_size=10).run(broken()))
+        
+        job = next(iter(database.jobs.values()))
+        assert job["status"] == JOB_FAILED
+        assert database.chunks == []
+
+    def test_cancelled_upload_is_aborted(self):
+        database = FakeJobDatabase()
+        
+        async def stalled():
+            yield _request(0), None
+            await asyncio.Event().wait()
+        
+        async def run():
+            submission = asyncio.create_task(JobSubmission(database, chunk_size=10).run(stalled()))
+            await asyncio.sleep(0.01)
+            submission.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await submission
+            await asyncio.sleep(0)
+        
+        asyncio.run(run())
+        
+        job = next(iter(database.jobs.values()))
+        assert job["status"] == JOB_FAILED
+        assert job["error"] == "Upload cancelled"
+
+    def test_empty_job_completes_immediately(self):
+        database = FakeJobDatabase()
+        
+        job_id = _submit(database, [])
+        
+        assert database.jobs[job_id]["status"] == JOB_COMPLETED
+
+
+class TestJobRunner:
+    def test_chunks_are_computed_in_the_process_pool(self):
+        database = FakeJobDatabase()
+        items = [_request(i) for i in range(45)]
+        job_id = _submit(database, items)
+        inserted_buildings = set()
+        
+        _drain(JobRunner(database, processes=2, on_inserted=inserted_buildings.update))
+        
+        job = asyncio.run(database.get_job(job_id))
+        assert job["status"] == JOB_COMPLETED
+        assert job["progress_percent"] == 100.0
+        assert job["result"]["inserted_count"] == 45
+        assert sorted(index for _, index in database.calculations) == list(range(45))
+        expected = compute_chunk(items)
+        assert job["result"]["total_cost_savings"] == round(sum(r["summary"]["total_cost_savings"] for r in expected), 2)
+        assert inserted_buildings == {item["building_id"] for item in items}
+
+    def test_expired_lease_is_resumed_without_duplicates(self):
+        database = FakeJobDatabase()
+        job_id = _submit(database, [_request(i) for i in range(10)])
+        # A worker claimed the chunk, stored part of it and died
+        dead = asyncio.run(database.claim_job_chunk("dead-worker", lease_seconds=-1))
+        for offset, result in enumerate(compute_chunk(dead["requests"])[:4]):
+            database.calculations[(job_id, offset)] = result
+        
+        _drain(JobRunner(database, processes=1))
+        
+        job = asyncio.run(database.get_job(job_id))
+        assert job["status"] == JOB_COMPLETED
+        assert job["result"]["inserted_count"] == 10
+        assert len(database.calculations) == 10
+        assert database.chunks[0]["attempts"] == 2
+
+    def test_lease_is_renewed_while_a_slow_chunk_runs(self):
+        database = FakeJobDatabase()
+        job_id = _submit(database, [_request(i) for i in range(5)])
+        runner = JobRunner(database, processes=1, compute=slow_compute, lease_seconds=0.3)
+        
+        async def run():
+            try:
+                draining = asyncio.create_task(runner.run_until_idle())
+                while database.chunks[0]["status"] != CHUNK_RUNNING:
+                    await asyncio.sleep(0.01)
+                stolen = []
+                while not draining.done():
+                    stolen.append(await database.claim_job_chunk("other-worker", 0.3))
+                    await asyncio.sleep(0.1)
+                await draining
+                return stolen
+            finally:
+                runner.close()
+        
+        stolen = asyncio.run(run())
+        
+        job = asyncio.run(database.get_job(job_id))
+        assert stolen and not any(stolen)
+        assert job["status"] == JOB_COMPLETED
+        assert database.chunks[0]["attempts"] == 1
+
+    def test_dead_pool_process_is_replaced_and_chunk_retried(self, tmp_path):
+        database = FakeJobDatabase()
+        marker = str(tmp_path / "crashed")
+        job_id = _submit(database, [_request(i, measure_name=marker) for i in range(5)])
+        
+        _drain(JobRunner(database, processes=1, compute=crash_on_marker))
+        
+        job = asyncio.run(database.get_job(job_id))
+        assert os.path.exists(marker)
+        assert job["status"] == JOB_COMPLETED
+        assert job["result"]["inserted_count"] == 5
+
+    def test_chunk_fails_after_max_attempts(self):
+        database = FakeJobDatabase()
+        job_id = _submit(database, [_request(i) for i in range(15)])
+        
+        _drain(JobRunner(database, processes=1, compute=always_fail, max_attempts=2))
+        
+        job = asyncio.run(database.get_job(job_id))
+        assert job["status"] == JOB_FAILED
+        assert job["chunks"]["failed"] == 2
+        assert job["result"]["failed_count"] == 15
+        assert job["chunk_errors"][0]["error"] == "bad chunk"
+
+
+class TestJobEndpoints:
+    @pytest.fixture(autouse=True)
+    def fake_db(self, monkeypatch):
+        self.database = FakeJobDatabase()
+        for name in ["create_job", "insert_job_chunk", "queue_job", "abort_job", "get_job"]:
+            monkeypatch.setattr(main.db, name, getattr(self.database, name))
+
+    def _request(self, method, path, **kwargs):
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.request(method, path, **kwargs)
+        return asyncio.run(run())
+
+    def test_submit_ndjson_returns_queued_job(self):
+        body = "\n".join(json.dumps(_request(i)) for i in range(3)) + "\n{not json}\n"
+        
+        response = self._request(
+            "POST", "/api/jobs/calculate", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+        
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "queued"
+        assert job["total_calculations"] == 3
+        assert job["invalid_count"] == 1
+        assert job["chunks"]["pending"] == 1
+        
+        status = self._request("GET", f"/api/jobs/{job['job_id']}")
+        assert status.status_code == 200
+        assert status.json()["job_id"] == job["job_id"]
+
+    def test_unknown_job_is_404(self):
+        assert self._request("GET", f"/api/jobs/{ObjectId()}").status_code == 404
+        assert self._request("GET", "/api/jobs/not-an-id").status_code == 404
+
+    def test_body_that_is_not_an_array_is_400(self):
+        response = self._request("POST", "/api/jobs/calculate", json={"calculations": []})
+        
+        assert response.status_code == 400
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from metrics import Counter, Histogram, MetricsRegistry, timed_operation, DB_OPERATION_LATENCY, registry
+from sqlite_database import SQLiteDatabase
+
+
+class TestCounter:
+    def test_increments_per_label_set(self):
+        counter = Counter("calculations_total", "help", ["source"])
+        counter.inc(1, "calculate")
+        counter.inc(3, "batch")
+        counter.inc(2, "batch")
+        
+        assert counter.value("calculate") == 1
+        assert counter.value("batch") == 5
+        assert 'calculations_total{source="batch"} 5.0' in counter.render()
+
+
+class TestHistogram:
+    def test_observations_fall_in_buckets(self):
+        histogram = Histogram("latency_seconds", "help", ["route"], buckets=(0.1, 1.0))
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5.0, "/a")
+        
+        lines = histogram.render()
+        
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 1.0' in lines
+        assert 'latency_seconds_bucket{route="/a",le="1.0"} 2.0' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3.0' in lines
+        assert 'latency_seconds_sum{route="/a"} 5.55' in lines
+        assert histogram.count("/a") == 3
+
+    def test_registry_renders_help_and_type(self):
+        test_registry = MetricsRegistry()
+        test_registry.histogram("op_seconds", "Operation latency")
+        
+        text = test_registry.render()
+        
+        assert "# HELP op_seconds Operation latency" in text
+        assert "# TYPE op_seconds histogram" in text
+
+
+class TestTimedOperation:
+    def test_times_coroutines(self):
+        @timed_operation
+        async def sample_coroutine_operation():
+            return 42
+        
+        before = DB_OPERATION_LATENCY.count("sample_coroutine_operation", "ok")
+        
+        assert asyncio.run(sample_coroutine_operation()) == 42
+        assert DB_OPERATION_LATENCY.count("sample_coroutine_operation", "ok") == before + 1
+
+    def test_sqlite_backend_records_under_the_same_metric(self):
+        database = SQLiteDatabase(":memory:")
+        asyncio.run(database.connect())
+        before = DB_OPERATION_LATENCY.count("get_building_summary", "ok")
+        
+        asyncio.run(database.get_building_summary("0" * 24))
+        database.disconnect()
+        
+        assert DB_OPERATION_LATENCY.count("get_building_summary", "ok") == before + 1
+        assert "# TYPE db_operation_duration_seconds histogram" in registry.render()
+
+    def test_times_async_generators_until_exhausted(self):
+        @timed_operation
+        async def sample_stream_operation():
+            for i in range(3):
+                yield i
+        
+        async def collect():
+            return [item async for item in sample_stream_operation()]
+        
+        assert asyncio.run(collect()) == [0, 1, 2]
+        assert DB_OPERATION_LATENCY.count("sample_stream_operation", "ok") == 1
+
+    def test_records_errors(self):
+        @timed_operation
+        async def sample_failing_operation():
+            raise RuntimeError("boom")
+        
+        with pytest.raises(RuntimeError):
+            asyncio.run(sample_failing_operation())
+        assert DB_OPERATION_LATENCY.count("sample_failing_operation", "error") == 1
+
+    def test_disabled_registry_records_nothing(self):
+        @timed_operation
+        async def sample_disabled_operation():
+            return 1
+        
+        registry.enabled = False
+        try:
+            asyncio.run(sample_disabled_operation())
+        finally:
+            registry.enabled = True
+        assert DB_OPERATION_LATENCY.count("sample_disabled_operation", "ok") == 0
@@ -0,0 +1,66 @@
+import pytest
+from datetime import datetime, timezone
+from bson import ObjectId
+from pagination import (
+    encode_cursor,
+    decode_cursor,
+    keyset_filter,
+    parse_fields,
+    build_projection
+)
+
+
+class TestCursor:
+    def test_cursor_round_trip(self):
+        created_at = datetime(2024, 1, 10, 12, 0, 0, 123000, tzinfo=timezone.utc)
+        document_id = ObjectId()
+        
+        decoded_created_at, decoded_id = decode_cursor(encode_cursor(created_at, document_id))
+        
+        assert decoded_created_at == created_at
+        assert decoded_id == document_id
+
+    def test_cursor_accepts_naive_mongo_datetimes(self):
+        created_at = datetime(2024, 1, 10, 12, 0, 0, 456000)
+        document_id = ObjectId()
+        
+        decoded_created_at, _ = decode_cursor(encode_cursor(created_at, document_id))
+        
+        assert decoded_created_at == created_at.replace(tzinfo=timezone.utc)
+
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor(datetime.now(timezone.utc), ObjectId())
+        
+        assert all(c.isalnum() or c in "-_" for c in cursor)
+
+    def test_invalid_cursor_raises_value_error(self):
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_keyset_filter_breaks_ties_on_id(self):
+        created_at = datetime(2024, 1, 10, tzinfo=timezone.utc)
+        document_id = ObjectId()
+        
+        query = keyset_filter(created_at, document_id)
+        
+        assert query["$or"][0] == {"created_at": {"$lt": created_at}}
+        assert query["$or"][1] == {"created_at": created_at, "_id": {"$lt": document_id}}
+
+
+class TestFieldProjection:
+    def test_parse_fields_none(self):
+        assert parse_fields(None) is None
+        assert parse_fields("") is None
+
+    def test_parse_fields_strips_whitespace(self):
+        assert parse_fields("summary, measure_name") == ["summary", "measure_name"]
+
+    def test_parse_fields_rejects_unknown(self):
+        with pytest.raises(ValueError):
+            parse_fields("summary,password")
+
+    def test_projection_always_includes_cursor_fields(self):
+        projection = build_projection(["summary"])
+        
+        assert projection == {"_id": 1, "created_at": 1, "summary": 1}
+        assert "periods" not in projection
@@ -0,0 +1,77 @@
+from datetime import datetime
+from portfolio import portfolio_pipeline, format_portfolio, PORTFOLIO_INDEX_FIELDS
+
+
+class TestPortfolioPipeline:
+    def test_date_range_match(self):
+        start = datetime(2024, 1, 1)
+        end = datetime(2025, 1, 1)
+        
+        pipeline = portfolio_pipeline(start=start, end=end)
+        
+        assert pipeline[0] == {"$match": {"created_at": {"$gte": start, "$lt": end}}}
+
+    def test_projection_only_reads_indexed_fields(self):
+        projection = portfolio_pipeline()[1]["$project"]
+        
+        assert projection.pop("_id") == 0
+        assert sorted(projection) == sorted(PORTFOLIO_INDEX_FIELDS)
+
+    def test_top_and_bottom_limited(self):
+        facets = portfolio_pipeline(top_n=5)[2]["$facet"]
+        
+        assert facets["top_buildings"][-1] == {"$limit": 5}
+        assert facets["top_buildings"][-2]["$sort"]["total_cost_savings"] == -1
+        assert facets["bottom_buildings"][-2]["$sort"]["total_cost_savings"] == 1
+        assert "buckets" not in facets
+
+    def test_monthly_buckets(self):
+        facets = portfolio_pipeline(bucket="month")[2]["$facet"]
+        
+        group_id = facets["buckets"][0]["$group"]["_id"]
+        assert group_id == {"$dateTrunc": {"date": "$created_at", "unit": "month"}}
+
+
+class TestFormatPortfolio:
+    def test_formats_facet_result(self):
+        result = {
+            "totals": [{
+                "_id": None,
+                "calculation_count": 3,
+                "total_electric_savings_kwh": 21000.004,
+                "total_gas_savings_therms": 2700.0,
+                "total_cost_savings": 5085.126,
+                "average_efficiency_improvement_percent": 16.7233
+            }],
+            "grade_distribution": [{"_id": "A (Very Good)", "count": 3}],
+            "building_count": [{"count": 2}],
+            "top_buildings": [{"_id": "b1", "calculation_count": 2, "total_cost_savings": 3390.0}],
+            "bottom_buildings": [{"_id": "b2", "calculation_count": 1, "total_cost_savings": 1695.0}],
+            "buckets": [{"_id": datetime(2024, 1, 1), "calculation_count": 3, "total_cost_savings": 5085.126}]
+        }
+        
+        portfolio = format_portfolio(result)
+        
+        assert portfolio["building_count"] == 2
+        assert portfolio["total_cost_savings"] == 5085.13
+        assert portfolio["average_efficiency_improvement_percent"] == 16.72
+        assert portfolio["grade_distribution"] == {"A (Very Good)": 3}
+        assert portfolio["top_buildings"][0]["building_id"] == "b1"
+        assert portfolio["bottom_buildings"][0]["total_gas_savings_therms"] == 0.0
+        assert portfolio["buckets"][0]["period_start"] == datetime(2024, 1, 1)
+
+    def test_empty_collection(self):
+        result = {
+            "totals": [],
+            "grade_distribution": [],
+            "building_count": [],
+            "top_buildings": [],
+            "bottom_buildings": []
+        }
+        
+        portfolio = format_portfolio(result)
+        
+        assert portfolio["building_count"] == 0
+        assert portfolio["calculation_count"] == 0
+        assert portfolio["total_cost_savings"] == 0.0
+        assert "buckets" not in portfolio
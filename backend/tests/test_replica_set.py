@@ -0,0 +1,229 @@
+import asyncio
+import shutil
+import socket
+import subprocess
+import time
+import pytest
+from pymongo import MongoClient, WriteConcern, monitoring
+from pymongo.errors import PyMongoError
+import database as database_module
+from calculations import process_efficiency_calculation_batch
+from database import Database, make_read_preference, INTERACTIVE_WRITES
+
+MONGOD = shutil.which("mongod")
+REPLICA_SET = "rs0"
+DATABASE_NAME = "energy_efficiency_replica_set_test"
+BUILDING = "60f7b3b3e4b0f3d4c8b4567a"
+
+# Starts real mongod processes; skipped where MongoDB is not installed
+pytestmark = pytest.mark.skipif(MONGOD is None, reason="mongod is not installed")
+
+
+def _request(index: int):
+    return {
+        "building_id": BUILDING,
+        "measure_name": f"Measure {index}",
+        "periods": [
+            {
+                "period": "business_hours",
+                "time_range": "08:00-18:00",
+                "days": ["Monday"],
+                "current_electric_kwh": 40000 + index,
+                "current_gas_therms": 3000,
+                "baseline_electric_kwh": 52000,
+                "baseline_gas_therms": 4100,
+                "electric_rate": 0.12,
+                "gas_rate": 0.95
+            }
+        ]
+    }
+
+
+def _calculations(count: int):
+    return process_efficiency_calculation_batch([_request(index) for index in range(count)])
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _wait_for(predicate, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if predicate():
+                return
+        except PyMongoError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError("replica set did not come up")
+
+
+class CommandRecorder(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        host, port = event.connection_id
+        self.commands.append((event.command_name, event.command, f"{host}:{port}"))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+@pytest.fixture(scope="module")
+def replica_set(tmp_path_factory):
+    # Three local members; the first has the highest priority, so it is the primary
+    ports = [_free_port() for _ in range(3)]
+    hosts = [f"127.0.0.1:{port}" for port in ports]
+    processes = [
+        subprocess.Popen(
+            [
+                MONGOD, "--replSet", REPLICA_SET, "--port", str(port), "--bind_ip", "127.0.0.1",
+                "--dbpath", str(tmp_path_factory.mktemp(f"mongod-{port}")), "--oplogSize", "64", "--quiet"
+            ],
+            stdout=subprocess.DEVNULL
+        )
+        for port in ports
+    ]
+    try:
+        seed = MongoClient(hosts[0], directConnection=True, serverSelectionTimeoutMS=1000)
+        _wait_for(lambda: seed.admin.command("ping"))
+        seed.admin.command("replSetInitiate", {
+            "_id": REPLICA_SET,
+            "members": [
+                {"_id": index, "host": host, "priority": 2 if index == 0 else 1}
+                for index, host in enumerate(hosts)
+            ]
+        })
+        
+        def healthy():
+            members = seed.admin.command("replSetGetStatus")["members"]
+            return [member["stateStr"] for member in members] == ["PRIMARY", "SECONDARY", "SECONDARY"]
+        
+        _wait_for(healthy)
+        seed.close()
+        yield {
+            "url": f"mongodb://{','.join(hosts)}/?replicaSet={REPLICA_SET}",
+            "primary": hosts[0],
+            "secondaries": hosts[1:],
+        }
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+
+
+@pytest.fixture
+def database(replica_set, monkeypatch):
+    recorder = CommandRecorder()
+    pool_options = Database._pool_options
+    monkeypatch.setattr(
+        Database,
+        "_pool_options",
+        lambda self: {**pool_options(self), "event_listeners": pool_options(self)["event_listeners"] + [recorder]}
+    )
+    monkeypatch.setattr(database_module, "MONGODB_URL", replica_set["url"])
+    monkeypatch.setattr(database_module, "MONGODB_DB_NAME", DATABASE_NAME)
+    database = Database()
+    database.read_preference = make_read_preference("secondary", 90)
+    database.recorder = recorder
+    return database
+
+
+def _run(database: Database, scenario):
+    async def run():
+        await database.connect()
+        try:
+            return await scenario()
+        finally:
+            await database.client.drop_database(DATABASE_NAME)
+            database.disconnect()
+    return asyncio.run(run())
+
+
+def _calculation_commands(recorder: CommandRecorder, name: str):
+    return [
+        (command, address) for command_name, command, address in recorder.commands
+        if command_name == name and command.get(name) == "efficiency_calculations"
+    ]
+
+
+class TestReplicaSetRouting:
+    def test_dashboard_reads_are_served_by_secondaries(self, database, replica_set):
+        async def scenario():
+            # Acknowledged by every member, so whichever secondary is picked has it
+            database.write_concerns[INTERACTIVE_WRITES] = WriteConcern(w=3)
+            await database.insert_calculations(_calculations(3))
+            database.recorder.commands.clear()
+            async with database.read_session():
+                version = await database.get_building_version(BUILDING)
+                history = await database.find_by_building_id(BUILDING)
+                summary = await database.get_building_summary(BUILDING)
+            await database.find_existing_calculation("no-such-hash")
+            return version, history, summary
+        
+        version, history, summary = _run(database, scenario)
+        finds = _calculation_commands(database.recorder, "find")
+        
+        assert len(history) == 3
+        assert version.startswith(summary["_id"])
+        dashboard = [address for command, address in finds if "building_id" in command["filter"]]
+        deduplication = [address for command, address in finds if "request_hash" in command["filter"]]
+        assert len(dashboard) == 3
+        assert set(dashboard) <= set(replica_set["secondaries"])
+        assert deduplication == [replica_set["primary"]]
+
+    def test_reads_in_one_session_wait_for_earlier_ones(self, database):
+        async def scenario():
+            database.write_concerns[INTERACTIVE_WRITES] = WriteConcern(w=3)
+            await database.insert_calculation(_calculations(1)[0])
+            database.recorder.commands.clear()
+            async with database.read_session():
+                await database.get_building_version(BUILDING)
+                await database.get_building_summary(BUILDING)
+        
+        _run(database, scenario)
+        (first, _), (second, _) = _calculation_commands(database.recorder, "find")
+        
+        assert first["lsid"] == second["lsid"]
+        assert "afterClusterTime" in second["readConcern"]
+
+    def test_write_concern_profiles(self, database):
+        async def scenario():
+            database.recorder.commands.clear()
+            await database.insert_calculation(_calculations(1)[0])
+            await database.insert_calculations_unordered(_calculations(2))
+        
+        _run(database, scenario)
+        inserts = _calculation_commands(database.recorder, "insert")
+        
+        assert [command["writeConcern"]["w"] for command, _ in inserts] == ["majority", 1]
+        assert all(command["writeConcern"]["wtimeout"] == 10000 for command, _ in inserts)
+
+
+class TestJobRetries:
+    def test_retried_chunk_restores_summaries_of_stored_calculations(self, database):
+        async def scenario():
+            calculations = _calculations(3)
+            for index, calculation in enumerate(calculations):
+                calculation.update(job_id="job-1", job_index=index)
+            await database.insert_calculations_unordered([dict(c) for c in calculations[:2]])
+            # The earlier attempt stored its calculations, then died before the summary write
+            await database.db[database.summaries_collection_name].delete_many({})
+            
+            first = await database.insert_calculations_unordered([dict(c) for c in calculations])
+            second = await database.insert_calculations_unordered([dict(c) for c in calculations])
+            return first, second, await database.find_building_summaries([BUILDING])
+        
+        first, second, summaries = _run(database, scenario)
+        
+        assert [error is None for _, error in first] == [False, False, True]
+        assert all(error for _, error in second)
+        assert summaries[0]["calculation_count"] == 3
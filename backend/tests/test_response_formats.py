@@ -0,0 +1,183 @@
+import asyncio
+import gzip
+import zlib
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+import compression
+import serialization
+from compression import CompressionMiddleware, Compressor, negotiate_encoding
+from serialization import (
+    negotiate_media_type, to_columnar, encode_calculations,
+    JSON_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+)
+from tests.helpers import build_page
+
+LARGE = b'{"electric_efficiency_improvement_percent": 13.46}' * 100
+
+
+async def large(request):
+    return Response(LARGE, media_type="application/json")
+
+
+async def small(request):
+    return Response(b'{"ok": true}', media_type="application/json")
+
+
+async def streamed(request):
+    async def chunks():
+        for _ in range(3):
+            yield LARGE
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+async def events(request):
+    return Response(LARGE, media_type="text/event-stream")
+
+
+app = CompressionMiddleware(Starlette(routes=[
+    Route("/large", large), Route("/small", small), Route("/streamed", streamed), Route("/events", events)
+]))
+
+
+def get(path, accept_encoding="gzip"):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers={"Accept-Encoding": accept_encoding})
+    return asyncio.run(run())
+
+
+class TestMediaTypeNegotiation:
+    def test_defaults_to_json(self):
+        assert negotiate_media_type(None) == JSON_MEDIA_TYPE
+        assert negotiate_media_type("*/*") == JSON_MEDIA_TYPE
+        assert negotiate_media_type("text/html") == JSON_MEDIA_TYPE
+
+    def test_columnar_requested(self):
+        assert negotiate_media_type(f"{COLUMNAR_MEDIA_TYPE}, application/json;q=0.5") == COLUMNAR_MEDIA_TYPE
+
+    def test_quality_wins(self):
+        assert negotiate_media_type(f"{COLUMNAR_MEDIA_TYPE};q=0.2, application/json") == JSON_MEDIA_TYPE
+
+    def test_msgpack_only_when_installed(self, monkeypatch):
+        monkeypatch.setattr(serialization, "msgpack", None)
+        
+        assert negotiate_media_type(MSGPACK_MEDIA_TYPE) == JSON_MEDIA_TYPE
+
+
+class TestColumnar:
+    def test_round_trips_rows(self):
+        page = build_page(5)
+        
+        columnar = to_columnar(page)
+        
+        assert columnar["count"] == 5
+        for index, doc in enumerate(page):
+            assert columnar["columns"]["building_id"][index] == doc["building_id"]
+            for key, value in doc["summary"].items():
+                assert columnar["columns"][f"summary.{key}"][index] == value
+        rows = [i for i, calculation in enumerate(columnar["periods"]["calculation"]) if calculation == 2]
+        assert [columnar["periods"]["total_cost_savings"][i] for i in rows] == \
+            [period["total_cost_savings"] for period in page[2]["periods"]]
+
+    def test_projected_documents_without_periods(self):
+        columnar = to_columnar([{"_id": "a", "summary": {"x": 1}}, {"_id": "b", "summary": {"x": 2}}])
+        
+        assert columnar == {"count": 2, "columns": {"_id": ["a", "b"], "summary.x": [1, 2]}}
+
+    def test_smaller_than_json(self):
+        page = build_page(20)
+        
+        assert len(encode_calculations(page, COLUMNAR_MEDIA_TYPE)) < len(encode_calculations(page, JSON_MEDIA_TYPE)) / 2
+
+    def test_msgpack_encoding(self):
+        msgpack = pytest.importorskip("msgpack")
+        page = build_page(3)
+        
+        decoded = msgpack.unpackb(encode_calculations(page, MSGPACK_MEDIA_TYPE))
+        
+        assert [doc["_id"] for doc in decoded] == [doc["_id"] for doc in page]
+        assert decoded[0]["created_at"] == page[0]["created_at"].isoformat()
+
+
+class TestEncodingNegotiation:
+    def test_prefers_brotli_when_available(self, monkeypatch):
+        monkeypatch.setattr(compression, "brotli", object())
+        
+        assert negotiate_encoding("gzip, deflate, br") == "br"
+        assert negotiate_encoding("gzip, br;q=0.5") == "gzip"
+
+    def test_gzip_without_brotli(self, monkeypatch):
+        monkeypatch.setattr(compression, "brotli", None)
+        
+        assert negotiate_encoding("gzip, br") == "gzip"
+        assert negotiate_encoding("br") is None
+        assert negotiate_encoding("*") == "gzip"
+        assert negotiate_encoding("gzip;q=0") is None
+        assert negotiate_encoding(None) is None
+
+
+class TestCompressionMiddleware:
+    def test_large_body_compressed(self):
+        response = get("/large")
+        
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < len(LARGE) / 10
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.content == LARGE
+
+    def test_small_body_untouched(self):
+        response = get("/small")
+        
+        assert "content-encoding" not in response.headers
+        assert response.content == b'{"ok": true}'
+
+    def test_identity_when_not_accepted(self):
+        response = get("/large", accept_encoding="identity")
+        
+        assert "content-encoding" not in response.headers
+        assert response.content == LARGE
+
+    def test_streaming_body_compressed_per_chunk(self):
+        response = get("/streamed")
+        
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.content == LARGE * 3
+
+    def test_brotli_requests_fall_back_to_gzip_without_the_package(self, monkeypatch):
+        monkeypatch.setattr(compression, "brotli", None)
+        
+        preferred = get("/large", accept_encoding="br, gzip")
+        brotli_only = get("/large", accept_encoding="br")
+        
+        assert preferred.headers["content-encoding"] == "gzip"
+        assert preferred.content == LARGE
+        assert "content-encoding" not in brotli_only.headers
+        assert brotli_only.content == LARGE
+
+    def test_brotli_used_when_installed(self):
+        pytest.importorskip("brotli")
+        
+        response = get("/large", accept_encoding="br, gzip")
+        
+        assert response.headers["content-encoding"] == "br"
+        # httpx decodes br itself when brotli is installed
+        assert response.content == LARGE
+
+    def test_event_streams_are_not_buffered(self):
+        response = get("/events")
+        
+        assert "content-encoding" not in response.headers
+
+    def test_streamed_chunks_decode_independently(self):
+        compressor = Compressor("gzip")
+        decompressor = zlib.decompressobj(31)
+        
+        first = compressor.compress(LARGE)
+        
+        assert decompressor.decompress(first) == LARGE
+        assert gzip.decompress(first + compressor.finish()) == LARGE
@@ -0,0 +1,222 @@
+import asyncio
+import copy
+import json
+import random
+from datetime import datetime
+import httpx
+import pytest
+import main
+from cache import response_cache
+from calculations import process_efficiency_calculation
+from models import RateScenario, ScenarioRequest, VALID_PERIODS
+from scenarios import ScenarioPricer, scenario_hash, price_scenarios, stream_scenario_rows, rate_vectors
+
+RATES = {"electric_rate": 0.12, "gas_rate": 0.95}
+
+
+def _calculation(index: int, rng: random.Random, periods=VALID_PERIODS):
+    doc = process_efficiency_calculation({
+        "building_id": f"building-{index % 7}",
+        "measure_name": "LED Retrofit",
+        "periods": [
+            {
+                "period": period,
+                "time_range": "08:00-18:00",
+                "days": ["Monday"],
+                "current_electric_kwh": rng.uniform(1000, 50000),
+                "current_gas_therms": rng.uniform(100, 4000),
+                "baseline_electric_kwh": rng.uniform(1000, 60000),
+                "baseline_gas_therms": rng.uniform(100, 5000),
+                **RATES
+            }
+            for period in periods
+        ]
+    })
+    doc["_id"] = f"{index:024x}"
+    doc["created_at"] = datetime(2024, 1, 1)
+    return doc
+
+
+def _calculations(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [_calculation(i, rng, VALID_PERIODS[:1 + i % 3]) for i in range(count)]
+
+
+async def _stream(docs):
+    for doc in docs:
+        yield doc
+
+
+def _post(path, payload):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=payload)
+    return asyncio.run(run())
+
+
+class TestRatePricing:
+    def test_original_rates_reproduce_stored_savings(self):
+        docs = _calculations(500)
+        pricer = ScenarioPricer([RateScenario(name="current", **RATES)])
+        
+        rows = pricer.price(docs)
+        
+        for doc, row in zip(docs, rows):
+            repriced = row["scenarios"]["current"]
+            assert repriced["total_cost_savings"] == doc["summary"]["total_cost_savings"]
+            assert repriced["delta_cost_savings"] == 0.0
+            assert repriced["average_efficiency_improvement_percent"] == doc["summary"]["average_efficiency_improvement_percent"]
+            assert repriced["overall_performance_grade"] == doc["summary"]["overall_performance_grade"]
+
+    def test_matches_scalar_calculation_at_new_rates(self):
+        docs = _calculations(50)
+        new_rates = {"electric_rate": 0.2, "gas_rate": 1.4}
+        pricer = ScenarioPricer([RateScenario(name="tariff", **new_rates)])
+        
+        rows = pricer.price(docs)
+        
+        for doc, row in zip(docs, rows):
+            expected = process_efficiency_calculation({
+                "building_id": doc["building_id"],
+                "measure_name": doc["measure_name"],
+                "periods": [{**period, **new_rates} for period in doc["periods"]]
+            })
+            assert row["scenarios"]["tariff"]["total_cost_savings"] == expected["summary"]["total_cost_savings"]
+
+    def test_time_of_use_overrides_one_period(self):
+        scenario = RateScenario(
+            name="tou",
+            **RATES,
+            time_of_use={"weekend": {"electric_rate": 0.05, "gas_rate": 0.5}}
+        )
+        
+        electric, gas = rate_vectors(scenario)
+        
+        assert dict(zip(VALID_PERIODS, electric.tolist())) == {
+            "business_hours": 0.12, "after_hours": 0.12, "weekend": 0.05
+        }
+        assert gas.tolist()[VALID_PERIODS.index("weekend")] == 0.5
+
+    def test_stored_documents_are_not_modified(self):
+        docs = _calculations(20)
+        original = copy.deepcopy(docs)
+        
+        ScenarioPricer([RateScenario(name="a", electric_rate=0.3, gas_rate=2.0)]).price(docs)
+        
+        assert docs == original
+
+    def test_totals_accumulate_across_chunks(self):
+        docs = _calculations(300)
+        scenarios = [RateScenario(name="current", **RATES), RateScenario(name="high", electric_rate=0.3, gas_rate=2.0)]
+        whole = ScenarioPricer(scenarios)
+        whole.price(docs)
+        
+        chunked = asyncio.run(price_scenarios(ScenarioPricer(scenarios), _stream(docs), chunk_size=64))
+        
+        assert chunked == whole.totals()
+        assert chunked["calculation_count"] == 300
+        assert chunked["building_count"] == 7
+        assert chunked["scenarios"][0]["delta_cost_savings"] == 0.0
+        assert sum(chunked["scenarios"][1]["grade_distribution"].values()) == 300
+
+    def test_stream_emits_one_line_per_calculation(self):
+        docs = _calculations(130)
+        
+        async def collect():
+            pricer = ScenarioPricer([RateScenario(name="current", **RATES)])
+            return b"".join([chunk async for chunk in stream_scenario_rows(pricer, _stream(docs), chunk_size=50)])
+        
+        lines = asyncio.run(collect()).splitlines()
+        
+        assert len(lines) == 130
+        assert json.loads(lines[0])["calculation_id"] == docs[0]["_id"]
+
+
+class TestScenarioRequest:
+    def test_duplicate_names_rejected(self):
+        with pytest.raises(ValueError):
+            ScenarioRequest(scenarios=[{"name": "a", **RATES}, {"name": "a", **RATES}])
+
+    def test_unknown_time_of_use_period_rejected(self):
+        with pytest.raises(ValueError):
+            RateScenario(name="a", **RATES, time_of_use={"night": RATES})
+
+    def test_hash_is_stable_and_rate_sensitive(self):
+        payload = {"scenarios": [{"name": "a", **RATES}], "building_ids": ["b1"]}
+        
+        assert scenario_hash(ScenarioRequest(**payload)) == scenario_hash(ScenarioRequest(**payload))
+        changed = {"scenarios": [{"name": "a", "electric_rate": 0.13, "gas_rate": 0.95}], "building_ids": ["b1"]}
+        assert scenario_hash(ScenarioRequest(**changed)) != scenario_hash(ScenarioRequest(**payload))
+
+
+class TestScenarioEndpoints:
+    @pytest.fixture(autouse=True)
+    def fake_db(self, monkeypatch):
+        response_cache.clear()
+        self.docs = _calculations(40)
+        self.stream_calls = []
+        self.version = "v1"
+        
+        def stream_calculations(**kwargs):
+            self.stream_calls.append(kwargs)
+            return _stream(self.docs)
+        
+        async def get_collection_version():
+            return self.version
+        
+        monkeypatch.setattr(main.db, "stream_calculations", stream_calculations)
+        monkeypatch.setattr(main.db, "get_collection_version", get_collection_version)
+        yield
+        response_cache.clear()
+
+    def test_totals_are_cached_by_scenario_hash(self):
+        payload = {"scenarios": [{"name": "current", **RATES}]}
+        
+        first = _post("/api/efficiency/scenarios", payload)
+        second = _post("/api/efficiency/scenarios", payload)
+        
+        assert first.status_code == 200
+        assert first.json() == second.json()
+        assert first.json()["scenario_hash"] == first.headers["x-scenario-hash"]
+        assert first.json()["scenarios"][0]["delta_cost_savings"] == 0.0
+        assert len(self.stream_calls) == 1
+        assert "projection" in self.stream_calls[0]
+
+    def test_new_calculation_invalidates_cached_totals(self):
+        payload = {"scenarios": [{"name": "current", **RATES}]}
+        _post("/api/efficiency/scenarios", payload)
+        
+        self.version = "v2"
+        _post("/api/efficiency/scenarios", payload)
+        
+        assert len(self.stream_calls) == 2
+
+    def test_building_named_scenarios_keeps_cached_totals(self):
+        payload = {"scenarios": [{"name": "current", **RATES}]}
+        _post("/api/efficiency/scenarios", payload)
+        
+        response_cache.invalidate_tag("scenarios")
+        _post("/api/efficiency/scenarios", payload)
+        
+        assert len(self.stream_calls) == 1
+
+    def test_stream_endpoint_returns_ndjson(self):
+        response = _post("/api/efficiency/scenarios/stream", {
+            "scenarios": [{"name": "current", **RATES}],
+            "building_ids": ["building-1"]
+        })
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert len(response.text.splitlines()) == 40
+        assert self.stream_calls[0]["building_ids"] == ["building-1"]
+
+    def test_inverted_window_is_rejected(self):
+        response = _post("/api/efficiency/scenarios", {
+            "scenarios": [{"name": "current", **RATES}],
+            "start": "2024-02-01T00:00:00",
+            "end": "2024-01-01T00:00:00"
+        })
+        
+        assert response.status_code == 400
@@ -0,0 +1,93 @@
+import json
+import pytest
+from datetime import datetime
+from bson import ObjectId
+from models import CalculationRequest, CalculationResponse, PeriodInput
+from calculations import process_efficiency_calculation, process_calculation_request
+from serialization import calculation_to_json, calculations_to_json
+
+PERIOD_COUNTS = [1, 10, 1000]
+PERIOD_NAMES = ["business_hours", "after_hours", "weekend"]
+
+
+def _request(period_count: int) -> CalculationRequest:
+    periods = [
+        PeriodInput(
+            period=PERIOD_NAMES[i % 3],
+            time_range="08:00-18:00",
+            days=["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+            current_electric_kwh=45000 + i,
+            current_gas_therms=3200,
+            baseline_electric_kwh=52000,
+            baseline_gas_therms=4100,
+            electric_rate=0.12,
+            gas_rate=0.95
+        )
+        for i in range(period_count)
+    ]
+    # model_construct lets the 1000-period case bypass the 10-period API limit
+    return CalculationRequest.model_construct(
+        building_id="60f7b3b3e4b0f3d4c8b4567a",
+        measure_name="High-Efficiency HVAC System",
+        periods=periods
+    )
+
+
+def _stored_document(period_count: int):
+    doc = process_calculation_request(_request(period_count))
+    # As read back from MongoDB: ObjectId and naive UTC datetimes
+    doc["_id"] = ObjectId()
+    doc["calculation_timestamp"] = doc["calculation_timestamp"].replace(tzinfo=None)
+    doc["created_at"] = doc["created_at"].replace(tzinfo=None)
+    return doc
+
+
+def _legacy_calculate(request: CalculationRequest, inserted_id: str) -> bytes:
+    result = process_efficiency_calculation(request.model_dump())
+    result["_id"] = inserted_id
+    return CalculationResponse(**result).model_dump_json(by_alias=True).encode()
+
+
+def _fast_calculate(request: CalculationRequest, inserted_id: str) -> bytes:
+    result = process_calculation_request(request)
+    result["_id"] = inserted_id
+    return calculation_to_json(result)
+
+
+def _legacy_read(docs) -> bytes:
+    results = []
+    for doc in docs:
+        doc = dict(doc, _id=str(doc["_id"]))
+        results.append(CalculationResponse(**doc).model_dump(mode="json", by_alias=True))
+    return json.dumps(results).encode()
+
+
+def _fast_read(docs) -> bytes:
+    return calculations_to_json(docs)
+
+
+def _without_timestamps(body: bytes):
+    data = json.loads(body)
+    for item in data if isinstance(data, list) else [data]:
+        item.pop("calculation_timestamp")
+        item.pop("created_at")
+    return data
+
+
+class TestCalculatePath:
+    @pytest.mark.parametrize("period_count", PERIOD_COUNTS)
+    def test_fast_path_matches_legacy_output(self, period_count):
+        request = _request(period_count)
+        
+        legacy = _without_timestamps(_legacy_calculate(request, "abc"))
+        fast = _without_timestamps(_fast_calculate(request, "abc"))
+        
+        assert fast == legacy
+
+
+class TestReadPath:
+    @pytest.mark.parametrize("period_count", PERIOD_COUNTS)
+    def test_fast_path_matches_legacy_output(self, period_count):
+        docs = [_stored_document(period_count) for _ in range(3)]
+        
+        assert json.loads(_fast_read(docs)) == json.loads(_legacy_read(docs))
@@ -0,0 +1,10 @@
+from serve import worker_pool_size
+
+
+class TestWorkerPoolSize:
+    def test_budget_split_across_workers(self):
+        assert worker_pool_size(200, 4) == 50
+        assert worker_pool_size(200, 3) == 66
+
+    def test_at_least_one_connection(self):
+        assert worker_pool_size(2, 8) == 1
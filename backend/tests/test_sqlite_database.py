@@ -0,0 +1,339 @@
+import asyncio
+import bson
+import inspect
+import sqlite3
+from datetime import datetime, timedelta, timezone
+import httpx
+import pytest
+from pymongo.errors import DuplicateKeyError
+import main
+from calculations import process_efficiency_calculation_batch
+from database import Database, create_database
+from jobs import JobRunner, JobSubmission, JOB_COMPLETED
+from sqlite_database import SQLiteDatabase, to_milliseconds
+from storage import Storage
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+BUILDINGS = [f"{index:024x}" for index in range(1, 4)]
+
+
+def _request(building_id: str, index: int):
+    return {
+        "building_id": building_id,
+        "measure_name": f"Measure {index}",
+        "periods": [
+            {
+                "period": period,
+                "time_range": "08:00-18:00",
+                "days": ["Monday"],
+                "current_electric_kwh": 40000 + index * 100 + offset,
+                "current_gas_therms": 3000,
+                "baseline_electric_kwh": 52000,
+                "baseline_gas_therms": 4100 + index,
+                "electric_rate": 0.12,
+                "gas_rate": 0.95
+            }
+            for offset, period in enumerate(["business_hours", "weekend"])
+        ]
+    }
+
+
+def _calculations(count: int, step: timedelta = timedelta(days=10)):
+    # Round-robin over three buildings; each building gets two calculations per created_at
+    calculations = process_efficiency_calculation_batch(
+        [_request(BUILDINGS[index % len(BUILDINGS)], index) for index in range(count)]
+    )
+    for index, calculation in enumerate(calculations):
+        created_at = START + step * (index // 6) + timedelta(microseconds=1500)
+        calculation["created_at"] = calculation["calculation_timestamp"] = created_at
+    return calculations
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def database():
+    database = SQLiteDatabase(":memory:")
+    _run(database.connect())
+    yield database
+    database.disconnect()
+
+
+class TestStorageInterface:
+    def test_both_backends_implement_every_method(self):
+        members = [name for name in dir(Storage) if not name.startswith("_")]
+        for backend in [Database, SQLiteDatabase]:
+            for name in members:
+                if not callable(getattr(Storage, name, None)):
+                    continue
+                expected = list(inspect.signature(getattr(Storage, name)).parameters)
+                assert list(inspect.signature(getattr(backend, name)).parameters) == expected, (backend, name)
+        assert isinstance(SQLiteDatabase(":memory:"), Storage)
+        assert isinstance(Database(), Storage)
+
+    def test_backend_is_selected_by_name(self):
+        assert isinstance(create_database("sqlite"), SQLiteDatabase)
+        assert isinstance(create_database("mongodb"), Database)
+        with pytest.raises(ValueError):
+            create_database("postgres")
+
+
+class TestSQLiteWrites:
+    def test_documents_read_back_like_mongodb(self, database):
+        calculation = _calculations(1)[0]
+        
+        inserted_id = _run(database.insert_calculation(calculation))
+        
+        assert str(calculation["_id"]) == inserted_id
+        stored = _run(database.find_by_building_id(BUILDINGS[0]))[0]
+        assert stored["_id"] == inserted_id
+        # Naive UTC with millisecond precision, as pymongo returns BSON dates
+        assert stored["created_at"] == datetime(2024, 1, 1, 0, 0, 0, 1000)
+        assert stored["periods"] == calculation["periods"]
+
+    def test_summaries_are_maintained_on_insert(self, database):
+        calculations = _calculations(9)
+        
+        _run(database.insert_calculations(calculations[:4]))
+        _run(database.insert_calculations_unordered(calculations[4:8]))
+        _run(database.insert_calculation(calculations[8]))
+        
+        summaries = _run(database.find_building_summaries())
+        assert [summary["building_id"] for summary in summaries] == BUILDINGS
+        first = summaries[0]
+        mine = [c for c in calculations if c["building_id"] == BUILDINGS[0]]
+        assert first["calculation_count"] == len(mine)
+        assert first["total_cost_savings"] == pytest.approx(sum(c["summary"]["total_cost_savings"] for c in mine))
+        assert first["latest"]["calculation_id"] == str(mine[-1]["_id"])
+        
+        assert _run(database.rebuild_building_summaries()) == 3
+        assert _run(database.find_building_summaries([BUILDINGS[0]]))[0]["calculation_count"] == len(mine)
+
+    def test_rebuild_writes_each_building_as_its_group_ends(self, database):
+        _run(database.insert_calculations(_calculations(12)))
+        maintained = _run(database.find_building_summaries())
+        # A summary left behind by a building without calculations
+        _run(database._write(lambda connection: connection.execute(
+            "INSERT INTO building_summaries (building_id, document) VALUES (?, ?)",
+            ("f" * 24, bson.encode({"building_id": "f" * 24, "calculation_count": 1}))
+        )))
+        
+        assert _run(database.rebuild_building_summaries(batch_size=1)) == 3
+        
+        rebuilt = _run(database.find_building_summaries())
+        assert [summary["building_id"] for summary in rebuilt] == BUILDINGS
+        for before, after in zip(maintained, rebuilt):
+            assert after["calculation_count"] == before["calculation_count"]
+            assert after["total_cost_savings"] == pytest.approx(before["total_cost_savings"])
+            assert after["latest"]["calculation_id"] == before["latest"]["calculation_id"]
+
+    def test_unique_keys_raise_duplicate_key_errors(self, database):
+        first, second, third = _calculations(3)
+        first["request_hash"] = second["request_hash"] = "same"
+        _run(database.insert_calculation(first))
+        
+        with pytest.raises(DuplicateKeyError):
+            _run(database.insert_calculation(second))
+        # A failing ordered batch stores nothing
+        with pytest.raises(DuplicateKeyError):
+            _run(database.insert_calculations([third, second]))
+        assert len(_run(database.find_by_building_id(third["building_id"]))) == 0
+        
+        second.pop("_id")
+        results = _run(database.insert_calculations_unordered([third, second]))
+        assert results[0] == (str(third["_id"]), None)
+        assert results[1][0] is None and "E11000" in results[1][1]
+        assert _run(database.find_existing_calculation("same"))["_id"] == first["_id"]
+
+    def test_retried_job_chunk_counts_each_calculation_once(self, database):
+        calculations = _calculations(6)
+        for index, calculation in enumerate(calculations):
+            calculation.update(job_id="job-1", job_index=index)
+        _run(database.insert_calculations_unordered([dict(c) for c in calculations[:4]]))
+        
+        results = _run(database.insert_calculations_unordered([dict(c) for c in calculations]))
+        
+        assert [error is None for _, error in results] == [False] * 4 + [True] * 2
+        summary = _run(database.find_building_summaries([BUILDINGS[0]]))[0]
+        assert summary["calculation_count"] == 2
+        assert len(_run(database.find_period_metrics(BUILDINGS[0]))) == 4
+
+    def test_idempotency_key_stays_bound_to_first_hash(self, database):
+        assert _run(database.bind_idempotency_key("retry-1", "first")) == "first"
+        assert _run(database.bind_idempotency_key("retry-1", "second")) == "first"
+        assert _run(database.bind_idempotency_key("retry-2", "second")) == "second"
+
+
+class TestSQLiteReads:
+    def test_pages_follow_the_cursor_through_ties(self, database):
+        calculations = _calculations(30)
+        _run(database.insert_calculations(calculations))
+        building_id = BUILDINGS[0]
+        expected = sorted(
+            (c for c in calculations if c["building_id"] == building_id),
+            key=lambda c: (c["created_at"], str(c["_id"])),
+            reverse=True
+        )
+        
+        seen, cursor = [], None
+        while True:
+            page, cursor = _run(database.find_page_by_building_id(building_id, 3, after=cursor, fields=["summary"]))
+            seen += page
+            if cursor is None:
+                break
+        
+        assert [doc["_id"] for doc in seen] == [str(c["_id"]) for c in expected]
+        assert set(seen[0]) == {"_id", "created_at", "summary"}
+
+    def test_stream_batches_in_building_order(self, database):
+        calculations = _calculations(25)
+        _run(database.insert_calculations(calculations))
+        start, end = START + timedelta(days=20), START + timedelta(days=90)
+        
+        async def collect():
+            return [
+                doc async for doc in database.stream_calculations(
+                    building_ids=BUILDINGS[:2], start=start, end=end, batch_size=2, projection={"summary": 1}
+                )
+            ]
+        streamed = _run(collect())
+        
+        expected = [
+            c for c in calculations
+            if c["building_id"] in BUILDINGS[:2] and start <= c["created_at"] < end
+        ]
+        assert len(streamed) == len(expected)
+        assert all(set(doc) == {"_id", "summary"} for doc in streamed)
+        ids = {str(c["_id"]): c for c in expected}
+        order = [(ids[doc["_id"]]["building_id"], -to_milliseconds(ids[doc["_id"]]["created_at"])) for doc in streamed]
+        assert order == sorted(order)
+
+    def test_period_reads(self, database):
+        calculations = _calculations(12)
+        _run(database.insert_calculations(calculations))
+        building_id = BUILDINGS[1]
+        
+        filtered = _run(database.find_by_building_and_period(building_id, "weekend"))
+        points = _run(database.find_period_metrics(building_id, ["weekend"], limit=3))
+        
+        assert len(filtered) == 4
+        assert all([p["period"] for p in doc["periods"]] == ["weekend"] for doc in filtered)
+        assert [point["timestamp"] for point in points] == sorted(point["timestamp"] for point in points)
+        assert len(points) == 3
+        assert points[0]["total_cost_savings"] == filtered[-1]["periods"][0]["total_cost_savings"]
+
+    def test_trend_buckets_average_summaries(self, database):
+        calculations = _calculations(12, step=timedelta(hours=1))
+        _run(database.insert_calculations(calculations))
+        building_id = BUILDINGS[0]
+        first, last = _run(database.find_calculation_time_bounds(building_id))
+        
+        points, _ = _run(database.get_trend(building_id, first, last + timedelta(milliseconds=1), 2))
+        period_points, _ = _run(database.get_trend(building_id, first, last + timedelta(milliseconds=1), 2, "weekend"))
+        
+        mine = [c for c in calculations if c["building_id"] == building_id]
+        assert sum(point["calculation_count"] for point in points) == len(mine)
+        assert sum(point["calculation_count"] for point in period_points) == len(mine)
+        expected = sum(c["summary"]["total_cost_savings"] for c in mine[:2]) / 2
+        assert points[0]["cost_savings"] == pytest.approx(expected, abs=0.01)
+        assert len(points) == 2
+
+    def test_portfolio_matches_python_totals(self, database):
+        calculations = _calculations(20, step=timedelta(days=31))
+        _run(database.insert_calculations(calculations))
+        
+        portfolio = _run(database.get_portfolio(top_n=2, bucket="month"))
+        
+        assert portfolio["building_count"] == 3
+        assert portfolio["calculation_count"] == 20
+        assert portfolio["total_cost_savings"] == round(sum(c["summary"]["total_cost_savings"] for c in calculations), 2)
+        assert len(portfolio["top_buildings"]) == 2
+        assert portfolio["top_buildings"][0]["total_cost_savings"] >= portfolio["top_buildings"][1]["total_cost_savings"]
+        assert [bucket["period_start"] for bucket in portfolio["buckets"]] == [
+            datetime(2024, month, 1) for month in range(1, 5)
+        ]
+        assert sum(portfolio["grade_distribution"].values()) == 20
+        empty = _run(database.get_portfolio(start=START + timedelta(days=3650)))
+        assert empty["building_count"] == 0 and empty["total_cost_savings"] == 0.0
+
+    def test_versions_track_the_latest_calculation(self, database):
+        assert _run(database.get_collection_version()) is None
+        calculations = _calculations(4)
+        _run(database.insert_calculations(calculations))
+        
+        version = _run(database.get_building_version(BUILDINGS[0]))
+        
+        latest = _run(database.get_building_summary(BUILDINGS[0]))
+        assert version == f"{latest['_id']}:{latest['created_at'].isoformat()}"
+        assert _run(database.get_collection_version()).startswith(str(calculations[-1]["_id"]))
+
+
+class TestSQLiteFile:
+    def test_wal_file_is_shared_between_workers(self, tmp_path):
+        path = str(tmp_path / "energy.db")
+        writer, reader = SQLiteDatabase(path), SQLiteDatabase(path)
+        try:
+            _run(writer.connect())
+            _run(reader.connect())
+            _run(writer.insert_calculations(_calculations(3)))
+            
+            assert len(_run(reader.find_building_summaries())) == 3
+            connection = sqlite3.connect(path)
+            assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            connection.close()
+            assert {"calculations_building_created", "period_metrics_building_period", "job_chunks_status_lease"} <= indexes
+        finally:
+            writer.disconnect()
+            reader.disconnect()
+
+    def test_jobs_run_end_to_end(self, database):
+        async def records():
+            for index in range(7):
+                yield _request(BUILDINGS[index % 3], index), None
+        
+        async def run():
+            job_id = await JobSubmission(database, chunk_size=3).run(records())
+            runner = JobRunner(database, processes=1)
+            try:
+                await runner.run_until_idle()
+            finally:
+                runner.close()
+            return await database.get_job(job_id)
+        job = _run(run())
+        
+        assert job["status"] == JOB_COMPLETED
+        assert job["result"]["inserted_count"] == 7
+        assert job["chunks"]["completed"] == 3
+        assert _run(database.claim_job_chunk("other", 60)) is None
+
+
+class TestAPIOnSQLite:
+    def test_calculate_and_read_back(self, database, monkeypatch):
+        monkeypatch.setattr(main, "db", database)
+        main.response_cache.clear()
+        
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                for index in range(3):
+                    response = await client.post("/api/efficiency/calculate", json=_request(BUILDINGS[0], index))
+                    assert response.status_code == 201
+                replay = await client.post("/api/efficiency/calculate", json=_request(BUILDINGS[0], 0))
+                history = await client.get(f"/api/efficiency/building/{BUILDINGS[0]}")
+                latest = await client.get(f"/api/efficiency/building/{BUILDINGS[0]}/summary")
+                summaries = await client.get("/api/efficiency/buildings/summaries", params={"building_id": BUILDINGS[0]})
+                portfolio = await client.get("/api/efficiency/portfolio")
+                return replay, history, latest, summaries, portfolio
+        replay, history, latest, summaries, portfolio = _run(run())
+        
+        assert replay.status_code == 200
+        assert replay.headers["Idempotent-Replayed"] == "true"
+        assert history.status_code == 200
+        assert len(history.json()) == 3
+        assert latest.json()["measure_name"] == "Measure 2"
+        assert "ETag" in latest.headers
+        assert summaries.json()[0]["calculation_count"] == 3
+        assert portfolio.json()["calculation_count"] == 3
@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from pymongo.errors import ConnectionFailure
+import database
+from database import Database
+from main import app, db
+
+
+class FakeAdmin:
+    def __init__(self, failures):
+        self.failures = failures
+        self.pings = 0
+
+    async def command(self, name):
+        self.pings += 1
+        if self.pings <= self.failures:
+            raise ConnectionFailure("connection refused")
+        return {"ok": 1}
+
+
+class FakeClient:
+    def __init__(self, failures=0):
+        self.admin = FakeAdmin(failures)
+
+
+def fake_database(failures=0, index_error=None):
+    instance = Database()
+    instance.client = FakeClient(failures)
+
+    async def create_indexes():
+        if index_error:
+            raise index_error
+    instance.create_indexes = create_indexes
+    return instance
+
+
+class TestWarmUp:
+    def test_retries_until_database_is_reachable(self, monkeypatch):
+        monkeypatch.setattr(database, "MONGODB_CREATE_INDEXES_ON_STARTUP", True)
+        instance = fake_database(failures=2)
+        
+        asyncio.run(instance.warm_up(retry_delay=0))
+        
+        assert instance.client.admin.pings == 3
+        assert instance.state == "ready"
+        assert instance.last_error is None
+        assert instance.index_state == "ready"
+
+    def test_index_failure_does_not_block_readiness(self, monkeypatch):
+        monkeypatch.setattr(database, "MONGODB_CREATE_INDEXES_ON_STARTUP", True)
+        instance = fake_database(index_error=RuntimeError("index build failed"))
+        
+        asyncio.run(instance.warm_up(retry_delay=0))
+        
+        assert instance.state == "ready"
+        assert instance.index_state == "failed"
+
+    def test_index_build_skipped_when_disabled(self, monkeypatch):
+        monkeypatch.setattr(database, "MONGODB_CREATE_INDEXES_ON_STARTUP", False)
+        instance = fake_database(index_error=RuntimeError("should not run"))
+        instance.index_state = "skipped"
+        
+        asyncio.run(instance.warm_up(retry_delay=0))
+        
+        assert instance.state == "ready"
+        assert instance.index_state == "skipped"
+
+    def test_unavailable_while_retrying(self):
+        instance = fake_database(failures=1000)
+        
+        async def run():
+            task = asyncio.create_task(instance.warm_up(retry_delay=60))
+            await asyncio.sleep(0.01)
+            task.cancel()
+        asyncio.run(run())
+        
+        assert instance.state == "unavailable"
+        assert "connection refused" in instance.last_error
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def warm_up():
+        await asyncio.Event().wait()
+    monkeypatch.setattr(db, "warm_up", warm_up)
+    monkeypatch.setattr(db, "state", "starting")
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class TestHealthEndpoints:
+    def test_live_before_database_is_reachable(self, client):
+        response = client.get("/health/live")
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "alive"
+
+    def test_not_ready_while_starting(self, client):
+        response = client.get("/health/ready")
+        
+        assert response.status_code == 503
+        assert response.json()["status"] == "not_ready"
+        assert response.json()["database"] == "starting"
+
+    def test_ready_once_warmed_up(self, client, monkeypatch):
+        async def ping():
+            return None
+        monkeypatch.setattr(db, "state", "ready")
+        monkeypatch.setattr(db, "ping", ping)
+        
+        response = client.get("/health/ready")
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+
+    def test_not_ready_when_ping_fails(self, client, monkeypatch):
+        async def ping():
+            raise ConnectionFailure("lost primary")
+        monkeypatch.setattr(db, "state", "ready")
+        monkeypatch.setattr(db, "ping", ping)
+        
+        response = client.get("/health/ready")
+        
+        assert response.status_code == 503
+        assert response.json()["error"] == "lost primary"
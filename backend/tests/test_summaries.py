@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from summaries import building_summary_update, apply_building_summary_update
+from calculations import process_efficiency_calculation
+
+
+def _calculation(electric_kwh=45000, measure_name="LED Retrofit", created_at=None):
+    calculation = process_efficiency_calculation({
+        "building_id": "60f7b3b3e4b0f3d4c8b4567a",
+        "measure_name": measure_name,
+        "periods": [
+            {
+                "period": "business_hours",
+                "time_range": "08:00-18:00",
+                "days": ["Monday"],
+                "current_electric_kwh": electric_kwh,
+                "current_gas_therms": 3200,
+                "baseline_electric_kwh": 52000,
+                "baseline_gas_therms": 4100,
+                "electric_rate": 0.12,
+                "gas_rate": 0.95
+            },
+            {
+                "period": "weekend",
+                "time_range": "00:00-23:59",
+                "days": ["Saturday"],
+                "current_electric_kwh": 9000,
+                "current_gas_therms": 800,
+                "baseline_electric_kwh": 9500,
+                "baseline_gas_therms": 820,
+                "electric_rate": 0.12,
+                "gas_rate": 0.95
+            }
+        ]
+    })
+    if created_at:
+        calculation["created_at"] = created_at
+    return calculation
+
+
+class TestBuildingSummaryUpdatePipeline:
+    def test_pipeline_increments_counters(self):
+        calculation = _calculation()
+        
+        fields = building_summary_update("abc", calculation)[0]["$set"]
+        
+        assert fields["calculation_count"] == {"$add": [{"$ifNull": ["$calculation_count", 0]}, 1]}
+        assert fields["total_cost_savings"]["$add"][1] == {"$literal": calculation["summary"]["total_cost_savings"]}
+
+    def test_user_values_are_literals(self):
+        calculation = _calculation(measure_name="$dangerous")
+        
+        fields = building_summary_update("abc", calculation)[0]["$set"]
+        
+        assert fields["building_id"] == {"$literal": calculation["building_id"]}
+        assert fields["latest"]["$cond"][1]["$literal"]["measure_name"] == "$dangerous"
+
+    def test_best_and_worst_periods_from_calculation(self):
+        fields = building_summary_update("abc", _calculation())[0]["$set"]
+        
+        assert fields["best_period"]["$cond"][1]["$literal"]["period"] == "business_hours"
+        assert fields["worst_period"]["$cond"][1]["$literal"]["period"] == "weekend"
+
+
+class TestApplyBuildingSummaryUpdate:
+    def test_accumulates_running_totals(self):
+        first = _calculation()
+        second = _calculation(electric_kwh=40000)
+        
+        summary = apply_building_summary_update(None, "1", first)
+        summary = apply_building_summary_update(summary, "2", second)
+        
+        assert summary["calculation_count"] == 2
+        assert summary["total_cost_savings"] == (
+            first["summary"]["total_cost_savings"] + second["summary"]["total_cost_savings"]
+        )
+        assert summary["latest"]["calculation_id"] == "2"
+        assert summary["best_period"]["calculation_id"] == "2"
+
+    def test_latest_ignores_older_calculations(self):
+        now = datetime(2024, 6, 1)
+        newer = _calculation(created_at=now)
+        older = _calculation(electric_kwh=30000, created_at=now - timedelta(days=30))
+        
+        summary = apply_building_summary_update(None, "new", newer)
+        summary = apply_building_summary_update(summary, "old", older)
+        
+        assert summary["latest"]["calculation_id"] == "new"
+        assert summary["best_period"]["calculation_id"] == "old"
+        assert summary["worst_period"]["period"] == "weekend"
@@ -0,0 +1,64 @@
+from datetime import datetime
+from bson import ObjectId
+from calculations import process_efficiency_calculation
+from models import PeriodMetricsPoint
+from timeseries import (
+    period_metric_rows, timeseries_points_pipeline, embedded_points_pipeline, PERIOD_METRIC_FIELDS
+)
+from tests.helpers import SAMPLE_REQUEST
+
+CALCULATION_ID = "65a1b2c3d4e5f67890123456"
+
+
+class TestPeriodMetricRows:
+    def test_one_row_per_period(self):
+        calculation = process_efficiency_calculation(SAMPLE_REQUEST)
+        
+        rows = period_metric_rows(CALCULATION_ID, calculation)
+        
+        assert len(rows) == len(calculation["periods"])
+        for row, metrics in zip(rows, calculation["periods"]):
+            assert row["timestamp"] == calculation["created_at"]
+            assert row["meta"] == {"building_id": calculation["building_id"], "period": metrics["period"]}
+            assert row["calculation_id"] == ObjectId(CALCULATION_ID)
+            assert {field: row[field] for field in PERIOD_METRIC_FIELDS} == \
+                {field: metrics[field] for field in PERIOD_METRIC_FIELDS}
+
+    def test_period_only_stored_in_meta(self):
+        rows = period_metric_rows(CALCULATION_ID, process_efficiency_calculation(SAMPLE_REQUEST))
+        
+        assert "period" not in rows[0]
+
+
+class TestPointsPipelines:
+    def test_timeseries_range_match(self):
+        start = datetime(2024, 1, 1)
+        end = datetime(2025, 1, 1)
+        
+        pipeline = timeseries_points_pipeline("b1", ["weekend"], start, end, limit=50)
+        
+        assert pipeline[0] == {"$match": {
+            "meta.building_id": "b1",
+            "meta.period": {"$in": ["weekend"]},
+            "timestamp": {"$gte": start, "$lt": end}
+        }}
+        assert pipeline[1] == {"$sort": {"timestamp": 1}}
+        assert pipeline[2] == {"$limit": 50}
+
+    def test_embedded_filters_unwound_periods(self):
+        pipeline = embedded_points_pipeline("b1", ["weekend"], limit=50)
+        
+        assert pipeline[0] == {"$match": {"building_id": "b1", "periods.period": {"$in": ["weekend"]}}}
+        assert {"$unwind": "$periods"} in pipeline
+        assert {"$match": {"periods.period": {"$in": ["weekend"]}}} in pipeline
+
+    def test_all_periods_when_none_requested(self):
+        assert timeseries_points_pipeline("b1")[0] == {"$match": {"meta.building_id": "b1"}}
+        assert len(embedded_points_pipeline("b1")) == 5
+
+    def test_both_layouts_project_the_same_point(self):
+        timeseries = timeseries_points_pipeline("b1")[-1]["$project"]
+        embedded = embedded_points_pipeline("b1")[-1]["$project"]
+        
+        assert set(timeseries) == set(embedded)
+        assert set(timeseries) - {"_id"} == set(PeriodMetricsPoint.model_fields)
@@ -0,0 +1,127 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+import httpx
+import pytest
+import main
+from cache import response_cache
+from trend import trend_bucket_ms, trend_pipeline, format_trend_points, to_utc_naive, TREND_SERIES
+
+START = datetime(2020, 1, 1)
+
+
+def get(path, **params):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, params=params)
+    return asyncio.run(run())
+
+
+class TestBuckets:
+    @pytest.mark.parametrize("history_days,points", [(1, 200), (365, 200), (3650, 200), (3650, 7), (1, 2000)])
+    def test_never_more_buckets_than_points(self, history_days, points):
+        end = START + timedelta(days=history_days)
+        bucket_ms = trend_bucket_ms(START, end, points)
+        rng = random.Random(0)
+        span_ms = (end - START) // timedelta(milliseconds=1)
+        
+        offsets = [0, span_ms - 1] + [rng.randrange(span_ms) for _ in range(1000)]
+        
+        assert max(offset // bucket_ms for offset in offsets) < points
+
+    def test_tiny_range_uses_one_millisecond_buckets(self):
+        assert trend_bucket_ms(START, START + timedelta(milliseconds=5), 200) == 1
+
+    def test_aware_dates_are_normalized(self):
+        aware = datetime(2024, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+        
+        assert to_utc_naive(aware) == datetime(2024, 1, 1, 10)
+        assert to_utc_naive(START) is START
+
+
+class TestTrendPipeline:
+    def test_summary_series_by_default(self):
+        end = START + timedelta(days=10)
+        
+        pipeline = trend_pipeline("b1", START, end, 3600000)
+        
+        assert pipeline[0] == {"$match": {"building_id": "b1", "created_at": {"$gte": START, "$lt": end}}}
+        group = pipeline[1]["$group"]
+        assert group["_id"] == {"$floor": {"$divide": [{"$subtract": ["$created_at", START]}, 3600000]}}
+        assert group["cost_savings"] == {"$avg": "$summary.total_cost_savings"}
+        assert pipeline[2] == {"$sort": {"_id": 1}}
+
+    def test_period_series_unwinds_embedded_periods(self):
+        pipeline = trend_pipeline("b1", START, START + timedelta(days=1), 1000, period="weekend")
+        
+        assert pipeline[0]["$match"]["periods.period"] == "weekend"
+        assert pipeline[1] == {"$unwind": "$periods"}
+        assert pipeline[2] == {"$match": {"periods.period": "weekend"}}
+        assert pipeline[3]["$group"]["efficiency_improvement_percent"] == {
+            "$avg": "$periods.overall_efficiency_improvement_percent"
+        }
+
+    def test_period_series_from_timeseries(self):
+        pipeline = trend_pipeline("b1", START, START + timedelta(days=1), 1000, period="weekend", timeseries=True)
+        
+        assert pipeline[0]["$match"]["meta.period"] == "weekend"
+        assert pipeline[1]["$group"]["_id"]["$floor"]["$divide"][0] == {"$subtract": ["$timestamp", START]}
+
+    def test_points_start_at_bucket_boundaries(self):
+        buckets = [
+            {"_id": 0.0, "calculation_count": 2, "cost_savings": 10.126, "electric_savings_kwh": 1,
+             "gas_savings_therms": 2, "efficiency_improvement_percent": 3},
+            {"_id": 3.0, "calculation_count": 1, "cost_savings": None},
+        ]
+        
+        points = format_trend_points(buckets, START, 60000)
+        
+        assert [point["timestamp"] for point in points] == [START, START + timedelta(minutes=3)]
+        assert points[0]["cost_savings"] == 10.13
+        assert all(points[1][series] == 0.0 for series in TREND_SERIES)
+
+
+class TestTrendEndpoint:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self, monkeypatch):
+        async def version(building_id):
+            return "65a1b2c3d4e5f67890123456:2024-01-10T12:00:00"
+        monkeypatch.setattr(main.db, "get_building_version", version)
+        response_cache.clear()
+        yield
+        response_cache.clear()
+
+    def test_defaults_to_full_history(self, monkeypatch):
+        last = START + timedelta(days=1000)
+        calls = []
+        
+        async def bounds(building_id):
+            return START, last
+        
+        async def get_trend(building_id, start, end, points, period=None):
+            calls.append((start, end, points, period))
+            return [], trend_bucket_ms(start, end, points)
+        monkeypatch.setattr(main.db, "find_calculation_time_bounds", bounds)
+        monkeypatch.setattr(main.db, "get_trend", get_trend)
+        
+        response = get("/api/efficiency/building/b1/trend", points=100)
+        
+        assert response.status_code == 200
+        assert calls == [(START, last + timedelta(milliseconds=1), 100, None)]
+        assert response.json()["points"] == []
+        assert "period" not in response.json()
+
+    def test_unknown_building_is_404(self, monkeypatch):
+        async def bounds(building_id):
+            return None
+        monkeypatch.setattr(main.db, "find_calculation_time_bounds", bounds)
+        
+        assert get("/api/efficiency/building/b1/trend").status_code == 404
+
+    def test_invalid_period_and_range(self):
+        assert get("/api/efficiency/building/b1/trend", period="night").status_code == 400
+        assert get(
+            "/api/efficiency/building/b1/trend", start="2024-02-01T00:00:00", end="2024-01-01T00:00:00"
+        ).status_code == 400
+        assert get("/api/efficiency/building/b1/trend", points=1).status_code == 422
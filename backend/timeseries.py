@@ -0,0 +1,109 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from bson import ObjectId
+
+from models import PeriodMetrics
+
+TIMESERIES_COLLECTION = "period_metrics"
+
+# One measurement per period of a calculation; MongoDB buckets rows that share
+# a building/period pair, so the meta values are stored once per bucket.
+TIMESERIES_OPTIONS = {
+    "timeField": "timestamp",
+    "metaField": "meta",
+    "granularity": "hours",
+}
+
+# Every PeriodMetrics field except "period", which lives in meta
+PERIOD_METRIC_FIELDS = [field for field in PeriodMetrics.model_fields if field != "period"]
+
+DEFAULT_POINT_LIMIT = 1000
+MAX_POINT_LIMIT = 10000
+
+
+def period_metric_rows(calculation_id: Any, calculation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rows = []
+    for metrics in calculation["periods"]:
+        row = {
+            "timestamp": calculation["created_at"],
+            "meta": {"building_id": calculation["building_id"], "period": metrics["period"]},
+            "calculation_id": ObjectId(str(calculation_id)),
+        }
+        for field in PERIOD_METRIC_FIELDS:
+            row[field] = metrics[field]
+        rows.append(row)
+    return rows
+
+
+def _range(start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    bounds: Dict[str, Any] = {}
+    if start:
+        bounds["$gte"] = start
+    if end:
+        bounds["$lt"] = end
+    return bounds
+
+
+def timeseries_points_pipeline(
+    building_id: str,
+    periods: Optional[List[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = DEFAULT_POINT_LIMIT
+) -> List[Dict[str, Any]]:
+    match: Dict[str, Any] = {"meta.building_id": building_id}
+    if periods:
+        match["meta.period"] = {"$in": periods}
+    if start or end:
+        match["timestamp"] = _range(start, end)
+    
+    project: Dict[str, Any] = {
+        "_id": 0,
+        "timestamp": 1,
+        "building_id": "$meta.building_id",
+        "calculation_id": {"$toString": "$calculation_id"},
+        "period": "$meta.period",
+    }
+    for field in PERIOD_METRIC_FIELDS:
+        project[field] = 1
+    return [
+        {"$match": match},
+        {"$sort": {"timestamp": 1}},
+        {"$limit": limit},
+        {"$project": project},
+    ]
+
+
+def embedded_points_pipeline(
+    building_id: str,
+    periods: Optional[List[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = DEFAULT_POINT_LIMIT
+) -> List[Dict[str, Any]]:
+    # Same rows as timeseries_points_pipeline, unwound from efficiency_calculations
+    match: Dict[str, Any] = {"building_id": building_id}
+    if periods:
+        match["periods.period"] = {"$in": periods}
+    if start or end:
+        match["created_at"] = _range(start, end)
+    
+    project: Dict[str, Any] = {
+        "_id": 0,
+        "timestamp": "$created_at",
+        "building_id": 1,
+        "calculation_id": {"$toString": "$_id"},
+        "period": "$periods.period",
+    }
+    for field in PERIOD_METRIC_FIELDS:
+        project[field] = f"$periods.{field}"
+    
+    pipeline: List[Dict[str, Any]] = [
+        {"$match": match},
+        {"$sort": {"created_at": 1}},
+        {"$unwind": "$periods"},
+    ]
+    if periods:
+        pipeline.append({"$match": {"periods.period": {"$in": periods}}})
+    pipeline += [{"$limit": limit}, {"$project": project}]
+    return pipeline
@@ -0,0 +1,99 @@
+import math
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+
+DEFAULT_TREND_POINTS = 200
+MAX_TREND_POINTS = 2000
+
+TREND_SERIES = ["cost_savings", "electric_savings_kwh", "gas_savings_therms", "efficiency_improvement_percent"]
+
+# Source field of every series, per layout
+SUMMARY_SERIES_FIELDS = {
+    "cost_savings": "summary.total_cost_savings",
+    "electric_savings_kwh": "summary.total_electric_savings_kwh",
+    "gas_savings_therms": "summary.total_gas_savings_therms",
+    "efficiency_improvement_percent": "summary.average_efficiency_improvement_percent",
+}
+PERIOD_SERIES_FIELDS = {
+    "cost_savings": "total_cost_savings",
+    "electric_savings_kwh": "electric_savings_kwh",
+    "gas_savings_therms": "gas_savings_therms",
+    "efficiency_improvement_percent": "overall_efficiency_improvement_percent",
+}
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    # Stored dates come back from MongoDB as naive UTC
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def trend_bucket_ms(start: datetime, end: datetime, points: int) -> int:
+    # Wide enough that [start, end) never spans more than `points` buckets
+    span_ms = (end - start) // timedelta(milliseconds=1)
+    return max(1, math.ceil(span_ms / points))
+
+
+def _bucket_group(time_field: str, start: datetime, bucket_ms: int, fields: Dict[str, str]) -> Dict[str, Any]:
+    group: Dict[str, Any] = {
+        "_id": {"$floor": {"$divide": [{"$subtract": [f"${time_field}", start]}, bucket_ms]}},
+        "calculation_count": {"$sum": 1},
+    }
+    for series, path in fields.items():
+        group[series] = {"$avg": f"${path}"}
+    return group
+
+
+def trend_pipeline(
+    building_id: str,
+    start: datetime,
+    end: datetime,
+    bucket_ms: int,
+    period: Optional[str] = None,
+    timeseries: bool = False
+) -> List[Dict[str, Any]]:
+    # Whole-calculation summaries by default; one period's metrics when given,
+    # read from period_metrics if the time-series layout is enabled.
+    if timeseries:
+        match = {"meta.building_id": building_id, "meta.period": period, "timestamp": {"$gte": start, "$lt": end}}
+        return [
+            {"$match": match},
+            {"$group": _bucket_group("timestamp", start, bucket_ms, PERIOD_SERIES_FIELDS)},
+            {"$sort": {"_id": 1}},
+        ]
+    
+    match: Dict[str, Any] = {"building_id": building_id, "created_at": {"$gte": start, "$lt": end}}
+    if period is None:
+        return [
+            {"$match": match},
+            {"$group": _bucket_group("created_at", start, bucket_ms, SUMMARY_SERIES_FIELDS)},
+            {"$sort": {"_id": 1}},
+        ]
+    
+    match["periods.period"] = period
+    return [
+        {"$match": match},
+        {"$unwind": "$periods"},
+        {"$match": {"periods.period": period}},
+        {"$group": _bucket_group(
+            "created_at",
+            start,
+            bucket_ms,
+            {series: f"periods.{field}" for series, field in PERIOD_SERIES_FIELDS.items()}
+        )},
+        {"$sort": {"_id": 1}},
+    ]
+
+
+def format_trend_points(buckets: List[Dict[str, Any]], start: datetime, bucket_ms: int) -> List[Dict[str, Any]]:
+    points = []
+    for bucket in buckets:
+        point = {
+            "timestamp": start + timedelta(milliseconds=int(bucket["_id"]) * bucket_ms),
+            "calculation_count": bucket["calculation_count"],
+        }
+        for series in TREND_SERIES:
+            point[series] = round(bucket.get(series) or 0.0, 2)
+        points.append(point)
+    return points
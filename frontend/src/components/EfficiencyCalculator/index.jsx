@@ -1,10 +1,12 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import './EfficiencyCalculator.css';
 import CalculatorForm from './CalculatorForm';
 import PeriodInput from './PeriodInput';
-import { calculateEfficiency } from '../../services/api';
+import { calculateEfficiency, newIdempotencyKey } from '../../services/api';
 
 const EfficiencyCalculator = ({ onCalculationComplete }) => {
+  // Kept after a failed submit, so submitting the same data again reuses it
+  const pendingSubmission = useRef(null);
   const [buildingId, setBuildingId] = useState('');
   const [measureName, setMeasureName] = useState('');
   const [periods, setPeriods] = useState([
@@ -156,7 +158,15 @@ const EfficiencyCalculator = ({ onCalculationComplete }) => {
         periods: formattedPeriods
       };
 
-      const result = await calculateEfficiency(requestData);
+      const body = JSON.stringify(requestData);
+      if (pendingSubmission.current?.body !== body) {
+        pendingSubmission.current = { body, idempotencyKey: newIdempotencyKey() };
+      }
+
+      const result = await calculateEfficiency(requestData, {
+        idempotencyKey: pendingSubmission.current.idempotencyKey
+      });
+      pendingSubmission.current = null;
       setSuccess(true);
       
       // Notify parent component
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import {
   BarChart,
   Bar,
@@ -14,6 +14,7 @@ import {
   LineChart,
   Line
 } from 'recharts';
+import { getBuildingTrend } from '../../services/api';
 
 const periodLabels = {
   business_hours: 'Business Hours',
@@ -23,8 +24,31 @@ const periodLabels = {
 
 const COLORS = ['#3b82f6', '#8b5cf6', '#10b981'];
 
-const EfficiencyChart = ({ periods }) => {
+// The server downsamples history to at most this many points
+const TREND_POINTS = 120;
+
+const EfficiencyChart = ({ periods, buildingId }) => {
   const [chartType, setChartType] = useState('bar');
+  const [trend, setTrend] = useState(null);
+  const [trendError, setTrendError] = useState(null);
+
+  useEffect(() => {
+    setTrend(null);
+    setTrendError(null);
+  }, [buildingId]);
+
+  useEffect(() => {
+    if (chartType !== 'history' || trend || !buildingId) return;
+    getBuildingTrend(buildingId, { points: TREND_POINTS })
+      .then(setTrend)
+      .catch((err) => setTrendError(err.message || 'Error loading history'));
+  }, [chartType, trend, buildingId]);
+
+  const historyChartData = (trend?.points || []).map(point => ({
+    name: new Date(point.timestamp).toLocaleDateString('en-US'),
+    'Cost Savings ($)': point.cost_savings,
+    'Overall Improvement (%)': point.efficiency_improvement_percent
+  }));
 
   const barChartData = periods.map(period => ({
     name: periodLabels[period.period],
@@ -139,6 +163,24 @@ const EfficiencyChart = ({ periods }) => {
           </ResponsiveContainer>
         );
       
+      case 'history':
+        if (trendError) return <p className="chart-message">{trendError}</p>;
+        if (!trend) return <p className="chart-message">Loading history...</p>;
+        return (
+          <ResponsiveContainer width="100%" height={300}>
+            <LineChart data={historyChartData}>
+              <CartesianGrid strokeDasharray="3 3" />
+              <XAxis dataKey="name" />
+              <YAxis yAxisId="savings" />
+              <YAxis yAxisId="percent" orientation="right" />
+              <Tooltip content={<CustomTooltip />} />
+              <Legend />
+              <Line yAxisId="savings" type="monotone" dataKey="Cost Savings ($)" stroke="#10b981" strokeWidth={2} dot={false} />
+              <Line yAxisId="percent" type="monotone" dataKey="Overall Improvement (%)" stroke="#3b82f6" strokeWidth={2} dot={false} />
+            </LineChart>
+          </ResponsiveContainer>
+        );
+      
       default:
         return null;
     }
@@ -166,6 +208,14 @@ const EfficiencyChart = ({ periods }) => {
           >
             📈 Line
           </button>
+          {buildingId && (
+            <button
+              className={`chart-type-btn ${chartType === 'history' ? 'active' : ''}`}
+              onClick={() => setChartType('history')}
+            >
+              🕒 History
+            </button>
+          )}
         </div>
       </div>
       
@@ -173,6 +223,7 @@ const EfficiencyChart = ({ periods }) => {
         {chartType === 'bar' && <h4>Efficiency Improvements Comparison</h4>}
         {chartType === 'pie' && <h4>Cost Savings Distribution</h4>}
         {chartType === 'line' && <h4>Savings Trends</h4>}
+        {chartType === 'history' && <h4>Savings and Efficiency Over Time</h4>}
         {renderChart()}
       </div>
     </div>
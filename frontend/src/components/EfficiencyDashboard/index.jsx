@@ -3,7 +3,7 @@ import './EfficiencyDashboard.css';
 import SummaryCards from './SummaryCards';
 import PeriodBreakdown from './PeriodBreakdown';
 import EfficiencyChart from './EfficiencyChart';
-import { getBuildingSummary } from '../../services/api';
+import { getBuildingSummary, getExportUrl, subscribeToCalculations } from '../../services/api';
 
 const EfficiencyDashboard = ({ buildingId, initialData }) => {
   const [data, setData] = useState(initialData);
@@ -16,6 +16,13 @@ const EfficiencyDashboard = ({ buildingId, initialData }) => {
     }
   }, [buildingId, initialData]);
 
+  // The server pushes each new calculation, so the summary stays current
+  // without refetching
+  useEffect(() => {
+    if (!buildingId) return undefined;
+    return subscribeToCalculations([buildingId], setData);
+  }, [buildingId]);
+
   const loadData = async () => {
     setLoading(true);
     setError(null);
@@ -88,6 +95,10 @@ const EfficiencyDashboard = ({ buildingId, initialData }) => {
     document.body.removeChild(link);
   };
 
+  const exportHistory = () => {
+    window.location.href = getExportUrl({ buildingIds: [buildingId], format: 'csv' });
+  };
+
   if (loading) {
     return (
       <div className="dashboard-loading">
@@ -135,6 +146,9 @@ const EfficiencyDashboard = ({ buildingId, initialData }) => {
           <button className="btn btn-secondary" onClick={exportToCSV}>
             📥 Export CSV
           </button>
+          <button className="btn btn-secondary" onClick={exportHistory}>
+            🗂️ Export History
+          </button>
           <button className="btn btn-primary" onClick={loadData}>
             🔄 Refresh
           </button>
@@ -145,7 +159,7 @@ const EfficiencyDashboard = ({ buildingId, initialData }) => {
 
       <div className="dashboard-section">
         <h3>📊 Efficiency Comparison by Period</h3>
-        <EfficiencyChart periods={data.periods} />
+        <EfficiencyChart periods={data.periods} buildingId={data.building_id} />
       </div>
 
       <div className="dashboard-section">
@@ -10,8 +10,47 @@ const apiClient = axios.create({
   timeout: 10000,
 });
 
+// GET responses by URL with their ETag, replayed when the server answers 304
+const ETAG_CACHE_LIMIT = 100;
+const etagCache = new Map();
+
+apiClient.interceptors.request.use((config) => {
+  if ((config.method || 'get').toLowerCase() !== 'get') return config;
+  const key = `${apiClient.getUri(config)}|${config.headers?.Accept || ''}`;
+  const cached = etagCache.get(key);
+  config.etagKey = key;
+  config.validateStatus = (status) => (status >= 200 && status < 300) || status === 304;
+  if (cached) {
+    config.headers['If-None-Match'] = cached.etag;
+  }
+  return config;
+});
+
 apiClient.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const key = response.config.etagKey;
+    if (!key) return response;
+
+    if (response.status === 304) {
+      const cached = etagCache.get(key);
+      if (cached) {
+        etagCache.delete(key);
+        etagCache.set(key, cached);
+        return { ...response, status: 200, data: cached.data, headers: { ...cached.headers, ...response.headers } };
+      }
+      return response;
+    }
+
+    const etag = response.headers.etag;
+    if (etag) {
+      etagCache.delete(key);
+      etagCache.set(key, { etag, data: response.data, headers: response.headers });
+      if (etagCache.size > ETAG_CACHE_LIMIT) {
+        etagCache.delete(etagCache.keys().next().value);
+      }
+    }
+    return response;
+  },
   (error) => {
     if (error.response) {
       const message = error.response.data?.detail || error.response.data?.error || 'Server error';
@@ -28,9 +67,26 @@ export const checkHealth = async () => {
   return response.data;
 };
 
-export const calculateEfficiency = async (data) => {
-  const response = await apiClient.post('/api/efficiency/calculate', data);
-  return response.data;
+// One key per submission; a retry resends it, so the server replays the
+// calculation it already stored instead of creating a second one
+export const newIdempotencyKey = () => crypto.randomUUID();
+
+const CALCULATE_RETRIES = 2;
+const CALCULATE_RETRY_DELAY_MS = 500;
+
+const isTransient = (error) => !error.response || error.response.status >= 500;
+
+export const calculateEfficiency = async (data, { idempotencyKey = newIdempotencyKey() } = {}) => {
+  const headers = { 'Idempotency-Key': idempotencyKey };
+  for (let attempt = 0; ; attempt += 1) {
+    try {
+      const response = await apiClient.post('/api/efficiency/calculate', data, { headers });
+      return response.data;
+    } catch (error) {
+      if (attempt >= CALCULATE_RETRIES || !isTransient(error)) throw error;
+      await new Promise((resolve) => setTimeout(resolve, CALCULATE_RETRY_DELAY_MS * (attempt + 1)));
+    }
+  }
 };
 
 export const getBuildingCalculations = async (buildingId) => {
@@ -38,6 +94,49 @@ export const getBuildingCalculations = async (buildingId) => {
   return response.data;
 };
 
+export const COLUMNAR_MEDIA_TYPE = 'application/vnd.efficiency.columnar+json';
+
+// Rebuilds row objects from the columnar encoding (one array per field)
+export const fromColumnar = ({ count, columns, periods }) => {
+  const rows = Array.from({ length: count }, () => ({}));
+  Object.entries(columns).forEach(([key, values]) => {
+    const [parent, child] = key.split('.');
+    values.forEach((value, index) => {
+      if (child) {
+        rows[index][parent] = rows[index][parent] || {};
+        rows[index][parent][child] = value;
+      } else {
+        rows[index][key] = value;
+      }
+    });
+  });
+  if (periods) {
+    rows.forEach((row) => { row.periods = []; });
+    const keys = Object.keys(periods).filter((key) => key !== 'calculation');
+    periods.calculation.forEach((rowIndex, index) => {
+      const period = {};
+      keys.forEach((key) => { period[key] = periods[key][index]; });
+      rows[rowIndex].periods.push(period);
+    });
+  }
+  return rows;
+};
+
+export const getBuildingCalculationsPage = async (buildingId, { limit, after, fields, columnar = false } = {}) => {
+  const params = {};
+  if (limit) params.limit = limit;
+  if (after) params.after = after;
+  if (fields) params.fields = Array.isArray(fields) ? fields.join(',') : fields;
+  const headers = columnar ? { Accept: `${COLUMNAR_MEDIA_TYPE}, application/json;q=0.5` } : {};
+
+  const response = await apiClient.get(`/api/efficiency/building/${buildingId}`, { params, headers });
+  const isColumnar = (response.headers['content-type'] || '').startsWith(COLUMNAR_MEDIA_TYPE);
+  return {
+    items: isColumnar ? fromColumnar(response.data) : response.data,
+    nextCursor: response.headers['x-next-cursor'] || null,
+  };
+};
+
 export const getBuildingPeriodCalculations = async (buildingId, period) => {
   const response = await apiClient.get(`/api/efficiency/building/${buildingId}/period/${period}`);
   return response.data;
@@ -48,5 +147,67 @@ export const getBuildingSummary = async (buildingId) => {
   return response.data;
 };
 
+// New calculations for the given buildings arrive over one server-sent event
+// stream; EventSource reconnects on its own. Returns a function that closes it.
+export const subscribeToCalculations = (buildingIds, onCalculation) => {
+  const params = new URLSearchParams();
+  buildingIds.forEach((id) => params.append('building_id', id));
+  const source = new EventSource(`${API_BASE_URL}/api/efficiency/events?${params.toString()}`);
+  source.addEventListener('calculation', (event) => onCalculation(JSON.parse(event.data)));
+  return () => source.close();
+};
+
+export const getBuildingTrend = async (buildingId, { points, start, end, period } = {}) => {
+  const params = {};
+  if (points) params.points = points;
+  if (start) params.start = start;
+  if (end) params.end = end;
+  if (period) params.period = period;
+
+  const response = await apiClient.get(`/api/efficiency/building/${buildingId}/trend`, { params });
+  return response.data;
+};
+
+// Large runs go through the job queue: the request returns as soon as the
+// upload is stored, and progress is polled with getJob
+export const submitCalculationJob = async (calculations) => {
+  const body = calculations.map((calculation) => JSON.stringify(calculation)).join('\n');
+  const response = await apiClient.post('/api/jobs/calculate', body, {
+    headers: { 'Content-Type': 'application/x-ndjson' },
+  });
+  return response.data;
+};
+
+export const getJob = async (jobId) => {
+  const response = await apiClient.get(`/api/jobs/${jobId}`);
+  return response.data;
+};
+
+// Raw meter readings (a CSV file or NDJSON text) are bucketed into periods by
+// the server; with calculate the result is stored as a calculation
+export const ingestIntervalReadings = async (body, { electricRate, gasRate, timeRange, days = [], calculate = false, buildingId, measureName }) => {
+  const params = new URLSearchParams({ electric_rate: electricRate, gas_rate: gasRate });
+  if (timeRange) params.append('time_range', timeRange);
+  days.forEach((day) => params.append('days', day));
+  if (calculate) {
+    params.append('calculate', 'true');
+    params.append('building_id', buildingId);
+    params.append('measure_name', measureName);
+  }
+  const contentType = typeof body === 'string' && body.trimStart().startsWith('{') ? 'application/x-ndjson' : 'text/csv';
+  const response = await apiClient.post(`/api/efficiency/intervals?${params.toString()}`, body, {
+    headers: { 'Content-Type': contentType },
+  });
+  return response.data;
+};
+
+export const getExportUrl = ({ buildingIds = [], format = 'csv', start, end } = {}) => {
+  const params = new URLSearchParams({ format });
+  buildingIds.forEach((id) => params.append('building_id', id));
+  if (start) params.append('start', start);
+  if (end) params.append('end', end);
+  return `${API_BASE_URL}/api/efficiency/export?${params.toString()}`;
+};
+
 export default apiClient;
 